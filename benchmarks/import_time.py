@@ -0,0 +1,105 @@
+"""
+Import-time benchmark.
+
+Imports each entrypoint in fresh interpreters and reports the median wall
+time, the number of modules loaded and which heavy dependencies (Vertex
+SDK, ADK, pandas) came with it. Validation-only entrypoints must not load
+any of them; `--check` exits non-zero if one does, so CI can track it.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 10 --json import_time.json --check
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+HEAVY = ("vertexai", "google.cloud.aiplatform", "google.adk", "google.genai", "pandas")
+
+# entrypoint -> heavy modules it is allowed to load
+ENTRYPOINTS: Dict[str, tuple] = {
+    "hsn_agent": (),
+    "hsn_agent.tools": (),
+    "hsn_agent.tools.validate": (),
+    "hsn_agent.tools.batch_validate": (),
+    "hsn_agent.tools.documents_handler.rag_query": (),
+    "hsn_agent.agent": HEAVY,
+}
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "modules": len(sys.modules),
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str, repeat: int) -> dict:
+    runs: List[dict] = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD.format(module=module, heavy=HEAVY)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if out.returncode != 0:
+            return {"module": module, "error": out.stderr.strip().splitlines()[-1:]}
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(r["seconds"] for r in runs) * 1000, 1),
+        "min_ms": round(min(r["seconds"] for r in runs) * 1000, 1),
+        "modules": runs[-1]["modules"],
+        "heavy": runs[-1]["heavy"],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time")
+    parser.add_argument("modules", nargs="*", help="Entrypoints (default: all known)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    parser.add_argument(
+        "--check", action="store_true",
+        help="Fail if an entrypoint loads heavy modules it is not allowed to",
+    )
+    args = parser.parse_args(argv)
+
+    results = [measure(m, max(1, args.repeat)) for m in (args.modules or ENTRYPOINTS)]
+
+    failed = False
+    for r in results:
+        if "error" in r:
+            failed = True
+            print(f"{r['module']:<48} error: {' '.join(r['error'])}")
+            continue
+        unexpected = [m for m in r["heavy"] if m not in ENTRYPOINTS.get(r["module"], HEAVY)]
+        r["unexpected"] = unexpected
+        failed = failed or bool(unexpected)
+        print(
+            f"{r['module']:<48} {r['median_ms']:>8.1f} ms  {r['modules']:>5} modules  "
+            f"heavy={','.join(r['heavy']) or '-'}"
+            + (f"  UNEXPECTED={','.join(unexpected)}" if unexpected else "")
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=1)
+    return 1 if args.check and failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
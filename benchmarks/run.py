@@ -0,0 +1,348 @@
+"""
+Hot-path benchmark suite.
+
+Times the agent's local hot paths against synthetic masters (see
+`benchmarks/synthetic.py`) of 20k, 200k and 2M rows:
+
+- `load_hsn_master` cold (first load in a fresh interpreter) and warm,
+- `validate_hsn_code` on hits, misses (with fuzzy suggestions) and
+  malformed input, and the fuzzy suggester on its own; the suggestion
+  cache is cleared before every timed miss, so they time the suggester,
+  and `fuzzy.suggest.cached` times the cache hit,
+- the pattern branch of `rag_query` (ends with / begins with / contains),
+- the retrieval path of `rag_query` with the `rag` module replaced by
+  `StubRag`, on retrieval-cache misses and hits.
+
+Each master size runs in its own interpreter so indexes of one size do not
+skew the memory or timings of the next. Results (median, mean, p95 and min
+per call) are written as JSON; `--compare` checks them against an earlier
+run and exits non-zero on regressions.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 20k,200k --json before.json
+    python -m benchmarks.run --json after.json --compare before.json --threshold 1.25
+"""
+
+import os
+
+# Fixed settings for comparable runs; set before hsn_agent reads its config.
+os.environ["HSN_MASTER_WATCH_INTERVAL"] = "0"
+os.environ["HSN_RAG_BACKEND"] = "vertex"
+os.environ["HSN_RETRIEVAL_CACHE_PATH"] = ""
+os.environ["HSN_FAST_PATH_ROUTER"] = "true"
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .synthetic import synthetic_master
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+SIZES = {"20k": 20_000, "200k": 200_000, "2m": 2_000_000}
+
+
+def summarize(name: str, rows: int, samples: List[float]) -> dict:
+    """Per-call statistics in microseconds for `samples` in seconds."""
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    return {
+        "name": name,
+        "rows": rows,
+        "rounds": len(ordered),
+        "median_us": round(median * 1e6, 2),
+        "mean_us": round(statistics.fmean(ordered) * 1e6, 2),
+        "p95_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e6, 2),
+        "min_us": round(ordered[0] * 1e6, 2),
+        "ops_per_sec": round(1 / median) if median > 0 else None,
+    }
+
+
+def bench(
+    fn: Callable[[int], object],
+    min_time: float,
+    min_rounds: int,
+    setup: Optional[Callable[[], object]] = None,
+) -> List[float]:
+    """
+    Calls `fn(i)` until both `min_time` seconds and `min_rounds` calls have
+    passed. `setup()`, if given, runs untimed before every call.
+    """
+    fn(0)  # warm-up: builds derived indexes, fills caches
+    samples: List[float] = []
+    clock = time.perf_counter
+    deadline = clock() + min_time
+    i = 1
+    while len(samples) < min_rounds or clock() < deadline:
+        if setup is not None:
+            setup()
+        start = clock()
+        fn(i)
+        samples.append(clock() - start)
+        i += 1
+    return samples
+
+
+async def abench(
+    fn: Callable[[int], Awaitable[object]], min_time: float, min_rounds: int
+) -> List[float]:
+    """`bench` for coroutine functions; timed inside the running loop."""
+    await fn(0)
+    samples: List[float] = []
+    clock = time.perf_counter
+    deadline = clock() + min_time
+    i = 1
+    while len(samples) < min_rounds or clock() < deadline:
+        start = clock()
+        await fn(i)
+        samples.append(clock() - start)
+        i += 1
+    return samples
+
+
+def _tool_context() -> SimpleNamespace:
+    return SimpleNamespace(state={})
+
+
+def cold_load(path: str) -> float:
+    """Seconds for the first `load_hsn_master` call in this interpreter."""
+    from hsn_agent.tools.load_hsn_master import load_hsn_master
+
+    start = time.perf_counter()
+    result = load_hsn_master(path, _tool_context())
+    seconds = time.perf_counter() - start
+    if result["status"] != "success":
+        raise RuntimeError(result["message"])
+    return seconds
+
+
+def _sample_codes(index, rng: random.Random, n: int) -> Dict[str, List[str]]:
+    codes = [c for c in index.table if len(c) == 8]
+    hits = rng.sample(codes, min(n, len(codes)))
+    misses: List[str] = []
+    while len(misses) < n:
+        # Keep the heading, change the rest: a near miss with suggestions.
+        code = rng.choice(codes)[:4] + f"{rng.randrange(10_000):04d}"
+        if code not in index:
+            misses.append(code)
+    malformed = ["12a4", "123", "1234567890", "0101.10", "", "HSN01", "01011010x", "9"]
+    return {"hits": hits, "misses": misses, "malformed": malformed}
+
+
+def run_hot_paths(path: str, rows: int, min_time: float, min_rounds: int, seed: int) -> List[dict]:
+    """Warm-path benchmarks for one master, in this interpreter."""
+    from hsn_agent.tools.documents_handler.rag_query import rag_query
+    from hsn_agent.tools.load_hsn_master import load_hsn_master
+    from hsn_agent.tools.master_index import get_master_index
+    from hsn_agent.tools.rag_client import rag_client
+    from hsn_agent.tools.retrieval_cache import retrieval_cache
+    from hsn_agent.tools.validate import validate_hsn_code
+
+    from .stub_rag import StubRag
+
+    ctx = _tool_context()
+    if load_hsn_master(path, ctx)["status"] != "success":
+        raise RuntimeError(f"Could not load {path}")
+    index = get_master_index(path)
+    rng = random.Random(seed)
+    samples = _sample_codes(index, rng, 1000)
+
+    def cycle(values: List[str]) -> Callable[[int], str]:
+        return lambda i: values[i % len(values)]
+
+    hit, miss, bad = cycle(samples["hits"]), cycle(samples["misses"]), cycle(samples["malformed"])
+    # The misses cycle through fewer codes than the suggestion cache holds.
+    uncached = index.fuzzy.cache_clear
+    results = [
+        summarize("load_hsn_master.warm", rows,
+                  bench(lambda i: load_hsn_master(path, ctx), min_time, min_rounds)),
+        summarize("validate_hsn_code.hit", rows,
+                  bench(lambda i: validate_hsn_code(hit(i), ctx), min_time, min_rounds)),
+        summarize("validate_hsn_code.miss", rows,
+                  bench(lambda i: validate_hsn_code(miss(i), ctx), min_time, min_rounds, uncached)),
+        summarize("validate_hsn_code.malformed", rows,
+                  bench(lambda i: validate_hsn_code(bad(i), ctx), min_time, min_rounds)),
+        summarize("fuzzy.suggest", rows,
+                  bench(lambda i: index.fuzzy.suggest(miss(i)), min_time, min_rounds, uncached)),
+        summarize("fuzzy.suggest.cached", rows,
+                  bench(lambda i: index.fuzzy.suggest(miss(i)), min_time, min_rounds)),
+    ]
+
+    patterns = {
+        "ends_with": [f"codes that end with {c[-2:]}" for c in samples["hits"][:50]],
+        "begins_with": [f"codes that begin with {c[:4]}" for c in samples["hits"][:50]],
+        "contains": [f"code contains {c[2:5]}" for c in samples["hits"][:50]],
+    }
+
+    rag_client.set_backend(StubRag(corpora=("bench",)))
+    loop = asyncio.new_event_loop()
+    try:
+        for mode, queries in patterns.items():
+            q = cycle(queries)
+            results.append(summarize(
+                f"rag_query.pattern.{mode}", rows,
+                loop.run_until_complete(
+                    abench(lambda i: rag_query("bench", q(i), ctx), min_time, min_rounds)
+                ),
+            ))
+
+        # Words outside the master vocabulary, so the lexical fast path
+        # declines and the query goes to (stubbed) RAG retrieval.
+        results.append(summarize(
+            "rag_query.retrieval.miss", rows,
+            loop.run_until_complete(abench(
+                lambda i: rag_query("bench", f"quantum flux capacitor {i}", ctx),
+                min_time, min_rounds,
+            )),
+        ))
+        results.append(summarize(
+            "rag_query.retrieval.hit", rows,
+            loop.run_until_complete(abench(
+                lambda i: rag_query("bench", "quantum flux capacitor", ctx),
+                min_time, min_rounds,
+            )),
+        ))
+    finally:
+        loop.close()
+        rag_client.set_backend(None)
+        retrieval_cache.invalidate()
+    return results
+
+
+def _child(args: List[str]) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip() or f"benchmark worker exited with {out.returncode}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_size(label: str, rows: int, args) -> List[dict]:
+    path = synthetic_master(rows, args.seed)
+    cold = [
+        _child(["--worker", "cold", "--master", path])["seconds"]
+        for _ in range(max(1, args.cold_rounds))
+    ]
+    results = [summarize("load_hsn_master.cold", rows, cold)]
+    results += _child([
+        "--worker", "hot", "--master", path, "--rows", str(rows),
+        "--min-time", str(args.min_time), "--min-rounds", str(args.min_rounds),
+        "--seed", str(args.seed),
+    ])["results"]
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(current: List[dict], baseline_path: str, threshold: float) -> List[dict]:
+    """Benchmarks whose median got slower than `threshold` × the baseline."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["name"], r["rows"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in current:
+        old = baseline.get((r["name"], r["rows"]))
+        if not old or not old["median_us"]:
+            continue
+        ratio = r["median_us"] / old["median_us"]
+        r["baseline_median_us"] = old["median_us"]
+        r["ratio"] = round(ratio, 3)
+        if ratio > threshold:
+            regressions.append(r)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("--sizes", default="20k,200k,2m",
+                        help=f"Comma-separated master sizes out of {', '.join(SIZES)}")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="Minimum seconds per benchmark")
+    parser.add_argument("--min-rounds", type=int, default=50)
+    parser.add_argument("--cold-rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path",
+                        help="Results file (default: benchmarks/results/<revision>.json)")
+    parser.add_argument("--compare", help="Earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Median slowdown ratio that counts as a regression")
+    # Internal: run one measurement in this interpreter and print JSON.
+    parser.add_argument("--worker", choices=("cold", "hot"), help=argparse.SUPPRESS)
+    parser.add_argument("--master", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker == "cold":
+        print(json.dumps({"seconds": cold_load(args.master)}))
+        return 0
+    if args.worker == "hot":
+        results = run_hot_paths(args.master, args.rows, args.min_time, args.min_rounds, args.seed)
+        print(json.dumps({"results": results}))
+        return 0
+
+    labels = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in labels if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes {unknown}; choose from {', '.join(SIZES)}")
+
+    results: List[dict] = []
+    for label in labels:
+        print(f"== {label} rows ==", file=sys.stderr)
+        for r in run_size(label, SIZES[label], args):
+            results.append(r)
+            print(
+                f"{r['name']:<30} {r['median_us']:>12.1f} us median  "
+                f"{r['p95_us']:>12.1f} us p95  ({r['rounds']} rounds)",
+                file=sys.stderr,
+            )
+
+    regressions = compare(results, args.compare, args.threshold) if args.compare else []
+    for r in regressions:
+        print(
+            f"REGRESSION {r['name']} @ {r['rows']} rows: {r['baseline_median_us']} -> "
+            f"{r['median_us']} us ({r['ratio']}x)",
+            file=sys.stderr,
+        )
+
+    revision = _git_revision()
+    path = args.json_path or os.path.join(RESULTS_DIR, f"{revision or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "revision": revision,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": args.seed,
+                "min_time": args.min_time,
+            },
+            "results": results,
+        }, f, indent=1)
+    print(f"Wrote {path}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Offline stand-in for the `vertexai.rag` module.
+
+Implements the calls `RagClient` makes (`list_corpora`, `list_files`,
+`retrieval_query`, `import_files`, `delete_file`) with canned responses
+and an optional fixed latency, so the retrieval path of `rag_query` can be
+timed without network access:
+
+    rag_client.set_backend(StubRag(latency=0.05))
+"""
+
+import time
+from types import SimpleNamespace
+from typing import List, Sequence
+
+
+def _config(**kwargs) -> SimpleNamespace:
+    return SimpleNamespace(**kwargs)
+
+
+class StubRag:
+    RagResource = staticmethod(_config)
+    RagRetrievalConfig = staticmethod(_config)
+    Filter = staticmethod(_config)
+    TransformationConfig = staticmethod(_config)
+    ChunkingConfig = staticmethod(_config)
+
+    def __init__(
+        self,
+        corpora: Sequence[str] = ("bench",),
+        contexts: int = 10,
+        latency: float = 0.0,
+        project: str = "bench-project",
+        location: str = "us-central1",
+    ):
+        self.latency = latency
+        self.contexts = contexts
+        self.corpora = [
+            SimpleNamespace(
+                name=f"projects/{project}/locations/{location}/ragCorpora/{i + 1}",
+                display_name=name,
+            )
+            for i, name in enumerate(corpora)
+        ]
+        self.calls = 0
+
+    def _call(self) -> None:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def list_corpora(self) -> List[SimpleNamespace]:
+        self._call()
+        return list(self.corpora)
+
+    def list_files(self, corpus_name: str) -> List[SimpleNamespace]:
+        self._call()
+        return []
+
+    def retrieval_query(self, rag_resources, text: str, rag_retrieval_config) -> SimpleNamespace:
+        self._call()
+        contexts = [
+            SimpleNamespace(
+                source_uri=f"gs://bench/doc{i}.pdf",
+                source_display_name=f"doc{i}.pdf",
+                text=f"Chapter {i:02d} notes matching '{text}'. " * 8,
+                score=round(0.1 + i / 100, 3),
+            )
+            for i in range(min(self.contexts, rag_retrieval_config.top_k))
+        ]
+        return SimpleNamespace(contexts=SimpleNamespace(contexts=contexts))
+
+    def import_files(self, corpus_name: str, paths, **kwargs) -> SimpleNamespace:
+        self._call()
+        return SimpleNamespace(
+            imported_rag_files_count=len(paths),
+            failed_rag_files_count=0,
+            skipped_rag_files_count=0,
+        )
+
+    def delete_file(self, name: str) -> None:
+        self._call()
@@ -0,0 +1,93 @@
+"""
+Synthetic HSN masters for benchmarks.
+
+Generates a CSV with the same layout as the bundled master (2-digit
+chapters, 4-digit headings, 6-digit subheadings, 8-digit tariff items)
+and any number of rows. Descriptions are drawn from a fixed vocabulary
+with a realistic share of "OTHER" rows, so the fuzzy, pattern and
+lexical indexes see similar data. Output is deterministic for a seed and
+cached on disk.
+"""
+
+import csv
+import itertools
+import os
+import random
+from typing import List
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+NOUNS = (
+    "horses", "cattle", "fish", "milk", "cheese", "eggs", "honey", "flowers",
+    "potatoes", "tomatoes", "onions", "beans", "coffee", "tea", "pepper", "wheat",
+    "rice", "maize", "flour", "sugar", "cocoa", "wine", "beer", "salt", "cement",
+    "oil", "soap", "paint", "rubber", "leather", "wood", "paper", "silk", "wool",
+    "cotton", "yarn", "fabric", "shirts", "footwear", "glass", "pearls", "steel",
+    "copper", "aluminium", "tools", "pumps", "engines", "bearings", "valves",
+    "motors", "batteries", "lamps", "cables", "tractors", "bicycles", "ships",
+    "lenses", "watches", "pianos", "furniture", "toys", "brushes", "pens",
+)
+QUALIFIERS = (
+    "live", "fresh", "chilled", "frozen", "dried", "roasted", "raw", "refined",
+    "crude", "woven", "knitted", "printed", "coated", "plated", "electric",
+    "manual", "portable", "industrial", "domestic", "synthetic", "natural",
+    "pure-bred", "breeding", "whole", "cut", "ground", "powdered", "other than",
+)
+_SYLLABLES = ("ba", "ko", "ri", "tu", "ne", "sa", "lo", "mi", "da", "pe", "vu", "ga")
+# Rare words so the lexical index has a long tail, as real masters do.
+RARE = tuple("".join(p) for p in itertools.product(_SYLLABLES, repeat=3))
+
+
+def _description(rng: random.Random) -> str:
+    if rng.random() < 0.15:
+        return "OTHER"
+    words: List[str] = [rng.choice(QUALIFIERS)]
+    words += rng.sample(NOUNS, rng.randint(1, 3))
+    if rng.random() < 0.5:
+        words.append(rng.choice(RARE))
+    return " ".join(words).upper()
+
+
+def _fanout(rows: int) -> int:
+    fan = 1
+    while 98 * (1 + fan + fan ** 2 + fan ** 3) < rows:
+        fan += 1
+    return min(fan, 99)
+
+
+def generate_master(rows: int, path: str, seed: int = 0) -> str:
+    """Writes a synthetic master of exactly `rows` rows (at most ~96M) to `path`."""
+    rng = random.Random(seed)
+    fan = _fanout(rows)
+    full = 98 * (1 + fan + fan ** 2 + fan ** 3)
+    # Drop random tariff items to get exactly `rows` codes.
+    drop = set(rng.sample(range(98 * fan ** 3), max(0, full - rows)))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    item = 0
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["HSNCode", "Description"])
+        for chapter in range(1, 99):
+            writer.writerow([f"{chapter:02d}", _description(rng)])
+            for heading in range(1, fan + 1):
+                h = f"{chapter:02d}{heading:02d}"
+                writer.writerow([h, _description(rng)])
+                for sub in range(1, fan + 1):
+                    s = f"{h}{sub:02d}"
+                    writer.writerow([s, _description(rng)])
+                    for tariff in range(1, fan + 1):
+                        if item not in drop:
+                            writer.writerow([f"{s}{tariff:02d}", _description(rng)])
+                        item += 1
+    os.replace(tmp, path)
+    return path
+
+
+def synthetic_master(rows: int, seed: int = 0, directory: str = DATA_DIR) -> str:
+    """Path of the cached synthetic master with `rows` rows, generating it if needed."""
+    path = os.path.join(directory, f"master_{rows}_{seed}.csv")
+    if not os.path.isfile(path):
+        generate_master(rows, path, seed)
+    return path
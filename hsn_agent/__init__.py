@@ -2,34 +2,35 @@
 Vertex AI RAG Agent
 
 A package for interacting with Google Cloud Vertex AI RAG capabilities.
+
+Submodules are imported on first use: `hsn_agent.agent` (and with it the
+ADK and every tool) is loaded when it is first accessed, and Vertex AI is
+initialized on the first remote call (see `tools.rag_client`). A process
+that only validates codes never imports the Vertex SDK.
+
+With `HSN_WARMUP_LOG` set, importing the package also starts warming the
+master index and caches from a recorded query log in the background (see
+`warmup`).
 """
 
-import os
+import importlib
 
-import vertexai
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Get Vertex AI configuration from environment
-PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
-LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION")
-
-# Initialize Vertex AI at package load time
-try:
-    if PROJECT_ID and LOCATION:
-        print(f"Initializing Vertex AI with project={PROJECT_ID}, location={LOCATION}")
-        vertexai.init(project=PROJECT_ID, location=LOCATION)
-        print("Vertex AI initialization successful")
-    else:
-        print(
-            f"Missing Vertex AI configuration. PROJECT_ID={PROJECT_ID}, LOCATION={LOCATION}. "
-            f"Tools requiring Vertex AI may not work properly."
-        )
-except Exception as e:
-    print(f"Failed to initialize Vertex AI: {str(e)}")
-    print("Please check your Google Cloud credentials and project settings.")
-
-# Import agent after initialization is complete
-from . import agent
+# Imported after load_dotenv so that .env settings apply.
+from .config import WARMUP_LOG_PATH  # noqa: E402
+
+if WARMUP_LOG_PATH:
+    from .warmup import start_warmup
+
+    start_warmup(WARMUP_LOG_PATH)
+
+
+def __getattr__(name):
+    if name in ("agent", "root_agent"):
+        agent = importlib.import_module(".agent", __name__)
+        return agent if name == "agent" else agent.root_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -11,24 +11,39 @@ from hsn_agent.tools import (
 from hsn_agent.tools.documents_handler.add_document import add_data
 from hsn_agent.tools.documents_handler.delete_document import delete_document
 from hsn_agent.tools.documents_handler.rag_query import rag_query
+from hsn_agent.tools.documents_handler.rag_query_batch import rag_query_batch
+from hsn_agent.tools.documents_handler.sync_documents import sync_documents
 from hsn_agent.tools.validate import validate_hsn_code
 from hsn_agent.tools.load_hsn_master import load_hsn_master
+from hsn_agent.router import route_fast_path
+from hsn_agent.warmup import record_tool_call
+from hsn_agent.metrics import (
+    instrument_callback,
+    instrument_tools,
+    record_payload_size,
+    start_metrics_export,
+)
 
 root_agent = Agent(
     name="RagAgent",
     model="gemini-2.5-flash-preview-04-17",
     description="HSN Code Validation & Suggestion Agent",
-    tools=[
+    tools=instrument_tools([
         list_corpora,
         create_corpus,
         delete_corpus,
         get_corpus_info,
         add_data,
         delete_document,
+        sync_documents,
         rag_query,
+        rag_query_batch,
         validate_hsn_code,
         load_hsn_master,
-    ],
+    ]),
+    before_model_callback=instrument_callback(route_fast_path),
+    before_tool_callback=record_tool_call,
+    after_tool_callback=record_payload_size,
     instruction=f"""
         # Aim: HSN Code Validation and Suggestion Agent
 
@@ -63,6 +78,10 @@ root_agent = Agent(
             - `invalid_format` if not 2–8 digits  
             - `not_found` if absent from master  
             - `valid` + description + full parent hierarchy
+        - Results may come in compact form: entries under `r` with short keys (c code, s status,
+          h parent codes, n subcodes, a nearest ancestor, sg suggested codes, sc score, src sources,
+          o named parent of an OTHER code, t text) and every description once in `d`, keyed by code.
+          Look descriptions up in `d`; never invent them.
 
         - **Then** wrap that raw tool‐output in a polished single paragraph and bullet the hierarchy.  
             _Example_:  
@@ -72,7 +91,8 @@ root_agent = Agent(
         1.5 **Partial-Code Pattern Queries**  
         If the user says things like “ends with 99”, “begins with 123”, or “contains 333”  
         you must call `rag_query(corpus_name="{DEFAULT_CORPUS}", query="<user_input>")`  
-        (our tool will detect the pattern and return up to 5 matching HSN codes).  
+        (our tool will detect the pattern and return up to 5 matching HSN codes plus the total match count).  
+        If the user wants more results, call it again with "page <n>" appended to the query (e.g. “ends with 99 page 2”).  
 
         2. **Free-Text Suggestions**  
         - For any natural-language query (e.g. “horse which can be used in polo”), call  
@@ -81,10 +101,16 @@ root_agent = Agent(
             ```text
             1. <HSN code> – <description> (score: <relevance>)
             ```
+        - If the user lists several products at once (e.g. “cotton shirts, steel screws, polo horses”), make a single call  
+            `rag_query_batch(corpus_name="{DEFAULT_CORPUS}", products=["<user_input>"])`  
+            and answer with the top matches grouped per product.
 
         3. **Corpus Management** _(admin only)_  
         - Only honor `list_corpora`, `create_corpus`, etc., if the user explicitly prefixes with `admin:`.  
         - All new documents default into **{DEFAULT_CORPUS}** via `add_data(corpus_name="{DEFAULT_CORPUS}", paths=[…])`.
+          Unchanged documents are skipped and changed ones replaced automatically.
+        - To make the corpus mirror a full document list (also deleting documents no longer listed), use
+          `sync_documents(corpus_name="{DEFAULT_CORPUS}", paths=[…])`.
 
         ## Agent Response Expectations
 
@@ -97,3 +123,5 @@ root_agent = Agent(
         - Be concise, clear, and always ground responses in the tool outputs provided.
         """,
 )
+
+start_metrics_export()
@@ -24,3 +24,85 @@ DEFAULT_TOP_K = 3
 DEFAULT_DISTANCE_THRESHOLD = 0.5
 DEFAULT_EMBEDDING_MODEL = "publishers/google/models/text-embedding-005"
 DEFAULT_EMBEDDING_REQUESTS_PER_MIN = 1000
+CORPUS_REGISTRY_TTL = 300
+RAG_MAX_CONCURRENCY = 16
+
+# Document ingestion (add_data)
+INGESTION_BATCH_SIZE = 25
+INGESTION_MAX_PARALLEL = 4
+INGESTION_MAX_RETRIES = 3
+INGESTION_BACKOFF_SECONDS = 2.0
+INGESTION_MANIFEST_DIR = os.environ.get(
+    "HSN_INGESTION_MANIFEST_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "manifests"),
+)
+
+# Local lexical fast path: free-text queries whose words are all matched by
+# a master description are answered without calling Vertex AI.
+LEXICAL_FAST_PATH = os.environ.get("HSN_LEXICAL_FAST_PATH", "true").lower() == "true"
+LEXICAL_MIN_CONFIDENCE = 0.95
+LEXICAL_TOP_K = 5
+
+# Answer pure code lists and "ends with 99"-style pattern queries without
+# calling the model (see router.py).
+FAST_PATH_ROUTER = os.environ.get("HSN_FAST_PATH_ROUTER", "true").lower() == "true"
+
+# Retrieval backend for free-text queries: "vertex" (Vertex AI RAG corpus),
+# "local" (offline vector index over master descriptions) or "hybrid"
+# (Vertex results fused with master lexical hits, see tools/hybrid.py).
+RAG_BACKEND = os.environ.get("HSN_RAG_BACKEND", "vertex").lower()
+HYBRID_RRF_K = 60
+HYBRID_LEXICAL_K = 10
+# Return RAG chunks as code-keyed entries enriched from the master instead
+# of raw chunk text (see tools/postprocess.py).
+RAG_COMPACT_RESULTS = os.environ.get("HSN_RAG_COMPACT_RESULTS", "true").lower() == "true"
+RAG_SNIPPET_CHARS = 240
+# Shape of validate_hsn_code / rag_query results (see tools/output.py):
+# "verbose", "compact" or "ids". A session can override it with
+# state["output_profile"].
+OUTPUT_PROFILE = os.environ.get("HSN_OUTPUT_PROFILE", "verbose").lower()
+# Hashing buckets of the default local embedder; fewer make unrelated terms
+# collide (see tools/vector_index.py).
+VECTOR_DIM = 1 << 14
+
+# Retrieval result cache in front of rag.retrieval_query
+RETRIEVAL_CACHE_TTL = 3600
+RETRIEVAL_CACHE_MAX_ENTRIES = 4096
+RETRIEVAL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+RETRIEVAL_CACHE_PATH = os.environ.get("HSN_RETRIEVAL_CACHE_PATH")
+
+# Metrics (see metrics.py). METRICS_EXPORTER: "" (in-process snapshot
+# only), "prometheus" (serve /metrics on METRICS_PORT) or "otel".
+METRICS_ENABLED = os.environ.get("HSN_METRICS", "true").lower() == "true"
+METRICS_EXPORTER = os.environ.get("HSN_METRICS_EXPORTER", "").lower()
+METRICS_PORT = int(os.environ.get("HSN_METRICS_PORT", "9464"))
+
+# Startup warm-up (see warmup.py). HSN_QUERY_LOG records tool calls as JSON
+# lines; HSN_WARMUP_LOG replays such a log in the background when
+# `hsn_agent` is imported, within WARMUP_TIME_BUDGET seconds and at most
+# WARMUP_MAX_QPS retrievals per second. Empty paths disable either.
+QUERY_LOG_PATH = os.environ.get("HSN_QUERY_LOG", "")
+WARMUP_LOG_PATH = os.environ.get("HSN_WARMUP_LOG", "")
+WARMUP_TIME_BUDGET = float(os.environ.get("HSN_WARMUP_SECONDS", "120"))
+WARMUP_MAX_QPS = float(os.environ.get("HSN_WARMUP_QPS", "5"))
+WARMUP_TOP_QUERIES = int(os.environ.get("HSN_WARMUP_TOP_QUERIES", "500"))
+WARMUP_TOP_TYPOS = 1000
+
+# rag_query_batch: items per call and concurrent lookups
+BATCH_QUERY_MAX_ITEMS = 50
+BATCH_QUERY_MAX_PARALLEL = 8
+
+# HSN master settings
+HSN_MASTER_PATH = os.environ.get(
+    "HSN_MASTER_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "master_hsn.csv"),
+)
+# Seconds between checks of the master file for changes; 0 disables hot reload.
+HSN_MASTER_WATCH_INTERVAL = float(os.environ.get("HSN_MASTER_WATCH_INTERVAL", "30"))
+# Suggestions further than this many edits rank after the closer ones. The
+# delete index finds every code within 1 edit, but at 2 edits only a moved
+# digit, not two substitutions (see tools/fuzzy.py).
+FUZZY_MAX_DISTANCE = 2
+# Typos whose suggestions are memoized per master index
+FUZZY_CACHE_SIZE = 4096
+PATTERN_PAGE_SIZE = 5
@@ -0,0 +1,455 @@
+"""
+In-process metrics for tools, remote calls and the master index.
+
+Instrumented code holds pre-bound series and updates them directly:
+
+    latency = metrics.histogram("hsn_tool_latency_seconds", tool="rag_query")
+    latency.observe(seconds)
+
+so the hot path costs a lock and a few additions. Recorded metrics:
+
+- `hsn_tool_latency_seconds` and `hsn_tool_errors_total` per tool (see
+  `instrument_tool`; the histogram's `_count` is the call count, errors are
+  exceptions or results with status "error"),
+- `hsn_callback_latency_seconds` and `hsn_callback_errors_total` per agent
+  callback such as the fast-path router (see `instrument_callback`),
+- `hsn_tool_payload_bytes` per tool: serialized size of the results the
+  model reads (see `record_payload_size`),
+- `hsn_rag_calls_total`, `hsn_rag_coalesced_total`, `hsn_rag_errors_total`,
+  `hsn_rag_call_seconds` per `rag.*` SDK method (see `rag_client`),
+- `hsn_master_load_seconds` (initial load / reload) and `hsn_master_codes`,
+- cache statistics, pulled from registered collectors at export time.
+
+Everything is readable in-process with `metrics.snapshot()`. Exporters:
+
+- Prometheus text format: `render_prometheus()`, or `serve_prometheus(port)`
+  for a `/metrics` endpoint,
+- OpenTelemetry: `set_exporter(OpenTelemetryExporter())` forwards every
+  measurement to an OTel meter,
+- any other `Exporter` subclass.
+
+`start_metrics_export()` sets these up from `METRICS_EXPORTER`.
+"""
+
+import abc
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import METRICS_ENABLED, METRICS_EXPORTER, METRICS_PORT
+
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+# (kind, name, labels, value) produced by collectors
+Sample = Tuple[str, str, Dict[str, str], float]
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+# bytes
+SIZE_BUCKETS = (
+    128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072, 262144,
+)
+
+HELP = {
+    "hsn_tool_errors_total": "Tool invocations that raised or returned status 'error'.",
+    "hsn_tool_latency_seconds": "Tool latency; _count is the number of calls.",
+    "hsn_tool_payload_bytes": "JSON size of tool results returned to the model.",
+    "hsn_callback_errors_total": "Agent callback invocations that raised.",
+    "hsn_callback_latency_seconds": "Agent callback latency; _count is the number of calls.",
+    "hsn_rag_calls_total": "Vertex AI RAG SDK calls made.",
+    "hsn_rag_coalesced_total": "RAG read requests served by an identical in-flight call.",
+    "hsn_rag_errors_total": "Vertex AI RAG SDK calls that raised.",
+    "hsn_rag_call_seconds": "Duration of Vertex AI RAG SDK calls.",
+    "hsn_master_load_seconds": "Time to build the HSN master index.",
+    "hsn_master_codes": "Codes in the most recently loaded HSN master.",
+    "hsn_warmup_ready": "1 once the startup warm-up has finished successfully.",
+    "hsn_warmup_failed": "1 if the startup warm-up failed.",
+}
+
+
+class Exporter(abc.ABC):
+    """
+    Receives every counter, gauge and histogram update as it happens. An
+    optional `install(registry)` method is called by `set_exporter`.
+    """
+
+    @abc.abstractmethod
+    def record(self, kind: str, name: str, labels: Dict[str, str], value: float) -> None:
+        """`kind` is "counter", "gauge" or "histogram"."""
+
+
+_exporter: Optional[Exporter] = None
+
+
+def set_exporter(exporter: Optional[Exporter]) -> None:
+    """Installs a push exporter (e.g. `OpenTelemetryExporter()`). None removes it."""
+    global _exporter
+    if exporter is not None and hasattr(exporter, "install"):
+        exporter.install(metrics)
+    _exporter = exporter
+
+
+class Counter:
+    __slots__ = ("name", "labels", "value", "_lock")
+
+    def __init__(self, name: str, labels: LabelKey):
+        self.name = name
+        self.labels = labels
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1.0) -> None:
+        with self._lock:
+            self.value += value
+        if _exporter is not None:
+            _exporter.record("counter", self.name, dict(self.labels), value)
+
+
+class Gauge:
+    __slots__ = ("name", "labels", "value")
+
+    def __init__(self, name: str, labels: LabelKey):
+        self.name = name
+        self.labels = labels
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+        if _exporter is not None:
+            _exporter.record("gauge", self.name, dict(self.labels), value)
+
+
+class Histogram:
+    __slots__ = ("name", "labels", "buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, name: str, labels: LabelKey, buckets: Tuple[float, ...]):
+        self.name = name
+        self.labels = labels
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+        if _exporter is not None:
+            _exporter.record("histogram", self.name, dict(self.labels), value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._series: Dict[Tuple[str, LabelKey], Any] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, labels: Dict[str, str], factory: Callable[[LabelKey], Any]):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = factory(key[1])
+        return series
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        return self._get(name, labels, lambda key: Counter(name, key))
+
+    def gauge(self, name: str, **labels: str) -> Gauge:
+        return self._get(name, labels, lambda key: Gauge(name, key))
+
+    def histogram(self, name: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels: str) -> Histogram:
+        return self._get(name, labels, lambda key: Histogram(name, key, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Registers a function whose samples are read at export time only."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> List[Sample]:
+        samples: List[Sample] = []
+        for collector in list(self._collectors):
+            try:
+                samples.extend(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {collector!r} failed: {e}")
+        return samples
+
+    def snapshot(self) -> dict:
+        """All series as plain data: counters, gauges and histograms by name."""
+        out: Dict[str, Dict[str, list]] = {"counters": {}, "gauges": {}, "histograms": {}}
+        with self._lock:
+            series_list = sorted(self._series.items(), key=lambda kv: kv[0])
+        for (name, labels), series in series_list:
+            entry = {"labels": dict(labels)}
+            if isinstance(series, Histogram):
+                with series._lock:
+                    entry.update(
+                        count=series.count,
+                        sum=series.sum,
+                        buckets=dict(zip([*map(str, series.buckets), "+Inf"], series.counts)),
+                    )
+                out["histograms"].setdefault(name, []).append(entry)
+            else:
+                entry["value"] = series.value
+                kind = "counters" if isinstance(series, Counter) else "gauges"
+                out[kind].setdefault(name, []).append(entry)
+        for kind, name, labels, value in self.collect():
+            out[f"{kind}s"].setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            for series in self._series.values():
+                if isinstance(series, Histogram):
+                    with series._lock:
+                        series.counts = [0] * len(series.counts)
+                        series.sum = 0.0
+                        series.count = 0
+                else:
+                    series.value = 0.0
+
+
+metrics = MetricsRegistry()
+
+
+# --- tool instrumentation ---
+
+def _is_error(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("status") == "error"
+
+
+def instrument_tool(func: Callable) -> Callable:
+    """
+    Wraps a tool so its calls, errors and latency are recorded. The wrapper
+    keeps the tool's name, signature and docstring (the ADK builds the
+    function declaration from them) and stays a coroutine function if the
+    tool is one.
+    """
+    if not METRICS_ENABLED or getattr(func, "_instrumented", False):
+        return func
+    name = func.__name__
+    return _instrument(
+        func,
+        metrics.counter("hsn_tool_errors_total", tool=name),
+        metrics.histogram("hsn_tool_latency_seconds", tool=name),
+    )
+
+
+def instrument_callback(func: Callable) -> Callable:
+    """
+    `instrument_tool` for agent callbacks (e.g. the fast-path router), so
+    they are recorded under `hsn_callback_*` and the per-tool series only
+    cover tools.
+    """
+    if not METRICS_ENABLED or getattr(func, "_instrumented", False):
+        return func
+    name = func.__name__
+    return _instrument(
+        func,
+        metrics.counter("hsn_callback_errors_total", callback=name),
+        metrics.histogram("hsn_callback_latency_seconds", callback=name),
+    )
+
+
+def _instrument(func: Callable, errors: Counter, latency: Histogram) -> Callable:
+    import inspect
+
+    clock = time.perf_counter
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(clock() - start)
+            if _is_error(result):
+                errors.inc()
+            return result
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(clock() - start)
+            if _is_error(result):
+                errors.inc()
+            return result
+
+    wrapper._instrumented = True
+    return wrapper
+
+
+def instrument_tools(tools: Iterable[Callable]) -> List[Callable]:
+    return [instrument_tool(tool) for tool in tools]
+
+
+def record_payload_size(tool, args, tool_context, tool_response) -> None:
+    """
+    `after_tool_callback` recording the JSON size of each tool result the
+    model reads. Kept out of `instrument_tool` so direct calls (the fast-path
+    router, batch jobs) do not pay for the serialization.
+    """
+    if METRICS_ENABLED and tool_response is not None:
+        size = len(json.dumps(tool_response, ensure_ascii=False, default=str).encode())
+        metrics.histogram("hsn_tool_payload_bytes", SIZE_BUCKETS, tool=tool.name).observe(size)
+    return None
+
+
+# --- exporters ---
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in items) + "}"
+
+
+def render_prometheus(registry: MetricsRegistry = None) -> str:
+    """The registry in Prometheus text exposition format (version 0.0.4)."""
+    snapshot = (registry or metrics).snapshot()
+    lines: List[str] = []
+    for kind, type_name in (("counters", "counter"), ("gauges", "gauge"), ("histograms", "histogram")):
+        for name, entries in snapshot[kind].items():
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} {type_name}")
+            for entry in entries:
+                labels = entry["labels"]
+                if kind != "histograms":
+                    lines.append(f"{name}{_format_labels(labels)} {entry['value']}")
+                    continue
+                cumulative = 0
+                for bound, count in entry["buckets"].items():
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', bound))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {entry['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {entry['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def serve_prometheus(port: int = METRICS_PORT, host: str = "0.0.0.0"):
+    """Serves `/metrics` from a daemon thread; returns the HTTP server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="hsn-metrics", daemon=True).start()
+    logger.info(f"Serving Prometheus metrics on {host}:{server.server_port}/metrics")
+    return server
+
+
+class OpenTelemetryExporter(Exporter):
+    """
+    Forwards measurements to an OpenTelemetry meter (the global meter
+    provider by default). Collector samples are exposed as observable
+    gauges. Requires `opentelemetry-api`.
+    """
+
+    def __init__(self, meter=None):
+        if meter is None:
+            from opentelemetry import metrics as otel_metrics
+
+            meter = otel_metrics.get_meter("hsn_agent")
+        self.meter = meter
+        self._instruments: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _instrument(self, kind: str, name: str):
+        instrument = self._instruments.get(name)
+        if instrument is None:
+            with self._lock:
+                instrument = self._instruments.get(name)
+                if instrument is None:
+                    create = {
+                        "counter": self.meter.create_counter,
+                        "gauge": self.meter.create_gauge,
+                        "histogram": self.meter.create_histogram,
+                    }[kind]
+                    unit = "s" if name.endswith("_seconds") else "1"
+                    instrument = self._instruments[name] = create(
+                        name, unit=unit, description=HELP.get(name, "")
+                    )
+        return instrument
+
+    def record(self, kind: str, name: str, labels: Dict[str, str], value: float) -> None:
+        instrument = self._instrument(kind, name)
+        if kind == "counter":
+            instrument.add(value, labels)
+        elif kind == "gauge":
+            instrument.set(value, labels)
+        else:
+            instrument.record(value, labels)
+
+    def install(self, registry: MetricsRegistry) -> None:
+        from opentelemetry.metrics import Observation
+
+        for name in sorted({name for _, name, _, _ in registry.collect()}):
+            def observe(options, name=name):
+                return [
+                    Observation(value, labels)
+                    for _, sample_name, labels, value in registry.collect()
+                    if sample_name == name
+                ]
+
+            self.meter.create_observable_gauge(name, callbacks=[observe])
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def start_metrics_export() -> None:
+    """Starts the exporter selected by `METRICS_EXPORTER`, once per process."""
+    global _started
+    with _start_lock:
+        if _started or not METRICS_ENABLED:
+            return
+        _started = True
+        try:
+            if METRICS_EXPORTER == "prometheus":
+                serve_prometheus(METRICS_PORT)
+            elif METRICS_EXPORTER in ("otel", "opentelemetry"):
+                set_exporter(OpenTelemetryExporter())
+        except Exception as e:
+            logger.error(f"Could not start {METRICS_EXPORTER} metrics export: {e}")
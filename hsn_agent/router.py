@@ -0,0 +1,105 @@
+"""
+Deterministic pre-model router.
+
+Registered as the agent's `before_model_callback`. Turns whose intent is
+already fixed by the agent instruction are answered without an LLM
+round-trip:
+
+- pure codes or code lists ("01011010", "0101, 0102 9999") are validated
+  as by `validate_hsn_code`,
+- partial-code pattern queries ("ends with 99", "begins with 0101 page 2")
+  are run through the master pattern search,
+
+and the tool output is rendered from a fixed template. Anything else,
+including follow-up model calls after a tool response, goes to the model.
+"""
+
+import logging
+import re
+from typing import List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from .config import FAST_PATH_ROUTER
+from .tools.documents_handler.rag_query import pattern_query
+from .tools.master_index import get_session_index
+from .tools.validate import validation_results
+from .warmup import log_tool_call
+
+logger = logging.getLogger(__name__)
+
+_CODE_LIST = re.compile(
+    r"(?:(?:validate|check|verify)\s+)?(?:(?:hsn|sac)\s+)?(?:codes?\s*:?\s*)?"
+    r"(?P<codes>\d+(?:[\s,;]+\d+)*)[\s.?!]*",
+    re.I,
+)
+# Only the phrasings `pattern_query` understands.
+_PATTERN = re.compile(
+    r"(?:(?:show|list|find)\s+(?:me\s+)?)?(?:(?:all\s+)?(?:hsn\s+)?codes?\s+)?(?:that\s+|which\s+)?"
+    r"(?:ends?\s+with|(?:begins|starts)\s+with|contains|has)\s+\d+(?:\s+page\s+\d+)?[\s.?!]*",
+    re.I,
+)
+
+
+def _user_text(llm_request: LlmRequest) -> Optional[str]:
+    """Text of the latest user message, or None if the model is being called
+    for anything else (e.g. to read a function response)."""
+    if not llm_request.contents:
+        return None
+    content = llm_request.contents[-1]
+    if content.role != "user" or not content.parts:
+        return None
+    if any(part.function_response or part.function_call for part in content.parts):
+        return None
+    text = "".join(part.text or "" for part in content.parts).strip()
+    return text or None
+
+
+def render_validation(results: List[dict]) -> str:
+    blocks = []
+    for r in results:
+        if r["status"] == "invalid_format":
+            blocks.append(
+                f"'{r['code']}' is not a valid HSN code format: it {r['reason']}."
+            )
+        else:
+            blocks.append(r.get("prompt") or r["message"])
+    return "\n\n".join(blocks)
+
+
+def _reply(text: str) -> LlmResponse:
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=text)])
+    )
+
+
+def route_fast_path(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """Answers pure code and pattern turns directly; returns None otherwise."""
+    if not FAST_PATH_ROUTER:
+        return None
+    text = _user_text(llm_request)
+    if text is None:
+        return None
+
+    m_codes = _CODE_LIST.fullmatch(text)
+    if m_codes:
+        index = get_session_index(callback_context)
+        if not (index and index.table):
+            return None
+        results = validation_results(index, m_codes.group("codes"))
+        log_tool_call("validate_hsn_code", {"codes": m_codes.group("codes")})
+        logger.info(f"Fast path: validated {len(results)} code(s) without the model")
+        return _reply(render_validation(results))
+
+    if _PATTERN.fullmatch(text):
+        result = pattern_query(get_session_index(callback_context), text)
+        if result is None:
+            return None
+        logger.info(f"Fast path: answered pattern query '{text}' without the model")
+        return _reply(result["message"])
+
+    return None
@@ -1,17 +1,39 @@
+import importlib
 
-from .corpus_handler.create_corpus import create_corpus 
-from .corpus_handler.list_corpora import list_corpora
-from .corpus_handler.get_corpus_info import get_corpus_info
-from .corpus_handler.delete_corpus import delete_corpus
+# The master-file tools only need the standard library. `load_hsn_master`
+# is also a submodule name, so it must be bound here rather than lazily.
+from .validate import validate_hsn_code
+from .load_hsn_master import load_hsn_master
 
-from .documents_handler.add_document import add_data
-from .documents_handler.delete_document import delete_document
-from .documents_handler.rag_query import rag_query
+# Corpus and document tools are imported on first access, so code
+# validation never pulls in the RAG client and its SDK dependencies.
+_EXPORTS = {
+    "create_corpus": ".corpus_handler.create_corpus",
+    "list_corpora": ".corpus_handler.list_corpora",
+    "get_corpus_info": ".corpus_handler.get_corpus_info",
+    "delete_corpus": ".corpus_handler.delete_corpus",
+    "add_data": ".documents_handler.add_document",
+    "delete_document": ".documents_handler.delete_document",
+    "rag_query": ".documents_handler.rag_query",
+    "rag_query_batch": ".documents_handler.rag_query_batch",
+    "sync_documents": ".documents_handler.sync_documents",
+    "get_corpus_resource_name": ".utils",
+    "check_corpus_exists": ".utils",
+    "set_current_corpus": ".utils",
+}
 
-from .utils import get_corpus_resource_name, check_corpus_exists,set_current_corpus
 
-from .validate import validate_hsn_code 
-from .load_hsn_master import load_hsn_master
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
 
 
 __all__ = [
@@ -21,10 +43,12 @@ __all__ = [
     "delete_corpus",
     "add_data",
     "delete_document",
+    "sync_documents",
     "get_corpus_resource_name",
     "check_corpus_exists",
     "set_current_corpus",
     "rag_query",
+    "rag_query_batch",
     "validate_hsn_code",
     "load_hsn_master",
 
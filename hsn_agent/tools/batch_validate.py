@@ -0,0 +1,176 @@
+"""
+Bulk HSN code validation for invoice / line-item files.
+
+Unlike `validate_hsn_code`, which renders a prose message per code for the
+agent, this module streams compact structured results:
+
+    {"code": "01011010", "status": "valid", "description": "...",
+     "parents": ["01", "0101"], "suggestions": []}
+
+Each distinct code is validated once per run and later occurrences reuse
+the result, so large files with repeated codes cost one dict lookup per
+line.
+
+Usage:
+    python -m hsn_agent.tools.batch_validate lines.csv [--column HSNCode] [-o results.jsonl]
+"""
+
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+
+from .master_index import HSNMasterIndex, MasterLoadError, get_master_index
+
+_CODE = re.compile(r"\d{2,8}")
+
+DEFAULT_SUGGESTIONS = 3
+
+OUTPUT_FIELDS = ("code", "status", "description", "parents", "suggestions")
+
+
+def check_code(index: HSNMasterIndex, code: str, suggestions: int = DEFAULT_SUGGESTIONS) -> dict:
+    """Compact validation result for a single, already stripped code."""
+    if not _CODE.fullmatch(code):
+        return {"code": code, "status": "invalid_format", "description": None,
+                "parents": [], "suggestions": []}
+
+    description = index.get(code)
+    if description is not None:
+        return {"code": code, "status": "valid", "description": description,
+                "parents": index.hierarchy.ancestors(code), "suggestions": []}
+
+    return {
+        "code": code,
+        "status": "not_found",
+        "description": None,
+        "parents": index.hierarchy.ancestors(code),
+        "suggestions": [c for c, _ in index.fuzzy.suggest(code, n=suggestions)] if suggestions else [],
+    }
+
+
+def validate_codes(
+    codes: Iterable[object],
+    index: Optional[HSNMasterIndex] = None,
+    suggestions: int = DEFAULT_SUGGESTIONS,
+) -> Iterator[dict]:
+    """
+    Validates `codes` lazily, yielding one result per input in input order.
+
+    Results for repeated codes are the same (shared) dict; copy before
+    mutating.
+    """
+    index = index or get_master_index()
+    seen: Dict[str, dict] = {}
+    for raw in codes:
+        code = "" if raw is None else str(raw).strip()
+        result = seen.get(code)
+        if result is None:
+            result = seen[code] = check_code(index, code, suggestions)
+        yield result
+
+
+def validate_frame(
+    df,
+    column: str = "HSNCode",
+    index: Optional[HSNMasterIndex] = None,
+    suggestions: int = DEFAULT_SUGGESTIONS,
+):
+    """
+    Validates `df[column]` and returns a DataFrame of results aligned with
+    `df.index`. Read the source with `dtype=str` so leading zeros survive.
+
+    Only distinct codes are checked; results are mapped back onto the rows
+    with vectorized pandas operations.
+    """
+    import pandas as pd
+
+    index = index or get_master_index()
+    codes = df[column].fillna("").astype(str).str.strip()
+    unique = {code: check_code(index, code, suggestions) for code in codes.unique()}
+    table = pd.DataFrame.from_dict(unique, orient="index", columns=list(OUTPUT_FIELDS))
+    return table.reindex(codes.to_numpy()).set_axis(df.index)
+
+
+def read_codes(path: str, column: str = "HSNCode") -> Iterator[str]:
+    """
+    Streams codes from a CSV file with a `column` header, or from a plain
+    file with one code per line.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        first = f.readline()
+        header = [h.strip().strip('"').strip("'") for h in next(csv.reader([first]), [])]
+        if column in header:
+            position = header.index(column)
+            for row in csv.reader(f):
+                yield row[position] if position < len(row) else ""
+        else:
+            yield first.strip()
+            for line in f:
+                yield line.strip()
+
+
+def write_results(results: Iterable[dict], out: TextIO, fmt: str = "jsonl") -> Dict[str, int]:
+    """Writes results as JSON lines or CSV and returns per-status counts."""
+    counts: Dict[str, int] = {}
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(OUTPUT_FIELDS)
+        for r in results:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+            writer.writerow([
+                r["code"], r["status"], r["description"] or "",
+                " ".join(r["parents"]), " ".join(r["suggestions"]),
+            ])
+    else:
+        encoded: Dict[int, str] = {}
+        for r in results:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+            line = encoded.get(id(r))
+            if line is None:
+                line = encoded[id(r)] = json.dumps(r, ensure_ascii=False) + "\n"
+            out.write(line)
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m hsn_agent.tools.batch_validate")
+    parser.add_argument("input", help="CSV with a code column, or one code per line ('-' for stdin)")
+    parser.add_argument("--column", default="HSNCode")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--master", help="HSN master CSV/XLSX/.hsnsnap")
+    parser.add_argument("--suggestions", type=int, default=DEFAULT_SUGGESTIONS)
+    args = parser.parse_args(argv)
+
+    try:
+        index = get_master_index(args.master) if args.master else get_master_index()
+    except MasterLoadError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    if args.input == "-":
+        codes: Iterable[str] = (line.strip() for line in sys.stdin)
+    else:
+        codes = read_codes(args.input, args.column)
+
+    start = time.perf_counter()
+    results = validate_codes(codes, index, args.suggestions)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            counts = write_results(results, out, args.format)
+    else:
+        counts = write_results(results, sys.stdout, args.format)
+    elapsed = time.perf_counter() - start
+
+    total = sum(counts.values())
+    summary = ", ".join(f"{status}={n}" for status, n in sorted(counts.items()))
+    print(f"Validated {total} lines in {elapsed:.2f}s ({summary})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
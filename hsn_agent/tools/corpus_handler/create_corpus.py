@@ -1,19 +1,21 @@
 
 
 import re
-
-from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
+from typing import TYPE_CHECKING
 
 from ...config import (
     DEFAULT_EMBEDDING_MODEL,
 )
-from ..utils import check_corpus_exists
+from ..rag_client import rag_client, timed_call
+from ..utils import check_corpus_exists, corpus_registry
+
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
 
 
 def create_corpus(
     corpus_name: str,
-    tool_context: ToolContext,
+    tool_context: "ToolContext",
 ) -> dict:
 
     if check_corpus_exists(corpus_name, tool_context):
@@ -25,6 +27,7 @@ def create_corpus(
         }
 
     try:
+        rag = rag_client.backend
 
         display_name = re.sub(r"[^a-zA-Z0-9_-]", "_", corpus_name)
 
@@ -34,14 +37,17 @@ def create_corpus(
             )
         )
 
-        rag_corpus = rag.create_corpus(
-            display_name=display_name,
-            backend_config=rag.RagVectorDbConfig(
-                rag_embedding_model_config=embedding_model_config
+        rag_corpus = timed_call(
+            "create_corpus",
+            lambda: rag.create_corpus(
+                display_name=display_name,
+                backend_config=rag.RagVectorDbConfig(
+                    rag_embedding_model_config=embedding_model_config
+                ),
             ),
         )
 
-        tool_context.state[f"corpus_exists_{corpus_name}"] = True
+        corpus_registry.register(rag_corpus.name, rag_corpus.display_name, corpus_name)
 
         tool_context.state["current_corpus"] = corpus_name
 
@@ -1,13 +1,18 @@
-from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
+from typing import TYPE_CHECKING
 
-from ..utils import check_corpus_exists, get_corpus_resource_name
+from ..manifest import CorpusManifest
+from ..rag_client import rag_client, timed_call
+from ..retrieval_cache import retrieval_cache
+from ..utils import check_corpus_exists, corpus_registry, get_corpus_resource_name
+
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
 
 
 def delete_corpus(
     corpus_name: str,
     confirm: bool,
-    tool_context: ToolContext,
+    tool_context: "ToolContext",
 ) -> dict:
     if not check_corpus_exists(corpus_name, tool_context):
         return {
@@ -24,10 +29,11 @@ def delete_corpus(
 
     try:
         corpus_resource_name = get_corpus_resource_name(corpus_name)
-        rag.delete_corpus(corpus_resource_name)
-        state_key = f"corpus_exists_{corpus_name}"
-        if state_key in tool_context.state:
-            tool_context.state[state_key] = False
+        rag = rag_client.backend
+        timed_call("delete_corpus", lambda: rag.delete_corpus(corpus_resource_name))
+        retrieval_cache.invalidate(corpus_resource_name)
+        corpus_registry.forget(corpus_resource_name)
+        CorpusManifest.delete(corpus_resource_name)
 
         return {
             "status": "success",
@@ -1,27 +1,39 @@
-from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
+from typing import TYPE_CHECKING
 
-from ..utils import check_corpus_exists, get_corpus_resource_name
+from ..manifest import CorpusManifest
+from ..rag_client import rag_client
+from ..utils import acheck_corpus_exists, aget_corpus_resource_name
 
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
 
-def get_corpus_info(
+
+async def get_corpus_info(
     corpus_name: str,
-    tool_context: ToolContext,
+    tool_context: "ToolContext",
 ) -> dict:
     
     try:
-        if not check_corpus_exists(corpus_name, tool_context):
+        if not await acheck_corpus_exists(corpus_name, tool_context):
             return {
                 "status": "error",
                 "message": f"Corpus '{corpus_name}' does not exist",
                 "corpus_name": corpus_name,
             }
-        corpus_resource_name = get_corpus_resource_name(corpus_name)
+        corpus_resource_name = await aget_corpus_resource_name(corpus_name)
         corpus_display_name = corpus_name  
 
         file_details = []
         try:
-            files = rag.list_files(corpus_resource_name)
+            files = await rag_client.list_files(corpus_resource_name)
+            manifest = CorpusManifest.load(corpus_resource_name)
+            if manifest.entries and manifest.reconcile(files):
+                manifest.save()
+            sources = {
+                entry["rag_file_id"]: source
+                for source, entry in manifest.entries.items()
+                if entry.get("rag_file_id")
+            }
             for rag_file in files:
                 try:
                     file_id = rag_file.name.split("/")[-1]
@@ -36,7 +48,7 @@ def get_corpus_info(
                         "source_uri": (
                             rag_file.source_uri
                             if hasattr(rag_file, "source_uri")
-                            else ""
+                            else sources.get(file_id, "")
                         ),
                         "create_time": (
                             str(rag_file.create_time)
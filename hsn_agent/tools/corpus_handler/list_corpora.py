@@ -1,13 +1,13 @@
 
 from typing import Dict, List, Union
 
-from vertexai import rag
+from ..rag_client import rag_client
 
 
 def list_corpora() -> dict:
 
     try:
-        corpora = rag.list_corpora()
+        corpora = rag_client.list_corpora().result()
         corpus_info: List[Dict[str, Union[str, int]]] = []
         for corpus in corpora:
             corpus_data: Dict[str, Union[str, int]] = {
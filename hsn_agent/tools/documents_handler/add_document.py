@@ -1,24 +1,57 @@
+import asyncio
+import logging
 import re
-from typing import List
+from typing import TYPE_CHECKING, List, Optional
 
-from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
+from ...config import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE
+from ..ingestion import IngestionPipeline, job_id
+from ..manifest import CorpusManifest, fingerprint_paths, rag_file_id
+from ..rag_client import rag_client
+from ..retrieval_cache import retrieval_cache
+from ..utils import acheck_corpus_exists, aget_corpus_resource_name
 
-from ...config import (
-    DEFAULT_CHUNK_OVERLAP,
-    DEFAULT_CHUNK_SIZE,
-    DEFAULT_EMBEDDING_REQUESTS_PER_MIN,
-)
-from ..utils import check_corpus_exists, get_corpus_resource_name
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
 
+CHECKPOINTS_KEY = "ingestion_checkpoints"
+PROGRESS_KEY = "ingestion_progress"
 
-def add_data(
+logger = logging.getLogger(__name__)
+
+
+async def add_data(
+    corpus_name: str,
+    paths: List[str],
+    tool_context: "ToolContext",
+) -> dict:
+    return await ingest_paths(corpus_name, paths, tool_context)
+
+
+async def _delete_rag_file(corpus_resource_name: str, file_id: Optional[str]) -> bool:
+    if not file_id:
+        return True
+    try:
+        await rag_client.delete_file(f"{corpus_resource_name}/ragFiles/{file_id}")
+        return True
+    except Exception as e:
+        logger.warning(f"Could not delete RAG file {file_id}: {e}")
+        return False
+
+
+async def ingest_paths(
     corpus_name: str,
     paths: List[str],
-    tool_context: ToolContext,
+    tool_context: "ToolContext",
+    prune: bool = False,
 ) -> dict:
+    """
+    Imports `paths` into a corpus, skipping documents whose content and
+    chunking config are unchanged since they were last imported and
+    replacing those that changed. With `prune`, documents previously
+    imported from sources not in `paths` are deleted from the corpus.
+    """
 
-    if not check_corpus_exists(corpus_name, tool_context):
+    if not await acheck_corpus_exists(corpus_name, tool_context):
         return {
             "status": "error",
             "message": f"Corpus '{corpus_name}' does not exist. Please create it first using the create_corpus tool.",
@@ -88,20 +121,95 @@ def add_data(
         }
 
     try:
-        corpus_resource_name = get_corpus_resource_name(corpus_name)
-        transformation_config = rag.TransformationConfig(
-            chunking_config=rag.ChunkingConfig(
-                chunk_size=DEFAULT_CHUNK_SIZE,
-                chunk_overlap=DEFAULT_CHUNK_OVERLAP,
-            ),
+        corpus_resource_name = await aget_corpus_resource_name(corpus_name)
+        manifest = CorpusManifest.load(corpus_resource_name)
+        listed = await rag_client.list_files(corpus_resource_name)
+        manifest.reconcile(listed)
+        fingerprints = await asyncio.get_running_loop().run_in_executor(
+            None, fingerprint_paths, validated_paths
+        )
+        unchanged, changed, new, unresolved = manifest.plan(
+            validated_paths, fingerprints, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP
         )
+        for path in changed:
+            if not manifest.entries[path].get("rag_file_id"):
+                logger.warning(f"Previous version of {path} could not be identified; it is kept")
 
-        import_result = rag.import_files(
+        # Changed documents are replaced: delete the old RAG file, then import.
+        replaced, delete_failed = [], {}
+        deleted = await asyncio.gather(*(
+            _delete_rag_file(corpus_resource_name, manifest.entries[path]["rag_file_id"])
+            for path in changed
+        ))
+        for path, ok in zip(changed, deleted):
+            if ok:
+                del manifest.entries[path]
+                replaced.append(path)
+            else:
+                delete_failed[path] = "could not delete the previous version"
+        manifest.save()
+
+        to_import = replaced + new
+        job = job_id(corpus_resource_name, validated_paths)
+        checkpoint = tool_context.state.get(CHECKPOINTS_KEY, {}).get(job, {})
+        # Imported by an earlier, interrupted run of this job.
+        already_done = set(checkpoint.get("done", ()))
+        resumed = [path for path in to_import if path in already_done]
+
+        def on_progress(event: dict) -> None:
+            # Assign fresh dicts so the session service records the change.
+            done = checkpoint.setdefault("done", [])
+            done.extend(event["just_imported"])
+            checkpoints = dict(tool_context.state.get(CHECKPOINTS_KEY, {}))
+            checkpoints[job] = {"corpus": corpus_resource_name, "done": list(done)}
+            tool_context.state[CHECKPOINTS_KEY] = checkpoints
+            tool_context.state[PROGRESS_KEY] = {
+                "job": job,
+                **{k: v for k, v in event.items() if not k.startswith("just_")},
+            }
+
+        summary = await IngestionPipeline().run(
             corpus_resource_name,
-            validated_paths,
-            transformation_config=transformation_config,
-            max_embedding_requests_per_min=DEFAULT_EMBEDDING_REQUESTS_PER_MIN,
+            to_import,
+            done=checkpoint.get("done", ()),
+            on_progress=on_progress,
         )
+        summary["failed"].update(delete_failed)
+
+        for path in resumed + summary["imported_paths"]:
+            manifest.record(path, fingerprints.get(path), DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP)
+        if resumed or summary["imported_paths"]:
+            manifest.reconcile(
+                await rag_client.list_files(corpus_resource_name),
+                previous_ids=[rag_file_id(f) for f in listed],
+            )
+
+        pruned = []
+        if prune and (invalid_paths or summary["failed"]):
+            logger.warning("Skipping prune: some paths were invalid or failed to import")
+        elif prune:
+            keep = set(validated_paths)
+            stale = [
+                (source, entry["rag_file_id"])
+                for source, entry in manifest.entries.items()
+                if source not in keep and entry.get("rag_file_id")
+            ]
+            deleted = await asyncio.gather(*(
+                _delete_rag_file(corpus_resource_name, file_id) for _, file_id in stale
+            ))
+            for (source, _), ok in zip(stale, deleted):
+                if ok:
+                    del manifest.entries[source]
+                    pruned.append(source)
+        manifest.save()
+
+        if summary["imported_paths"] or replaced or pruned:
+            retrieval_cache.invalidate(corpus_resource_name)
+
+        if not summary["failed"]:
+            checkpoints = dict(tool_context.state.get(CHECKPOINTS_KEY, {}))
+            checkpoints.pop(job, None)
+            tool_context.state[CHECKPOINTS_KEY] = checkpoints
 
         if not tool_context.state.get("current_corpus"):
             tool_context.state["current_corpus"] = corpus_name
@@ -109,16 +217,46 @@ def add_data(
         conversion_msg = ""
         if conversions:
             conversion_msg = " (Converted Google Docs URLs to Drive format)"
+        resumed_msg = ""
+        if summary["resumed"]:
+            resumed_msg = f"; {summary['resumed']} path(s) were already imported by an earlier run"
+        if unchanged or unresolved:
+            resumed_msg += f"; {len(unchanged) + len(unresolved)} unchanged document(s) skipped"
+        if replaced:
+            resumed_msg += f"; {len(replaced)} changed document(s) replaced"
+        if pruned:
+            resumed_msg += f"; {len(pruned)} removed document(s) pruned"
 
-        return {
-            "status": "success",
-            "message": f"Successfully added {import_result.imported_rag_files_count} file(s) to corpus '{corpus_name}'{conversion_msg}",
+        result = {
             "corpus_name": corpus_name,
-            "files_added": import_result.imported_rag_files_count,
+            "files_added": summary["files_imported"],
+            "files_skipped": summary["files_skipped"],
             "paths": validated_paths,
             "invalid_paths": invalid_paths,
+            "failed_paths": summary["failed"],
+            "resumed": summary["resumed"],
+            "unchanged": unchanged + unresolved,
+            "replaced": replaced,
+            "pruned": pruned,
+            "batches": summary["batches"],
+            "seconds": summary["seconds"],
             "conversions": conversions,
         }
+        if summary["failed"]:
+            return {
+                "status": "warning",
+                "message": (
+                    f"Added {summary['files_imported']} file(s) to corpus '{corpus_name}', "
+                    f"but {len(summary['failed'])} path(s) failed after retries{resumed_msg}. "
+                    f"Run add_data again with the same paths to retry only the failed ones."
+                ),
+                **result,
+            }
+        return {
+            "status": "success",
+            "message": f"Successfully added {summary['files_imported']} file(s) to corpus '{corpus_name}'{conversion_msg}{resumed_msg}",
+            **result,
+        }
 
     except Exception as e:
         return {
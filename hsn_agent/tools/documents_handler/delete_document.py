@@ -1,13 +1,18 @@
-from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
+from typing import TYPE_CHECKING
 
+from ..manifest import CorpusManifest
+from ..rag_client import rag_client
+from ..retrieval_cache import retrieval_cache
 from ..utils import check_corpus_exists, get_corpus_resource_name
 
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
+
 
 def delete_document(
     corpus_name: str,
     document_id: str,
-    tool_context: ToolContext,
+    tool_context: "ToolContext",
 ) -> dict:
     
     if not check_corpus_exists(corpus_name, tool_context):
@@ -21,7 +26,11 @@ def delete_document(
     try:
         corpus_resource_name = get_corpus_resource_name(corpus_name)
         rag_file_path = f"{corpus_resource_name}/ragFiles/{document_id}"
-        rag.delete_file(rag_file_path)
+        rag_client.delete_file(rag_file_path).result()
+        retrieval_cache.invalidate(corpus_resource_name)
+        manifest = CorpusManifest.load(corpus_resource_name)
+        if manifest.forget_file(document_id) is not None:
+            manifest.save()
 
         return {
             "status": "success",
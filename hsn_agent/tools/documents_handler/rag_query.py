@@ -1,25 +1,40 @@
 import logging
 import re
+from typing import TYPE_CHECKING, Optional
 
-from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
-
-from hsn_agent.tools.load_hsn_master import load_hsn_master
+from hsn_agent.tools.hierarchy import is_other
+from hsn_agent.tools.master_index import HSNMasterIndex, get_session_index
 
 from ...config import (
     DEFAULT_DISTANCE_THRESHOLD,
     DEFAULT_TOP_K,
+    HYBRID_LEXICAL_K,
+    HYBRID_RRF_K,
+    LEXICAL_FAST_PATH,
+    LEXICAL_MIN_CONFIDENCE,
+    LEXICAL_TOP_K,
+    PATTERN_PAGE_SIZE,
+    RAG_BACKEND,
+    RAG_COMPACT_RESULTS,
 )
-from ..utils import check_corpus_exists, get_corpus_resource_name
+from ..hybrid import fuse_results
+from ..output import output_profile, shape_query_result
+from ..postprocess import compact_chunks, compact_fused
+from ..rag_client import rag_client
+from ..retrieval_cache import retrieval_cache
+from ..utils import acheck_corpus_exists, aget_corpus_resource_name
 
-def rag_query(
-    corpus_name: str,
-    query: str,
-    tool_context: ToolContext,
-) -> dict:
-    if "hsn_table" not in tool_context.state:
-        load_hsn_master(path="hsn_agent/data/master_hsn.csv", tool_context=tool_context)
-    hsn_table = tool_context.state.get("hsn_table", {})
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
+
+
+def pattern_query(index: Optional[HSNMasterIndex], query: str) -> Optional[dict]:
+    """
+    Answers "ends with 99" / "begins with 0101" / "contains 333" queries
+    from the master, one page of `PATTERN_PAGE_SIZE` codes at a time.
+    Returns None if `query` is not a pattern query.
+    """
+    hsn_table = index.table if index else {}
 
     m_end = re.search(r"ends? with (\d+)", query, re.I)
     m_start = re.search(r"(?:begins|starts) with (\d+)", query, re.I)
@@ -33,27 +48,25 @@ def rag_query(
         else:
             pattern, mode = m_contains.group(1), "contains"
 
-        if mode == "ends with":
-            matches = [c for c in hsn_table if c.endswith(pattern)]
-        elif mode == "begins with":
-            matches = [c for c in hsn_table if c.startswith(pattern)]
-        else:
-            matches = [c for c in hsn_table if pattern in c]
+        m_page = re.search(r"\bpage (\d+)", query, re.I)
+        page = max(int(m_page.group(1)), 1) if m_page else 1
+        matches, total = index.patterns.search(
+            pattern,
+            mode,
+            limit=PATTERN_PAGE_SIZE,
+            offset=(page - 1) * PATTERN_PAGE_SIZE,
+        )
 
         suggestions = []
-        for code in matches[:5]:
+        for code in matches:
             desc = hsn_table[code]
             entry = {"code": code, "description": desc}
-            if desc.strip().upper() == "OTHER":
-                for length in (6, 4, 2):
-                    if len(code) >= length:
-                        parent = code[:length]
-                        pdesc = hsn_table.get(parent, "").strip()
-                        if pdesc and pdesc.upper() != "OTHER":
-                            entry["explanation"] = (
-                                f"This 'OTHER' is the catch‐all category under '{pdesc}'."
-                            )
-                            break
+            if is_other(desc):
+                parent = index.hierarchy.non_other_ancestor(code)
+                if parent:
+                    entry["explanation"] = (
+                        f"This 'OTHER' is the catch‐all category under '{hsn_table[parent]}'."
+                    )
             suggestions.append(entry)
 
         if suggestions:
@@ -64,9 +77,18 @@ def rag_query(
                     line += f" — {s['explanation']}"
                 lines.append(line)
 
+            shown_from = (page - 1) * PATTERN_PAGE_SIZE + 1
+            shown_to = shown_from + len(suggestions) - 1
+            more = (
+                f"\n\nShowing {shown_from}–{shown_to} of {total}. "
+                f"Ask for page {page + 1} to see more."
+                if shown_to < total
+                else ""
+            )
             prompt = (
-                f"I found these HSN codes that {mode} '{pattern}':\n"
+                f"I found {total} HSN codes that {mode} '{pattern}':\n"
                 + "\n".join(lines)
+                + more
                 + "\n\nDo any of these look right? Or tell me more about the product/service."
             )
             return {
@@ -74,6 +96,8 @@ def rag_query(
                 "query": query,
                 "pattern": pattern,
                 "mode": mode,
+                "page": page,
+                "total_matches": total,
                 "suggestions": suggestions,
                 "message": prompt,
             }
@@ -81,13 +105,99 @@ def rag_query(
             return {
                 "status": "warning",
                 "query": query,
-                "message": f"No HSN codes {mode} '{pattern}' were found in the master list."
+                "total_matches": total,
+                "message": (
+                    f"No HSN codes {mode} '{pattern}' were found in the master list."
+                    if total == 0
+                    else f"Only {total} HSN codes {mode} '{pattern}'; page {page} is empty."
+                ),
+            }
+    return None
+
+
+async def rag_query(
+    corpus_name: str,
+    query: str,
+    tool_context: "ToolContext",
+) -> dict:
+    index = get_session_index(tool_context)
+    result = await _rag_query(index, corpus_name, query, tool_context)
+    return shape_query_result(result, output_profile(tool_context), index)
+
+
+async def _rag_query(
+    index: Optional[HSNMasterIndex],
+    corpus_name: str,
+    query: str,
+    tool_context: "ToolContext",
+) -> dict:
+    hsn_table = index.table if index else {}
+
+    pattern_result = pattern_query(index, query)
+    if pattern_result is not None:
+        return pattern_result
+
+    # --- local lexical fast path over master descriptions ---
+    if index and LEXICAL_FAST_PATH:
+        hits, confidence = index.lexical.search(query, LEXICAL_TOP_K)
+        if hits and confidence >= LEXICAL_MIN_CONFIDENCE:
+            results = [
+                {"code": code, "description": hsn_table[code], "score": round(score, 3)}
+                for code, score in hits
+            ]
+            return {
+                "status": "success",
+                "source": "master_lexical",
+                "message": f"Matched '{query}' against the HSN master descriptions",
+                "query": query,
+                "corpus_name": corpus_name,
+                "results": results,
+                "results_count": len(results),
             }
 
+    # --- offline vector search over master descriptions ---
+    if RAG_BACKEND == "local":
+        if not index:
+            return {
+                "status": "error",
+                "message": "Could not load HSN master. Check CSV path.",
+                "query": query,
+                "corpus_name": corpus_name,
+            }
+        hits = index.vectors.search(query, DEFAULT_TOP_K, DEFAULT_DISTANCE_THRESHOLD)
+        results = [
+            {
+                "code": code,
+                "description": hsn_table[code],
+                "score": round(1.0 - distance, 3),
+                "distance": round(distance, 3),
+            }
+            for code, distance in hits
+        ]
+        if not results:
+            return {
+                "status": "warning",
+                "source": "master_vectors",
+                "message": f"No results found in the local HSN index for query: '{query}'",
+                "query": query,
+                "corpus_name": corpus_name,
+                "results": [],
+                "results_count": 0,
+            }
+        return {
+            "status": "success",
+            "source": "master_vectors",
+            "message": "Successfully queried the local HSN index",
+            "query": query,
+            "corpus_name": corpus_name,
+            "results": results,
+            "results_count": len(results),
+        }
+
     # --- fallback to standard RAG retrieval ---
     try:
 
-        if not check_corpus_exists(corpus_name, tool_context):
+        if not await acheck_corpus_exists(corpus_name, tool_context):
             return {
                 "status": "error",
                 "message": f"Corpus '{corpus_name}' does not exist. Please create it first using the create_corpus tool.",
@@ -95,30 +205,40 @@ def rag_query(
                 "corpus_name": corpus_name,
             }
 
-        corpus_resource_name = get_corpus_resource_name(corpus_name)
-        rag_retrieval_config = rag.RagRetrievalConfig(
-            top_k=DEFAULT_TOP_K,
-            filter=rag.Filter(vector_distance_threshold=DEFAULT_DISTANCE_THRESHOLD),
-        )
-        response = rag.retrieval_query(
-            rag_resources=[
-                rag.RagResource(
-                    rag_corpus=corpus_resource_name,
-                )
-            ],
-            text=query,
-            rag_retrieval_config=rag_retrieval_config,
+        corpus_resource_name = await aget_corpus_resource_name(corpus_name)
+        cache_key = retrieval_cache.key(
+            query, corpus_resource_name, DEFAULT_TOP_K, DEFAULT_DISTANCE_THRESHOLD
         )
+        results = retrieval_cache.get(cache_key)
+        call = None
+        if results is None:
+            call = rag_client.retrieval_query(
+                corpus_resource_name, query, DEFAULT_TOP_K, DEFAULT_DISTANCE_THRESHOLD
+            )
 
-        results = [
-            {
-                "source_uri": getattr(c, "source_uri", ""),
-                "source_name": getattr(c, "source_display_name", ""),
-                "text": getattr(c, "text", ""),
-                "score": getattr(c, "score", 0.0),
-            }
-            for c in getattr(response.contexts, "contexts", [])
-        ]
+        # The master search runs while the Vertex call is in flight.
+        hybrid = RAG_BACKEND == "hybrid" and index is not None
+        lexical_hits = index.lexical.search(query, HYBRID_LEXICAL_K)[0] if hybrid else []
+
+        if call is not None:
+            response = await call
+            results = [
+                {
+                    "source_uri": getattr(c, "source_uri", ""),
+                    "source_name": getattr(c, "source_display_name", ""),
+                    "text": getattr(c, "text", ""),
+                    "score": getattr(c, "score", 0.0),
+                }
+                for c in getattr(response.contexts, "contexts", [])
+            ]
+            retrieval_cache.put(cache_key, results)
+
+        if hybrid:
+            results = fuse_results(index, results, lexical_hits, DEFAULT_TOP_K, HYBRID_RRF_K)
+            if RAG_COMPACT_RESULTS:
+                results = compact_fused(index, results)
+        elif RAG_COMPACT_RESULTS and index is not None:
+            results = compact_chunks(index, results)
 
         if not results:
             return {
@@ -130,7 +250,7 @@ def rag_query(
                 "results_count": 0,
             }
 
-        return {
+        result = {
             "status": "success",
             "message": f"Successfully queried corpus '{corpus_name}'",
             "query": query,
@@ -138,6 +258,9 @@ def rag_query(
             "results": results,
             "results_count": len(results),
         }
+        if hybrid:
+            result["source"] = "hybrid"
+        return result
 
     except Exception as e:
         error_msg = f"Error querying corpus: {str(e)}"
@@ -0,0 +1,87 @@
+import asyncio
+import re
+from typing import TYPE_CHECKING, Dict, List
+
+from ...config import BATCH_QUERY_MAX_ITEMS, BATCH_QUERY_MAX_PARALLEL
+from ..validate import validate_hsn_code
+from .rag_query import rag_query
+
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
+
+# Items are separated by newlines, commas, semicolons or bullets.
+_SPLIT = re.compile(r"[\n,;•]+")
+_BULLET = re.compile(r"^\s*(?:[-*]|\d+[.)])\s+")
+_CODES = re.compile(r"\d+(?:[\s,;]+\d+)*")
+
+
+def split_products(products: List[str]) -> List[str]:
+    """Splits pasted product lists into items; strips bullets, dedupes case-insensitively."""
+    items: Dict[str, str] = {}
+    for text in products:
+        for line in (text or "").splitlines() or [""]:
+            for part in _SPLIT.split(_BULLET.sub("", line)):
+                item = " ".join(part.split()).strip(" .")
+                if item:
+                    items.setdefault(item.lower(), item)
+    return list(items.values())
+
+
+async def rag_query_batch(
+    corpus_name: str,
+    products: List[str],
+    tool_context: "ToolContext",
+) -> dict:
+    """
+    Looks up several products at once. `products` may be a list of
+    descriptions or pasted text ("cotton shirts, steel screws, polo
+    horses"); it is split into items that are queried concurrently, at
+    most `BATCH_QUERY_MAX_PARALLEL` at a time. Items that are HSN codes
+    are validated instead. Returns one result per item, in input order.
+    """
+    items = split_products(products)
+    if not items:
+        return {
+            "status": "error",
+            "message": "No product descriptions given.",
+            "corpus_name": corpus_name,
+        }
+    dropped = items[BATCH_QUERY_MAX_ITEMS:]
+    items = items[:BATCH_QUERY_MAX_ITEMS]
+    semaphore = asyncio.Semaphore(BATCH_QUERY_MAX_PARALLEL)
+
+    async def lookup(item: str) -> dict:
+        async with semaphore:
+            if _CODES.fullmatch(item):
+                # Validation output has per-code statuses only (and none at
+                # all in the "ids" profile); an error keeps its own status.
+                result = {"status": "success", **validate_hsn_code(item, tool_context)}
+            else:
+                result = await rag_query(corpus_name, item, tool_context)
+        result = {k: v for k, v in result.items() if k not in ("query", "corpus_name")}
+        return {"query": item, **result}
+
+    results = await asyncio.gather(*(lookup(item) for item in items))
+    # Compact results share one description table for the whole batch.
+    descriptions: Dict[str, str] = {}
+    for r in results:
+        descriptions.update(r.pop("d", None) or {})
+
+    failed = sum(1 for r in results if r["status"] == "error")
+    response = {
+        "status": "error" if failed == len(results) else "success",
+        "message": (
+            f"Looked up {len(results)} item(s)"
+            + (f", {failed} failed" if failed else "")
+            + (f"; {len(dropped)} more were not looked up" if dropped else "")
+            + "."
+        ),
+        "corpus_name": corpus_name,
+        "count": len(results),
+        "results": results,
+    }
+    if descriptions:
+        response["d"] = descriptions
+    if dropped:
+        response["not_looked_up"] = dropped
+    return response
@@ -0,0 +1,19 @@
+from typing import TYPE_CHECKING, List
+
+from .add_document import ingest_paths
+
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
+
+
+async def sync_documents(
+    corpus_name: str,
+    paths: List[str],
+    tool_context: "ToolContext",
+) -> dict:
+    """
+    Makes the corpus mirror `paths`: new documents are imported, changed
+    ones replaced, unchanged ones skipped, and documents previously
+    imported from sources no longer listed are deleted.
+    """
+    return await ingest_paths(corpus_name, paths, tool_context, prune=True)
@@ -0,0 +1,155 @@
+"""
+Fuzzy HSN code suggestions.
+
+A symmetric-delete index (every code and its single-character deletions)
+finds all codes within one edit of a mistyped code with a handful of dict
+probes. At two edits it only finds a moved digit (a deletion plus an
+insertion that share a key); two substitutions would need every code's
+two-character deletions, about four times the index. Codes next to the
+query in sorted order under the same chapter are added as candidates as
+well, so near misses still get suggestions from the right part of the
+hierarchy.
+Candidates are ranked by Damerau (OSA) edit distance and then by how long
+a hierarchy prefix they share with the query. The index never changes, so
+the suggestions for the last `FUZZY_CACHE_SIZE` typos are memoized.
+"""
+
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+from ..config import FUZZY_CACHE_SIZE, FUZZY_MAX_DISTANCE
+
+# Sorted-order neighbours examined on each side of the query.
+_WINDOW = 8
+# Neighbours must share at least the chapter with the query.
+_MIN_SHARED_PREFIX = 2
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent swaps)."""
+    if a == b:
+        return 0
+    # Codes usually share a long prefix (and often a suffix) with their
+    # candidates; trimming both leaves a tiny table to fill.
+    start = shared_prefix(a, b)
+    a, b = a[start:], b[start:]
+    end = shared_prefix(a[::-1], b[::-1])
+    if end:
+        a, b = a[:-end], b[:-end]
+    if not a or not b:
+        return len(a) + len(b)
+    if len(a) == 1 and len(b) == 1:
+        return 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def shared_prefix(a: str, b: str) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def _near_distance(a: str, b: str) -> int:
+    """
+    Distance between two different codes that share a delete-index key,
+    which bounds it at 2 and avoids the full table.
+    """
+    if len(a) != len(b):
+        # One is the other with a single character inserted.
+        return 1
+    diffs = [i for i, (x, y) in enumerate(zip(a, b)) if x != y]
+    if len(diffs) == 1:
+        return 1
+    if len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]:
+        return 1
+    return 2
+
+
+def _deletes(code: str) -> Iterable[str]:
+    yield code
+    for i in range(len(code)):
+        yield code[:i] + code[i + 1 :]
+
+
+class FuzzyCodeIndex:
+    def __init__(self, sorted_codes: Sequence[str], cache_size: int = FUZZY_CACHE_SIZE):
+        self._codes = sorted_codes
+        self._init_cache(cache_size)
+        buckets: Dict[str, List[str]] = {}
+        for code in sorted_codes:
+            for key in set(_deletes(code)):
+                buckets.setdefault(key, []).append(code)
+        self._buckets: Dict[str, Tuple[str, ...]] = {
+            key: tuple(codes) for key, codes in buckets.items()
+        }
+
+    def _init_cache(self, cache_size: int = FUZZY_CACHE_SIZE) -> None:
+        """Memoizes `suggest`; subclasses with their own storage call this too."""
+        self._cached = lru_cache(maxsize=cache_size)(self._rank)
+
+    def cache_clear(self) -> None:
+        """Forgets the memoized suggestions."""
+        self._cached.cache_clear()
+
+    def _close(self, code: str) -> Set[str]:
+        """
+        Codes sharing a delete-index key with `code`: all codes one edit
+        away, and those two edits away by a moved digit.
+        """
+        candidates: Set[str] = set()
+        for key in set(_deletes(code)):
+            candidates.update(self._buckets.get(key, ()))
+        return candidates
+
+    def _neighbours(self, code: str) -> Iterable[str]:
+        pos = bisect_left(self._codes, code)
+        lo = max(0, pos - _WINDOW)
+        for candidate in self._codes[lo : pos + _WINDOW]:
+            if shared_prefix(code, candidate) >= _MIN_SHARED_PREFIX:
+                yield candidate
+
+    def suggest(
+        self, code: str, n: int = 5, max_distance: int = FUZZY_MAX_DISTANCE
+    ) -> List[Tuple[str, int]]:
+        """
+        Up to `n` (code, distance) pairs closest to `code`, nearest first.
+
+        Codes within `max_distance` edits are preferred; sorted-order
+        neighbours that share the chapter fill any remaining slots.
+        """
+        return list(self._cached(code, n, max_distance))
+
+    def _rank(self, code: str, n: int, max_distance: int) -> Tuple[Tuple[str, int], ...]:
+        candidates = self._close(code)
+        candidates.discard(code)
+
+        ranked = []
+        for candidate in candidates:
+            distance = _near_distance(code, candidate)
+            if distance <= max_distance:
+                ranked.append(((0, distance, -shared_prefix(code, candidate)), candidate, distance))
+
+        if len(ranked) < n:
+            # Not enough close matches: add same-heading neighbours, ranked by
+            # edit distance; those beyond the bound come after the close ones.
+            for candidate in set(self._neighbours(code)) - candidates - {code}:
+                distance = edit_distance(code, candidate)
+                bound = 0 if distance <= max_distance else 1
+                ranked.append(((bound, distance, -shared_prefix(code, candidate)), candidate, distance))
+
+        ranked.sort()
+        return tuple((candidate, distance) for _, candidate, distance in ranked[:n])
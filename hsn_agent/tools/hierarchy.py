@@ -0,0 +1,119 @@
+"""
+Hierarchy index over the HSN master.
+
+Built once per master index from the sorted code list. Parent links point
+at the nearest code that actually exists in the master (intermediate
+levels are often missing), so ancestor chains are O(depth), and child
+lists plus sorted-array range bounds give subtree enumeration without
+scanning the table.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Mapping, Optional, Tuple
+
+LEVELS = (2, 4, 6, 8)
+
+# Sorts after every character used in HSN codes, so [code, code + _HIGH)
+# bounds all codes that start with `code`.
+_HIGH = "\uffff"
+
+
+def is_other(description: str) -> bool:
+    """True for catch-all descriptions such as 'OTHER', 'OTHER:' or 'Other :'."""
+    return description.strip().rstrip(":").strip().upper() == "OTHER"
+
+
+def level_prefixes(code: str) -> List[str]:
+    """The 2/4/6/8-digit prefixes of `code`, ending with `code` itself."""
+    prefixes = [code[:length] for length in LEVELS if len(code) > length]
+    prefixes.append(code)
+    return prefixes
+
+
+class HSNHierarchy:
+    def __init__(self, table: Mapping[str, str]):
+        self._table = table
+        self._codes: List[str] = sorted(table)
+        self._parent: Dict[str, Optional[str]] = {}
+        self._children: Dict[str, List[str]] = {}
+        self._non_other: Dict[str, Optional[str]] = {}
+
+        roots: List[str] = []
+        # Sorted order visits every ancestor before its descendants.
+        for code in self._codes:
+            parent = self._find_parent(code)
+            self._parent[code] = parent
+            if parent is None:
+                roots.append(code)
+                self._non_other[code] = None
+                continue
+            self._children.setdefault(parent, []).append(code)
+            if is_other(table[parent]):
+                self._non_other[code] = self._non_other[parent]
+            else:
+                self._non_other[code] = parent
+        self._children[""] = roots
+
+    @property
+    def codes(self) -> List[str]:
+        """All codes in sorted order (shared; do not mutate)."""
+        return self._codes
+
+    def _find_parent(self, code: str) -> Optional[str]:
+        for prefix in reversed(level_prefixes(code)[:-1]):
+            if prefix in self._parent:
+                return prefix
+        return None
+
+    def parent(self, code: str) -> Optional[str]:
+        """Nearest existing ancestor of `code` (which need not exist itself)."""
+        if code in self._parent:
+            return self._parent[code]
+        return self._find_parent(code)
+
+    def ancestors(self, code: str) -> List[str]:
+        """Existing ancestors of `code`, outermost first."""
+        chain = []
+        parent = self.parent(code)
+        while parent is not None:
+            chain.append(parent)
+            parent = self._parent[parent]
+        chain.reverse()
+        return chain
+
+    def levels(self, code: str) -> List[Tuple[str, bool]]:
+        """(prefix, exists) for every 2/4/6/8 level of `code`, outermost first."""
+        existing = set(self.ancestors(code))
+        if code in self._parent:
+            existing.add(code)
+        return [(prefix, prefix in existing) for prefix in level_prefixes(code)]
+
+    def children(self, code: str = "") -> List[str]:
+        """Codes whose nearest existing ancestor is `code` ("" for chapters)."""
+        return list(self._children.get(code, ()))
+
+    def _bounds(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self._codes, prefix)
+        hi = bisect_left(self._codes, prefix + _HIGH, lo)
+        return lo, hi
+
+    def subtree(self, code: str) -> List[str]:
+        """All codes starting with `code`, in sorted order (including itself)."""
+        lo, hi = self._bounds(code)
+        return self._codes[lo:hi]
+
+    def descendant_count(self, code: str) -> int:
+        lo, hi = self._bounds(code)
+        count = hi - lo
+        if code in self._parent:
+            count -= 1
+        return count
+
+    def non_other_ancestor(self, code: str) -> Optional[str]:
+        """Nearest ancestor whose description is not a catch-all 'OTHER'."""
+        if code in self._non_other:
+            return self._non_other[code]
+        for ancestor in reversed(self.ancestors(code)):
+            if not is_other(self._table[ancestor]):
+                return ancestor
+        return None
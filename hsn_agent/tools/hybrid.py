@@ -0,0 +1,85 @@
+"""
+Hybrid retrieval: Vertex AI chunks fused with master-table lexical hits.
+
+With `RAG_BACKEND = "hybrid"`, `rag_query` starts the Vertex retrieval,
+runs the local BM25 search over master descriptions while it is in
+flight, and merges both rankings with reciprocal rank fusion:
+
+    score(item) = sum over rankings of 1 / (HYBRID_RRF_K + rank)
+
+Vertex chunks are ranked by the HSN codes found in their text (codes not
+in the master are ignored), so a code named by several chunks and by the
+master search is counted once and ranks higher. Chunks that name no known
+code are kept as plain chunks. The fused list is cut to `top_k`.
+"""
+
+import re
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+from .master_index import HSNMasterIndex
+
+# 4-8 digit codes, also written with dots or spaces ("0101.21.00", "0101 21")
+_CODE = re.compile(r"(?<![\d.])(\d{4})(?:[. ]?(\d{2}))?(?:[. ]?(\d{2}))?(?![\d])")
+
+
+def codes_in_text(text: str, index: HSNMasterIndex) -> List[str]:
+    """Master codes mentioned in `text`, in order of first mention."""
+    found: Dict[str, None] = {}
+    for m in _CODE.finditer(text or ""):
+        head, sub, item = m.groups()
+        # "0101 21" may also be a heading followed by an unrelated number,
+        # so fall back to the longest prefix that is in the master.
+        for candidate in (head + (sub or "") + (item or ""), head + (sub or ""), head):
+            if candidate in index:
+                found.setdefault(candidate, None)
+                break
+    return list(found)
+
+
+def rrf_fuse(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> List[Tuple[Hashable, float]]:
+    """Reciprocal rank fusion of ranked key lists; best first."""
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(dict.fromkeys(ranking), start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda kv: -kv[1])
+
+
+def fuse_results(
+    index: HSNMasterIndex,
+    chunks: List[dict],
+    lexical_hits: List[Tuple[str, float]],
+    top_k: int,
+    k: int = 60,
+) -> List[dict]:
+    """
+    Merges Vertex `chunks` (rag_query result dicts, best first) and master
+    `lexical_hits` into one list of at most `top_k` entries: code entries
+    `{"code", "description", "score", "sources"}` and, for chunks without a
+    known code, the chunk dict with `score` replaced by its fused score.
+    """
+    vertex_ranking: List[Hashable] = []
+    chunk_for: Dict[Hashable, dict] = {}
+    for i, chunk in enumerate(chunks):
+        codes = codes_in_text(chunk.get("text", ""), index)
+        if codes:
+            vertex_ranking.extend(codes)
+        else:
+            key = ("chunk", i)
+            vertex_ranking.append(key)
+            chunk_for[key] = chunk
+    master_ranking = [code for code, _ in lexical_hits]
+
+    from_vertex, from_master = set(vertex_ranking), set(master_ranking)
+    results = []
+    for key, score in rrf_fuse([vertex_ranking, master_ranking], k)[:top_k]:
+        if key in chunk_for:
+            results.append({**chunk_for[key], "score": round(score, 5), "sources": ["vertex"]})
+            continue
+        results.append({
+            "code": key,
+            "description": index.get(key),
+            "score": round(score, 5),
+            "sources": [s for s, keys in (("master", from_master), ("vertex", from_vertex)) if key in keys],
+        })
+    return results
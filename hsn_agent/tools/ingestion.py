@@ -0,0 +1,261 @@
+"""
+Batched, resumable document ingestion for `add_data`.
+
+Paths are imported into a corpus in batches of `INGESTION_BATCH_SIZE`, with
+at most `INGESTION_MAX_PARALLEL` import jobs running at once. The embedding
+budget `DEFAULT_EMBEDDING_REQUESTS_PER_MIN` is split across the concurrent
+jobs, so parallel imports never exceed it together.
+
+A batch that fails (or reports failed files) is retried with exponential
+backoff; if it still fails, its files are retried one by one so a single
+bad document cannot sink the rest. Imports are idempotent on the Vertex
+side (already imported sources are skipped), which makes retries safe.
+
+Progress is reported to an `on_progress` callback after every batch or
+file. `add_data` uses it to keep a checkpoint of finished paths in
+session state, so re-running an interrupted or partly failed ingestion
+of the same paths only imports what is left.
+
+The importer is pluggable (`set_importer`); `FakeImporter` runs the
+whole pipeline offline.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+from ..config import (
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_EMBEDDING_REQUESTS_PER_MIN,
+    INGESTION_BACKOFF_SECONDS,
+    INGESTION_BATCH_SIZE,
+    INGESTION_MAX_PARALLEL,
+    INGESTION_MAX_RETRIES,
+)
+from .rag_client import rag_client
+
+logger = logging.getLogger(__name__)
+
+# importer(corpus_resource_name, paths, chunk_size, chunk_overlap,
+#          max_embedding_requests_per_min) -> awaitable import response
+Importer = Callable[[str, Sequence[str], int, int, int], Awaitable[Any]]
+
+ProgressCallback = Callable[[dict], None]
+
+
+def vertex_importer(
+    corpus_resource_name: str,
+    paths: Sequence[str],
+    chunk_size: int,
+    chunk_overlap: int,
+    max_embedding_requests_per_min: int,
+):
+    return rag_client.import_files(
+        corpus_resource_name,
+        paths,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        max_embedding_requests_per_min=max_embedding_requests_per_min,
+    )
+
+
+class FakeImportResponse:
+    def __init__(self, imported: int, failed: int = 0, skipped: int = 0):
+        self.imported_rag_files_count = imported
+        self.failed_rag_files_count = failed
+        self.skipped_rag_files_count = skipped
+
+
+class FakeImporter:
+    """
+    Offline importer for trying the pipeline without Vertex AI. Paths listed
+    in `failing` always fail; any other call fails with probability
+    `error_rate`. Successful paths are recorded in `imported`, and the
+    embedding budget of every call in `requests_per_min`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        error_rate: float = 0.0,
+        failing: Iterable[str] = (),
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.failing = set(failing)
+        self.imported: List[str] = []
+        self.requests_per_min: List[int] = []
+        self.calls = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._random = random.Random(seed)
+
+    async def __call__(
+        self,
+        corpus_resource_name: str,
+        paths: Sequence[str],
+        chunk_size: int,
+        chunk_overlap: int,
+        max_embedding_requests_per_min: int,
+    ) -> FakeImportResponse:
+        self.calls += 1
+        self.requests_per_min.append(max_embedding_requests_per_min)
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self._random.random() < self.error_rate:
+                raise RuntimeError("simulated import error")
+            bad = [p for p in paths if p in self.failing]
+            ok = [p for p in paths if p not in self.failing]
+            if bad and len(paths) == 1:
+                raise RuntimeError(f"simulated failure for {bad[0]}")
+            self.imported.extend(ok)
+            return FakeImportResponse(imported=len(ok), failed=len(bad))
+        finally:
+            self._in_flight -= 1
+
+
+_importer: Optional[Importer] = None
+
+
+def set_importer(importer: Optional[Importer]) -> None:
+    """Installs a custom importer (e.g. `FakeImporter()`). None restores Vertex AI."""
+    global _importer
+    _importer = importer
+
+
+def job_id(corpus_resource_name: str, paths: Iterable[str]) -> str:
+    """Stable id of an ingestion of `paths` into a corpus, used for checkpoints."""
+    digest = hashlib.sha1(corpus_resource_name.encode("utf-8"))
+    for path in sorted(set(paths)):
+        digest.update(b"\n" + path.encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+class IngestionPipeline:
+    def __init__(
+        self,
+        importer: Optional[Importer] = None,
+        batch_size: int = INGESTION_BATCH_SIZE,
+        max_parallel: int = INGESTION_MAX_PARALLEL,
+        max_retries: int = INGESTION_MAX_RETRIES,
+        backoff: float = INGESTION_BACKOFF_SECONDS,
+        embedding_requests_per_min: int = DEFAULT_EMBEDDING_REQUESTS_PER_MIN,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    ):
+        self.importer = importer or _importer or vertex_importer
+        self.batch_size = max(1, batch_size)
+        self.max_parallel = max(1, max_parallel)
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        self.embedding_requests_per_min = embedding_requests_per_min
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    async def run(
+        self,
+        corpus_resource_name: str,
+        paths: Sequence[str],
+        done: Iterable[str] = (),
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> dict:
+        """
+        Imports `paths` not already in `done`. Returns a summary with the
+        imported and failed paths and the file counts reported by Vertex.
+        """
+        already = set(done)
+        pending = [p for p in dict.fromkeys(paths) if p not in already]
+        batches = [
+            pending[i:i + self.batch_size]
+            for i in range(0, len(pending), self.batch_size)
+        ]
+        jobs = max(1, min(self.max_parallel, len(batches)))
+        rpm = max(1, self.embedding_requests_per_min // jobs)
+        semaphore = asyncio.Semaphore(jobs)
+
+        summary = {
+            "total": len(pending),
+            "resumed": len(paths) - len(pending),
+            "batches": len(batches),
+            "imported_paths": [],
+            "failed": {},
+            "files_imported": 0,
+            "files_skipped": 0,
+        }
+        start = time.monotonic()
+
+        def report(imported: Sequence[str], failed: Dict[str, str]) -> None:
+            summary["imported_paths"].extend(imported)
+            summary["failed"].update(failed)
+            if on_progress is None:
+                return
+            finished = len(summary["imported_paths"]) + len(summary["failed"])
+            elapsed = time.monotonic() - start
+            on_progress({
+                "corpus": corpus_resource_name,
+                "total": summary["total"],
+                "finished": finished,
+                "imported": len(summary["imported_paths"]),
+                "failed": len(summary["failed"]),
+                "just_imported": list(imported),
+                "just_failed": dict(failed),
+                "files_per_sec": round(finished / elapsed, 2) if elapsed > 0 else None,
+            })
+
+        async def run_batch(batch: List[str]) -> None:
+            async with semaphore:
+                response, error = await self._attempt(corpus_resource_name, batch, rpm)
+                if error is None:
+                    self._count(summary, response)
+                    report(batch, {})
+                    return
+                if len(batch) == 1:
+                    report([], {batch[0]: error})
+                    return
+                logger.warning(
+                    f"Batch of {len(batch)} files failed ({error}); retrying files one by one"
+                )
+                for path in batch:
+                    response, error = await self._attempt(corpus_resource_name, [path], rpm)
+                    if error is None:
+                        self._count(summary, response)
+                        report([path], {})
+                    else:
+                        report([], {path: error})
+
+        await asyncio.gather(*(run_batch(batch) for batch in batches))
+        summary["seconds"] = round(time.monotonic() - start, 3)
+        return summary
+
+    async def _attempt(self, corpus_resource_name: str, paths: List[str], rpm: int):
+        """(response, None) on success, (None, last error message) after all retries."""
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = self.backoff * 2 ** (attempt - 1)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            try:
+                response = await self.importer(
+                    corpus_resource_name, paths, self.chunk_size, self.chunk_overlap, rpm
+                )
+            except Exception as e:
+                error = str(e)
+                logger.info(f"Import attempt {attempt + 1} for {len(paths)} file(s) failed: {error}")
+                continue
+            failed = getattr(response, "failed_rag_files_count", 0) or 0
+            if not failed:
+                return response, None
+            error = f"{failed} of {len(paths)} file(s) failed to import"
+        return None, error
+
+    @staticmethod
+    def _count(summary: dict, response: Any) -> None:
+        summary["files_imported"] += getattr(response, "imported_rag_files_count", 0) or 0
+        summary["files_skipped"] += getattr(response, "skipped_rag_files_count", 0) or 0
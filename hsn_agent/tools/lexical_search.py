@@ -0,0 +1,109 @@
+"""
+In-process BM25 search over HSN master descriptions.
+
+Used by `rag_query` as a fast path: queries whose words are all found in
+one description (e.g. "live horses") are answered locally, and only
+low-confidence queries go to the Vertex AI corpus.
+"""
+
+import heapq
+import math
+import re
+from typing import Dict, List, Mapping, Tuple
+
+# Plain English function words plus the boilerplate that appears in almost
+# every tariff description and carries no product information.
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by can for from in into is it its of on or than that the
+    use used using
+    their there these this those to was were which with without
+    other others otherwise whether not nor including excluding except such
+    elsewhere specified included thereof therefor whereof heading headings
+    subheading chapter kind kinds type types etc nes n e s
+    """.split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+K1 = 1.2
+B = 0.75
+
+
+def stem(word: str) -> str:
+    """Light suffix stripping: plurals, -ing and -ed."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    if word.endswith("ing") and len(word) > 5:
+        return word[:-3]
+    if word.endswith("ed") and len(word) > 4:
+        return word[:-2]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(t) for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class LexicalIndex:
+    def __init__(self, table: Mapping[str, str]):
+        self._codes: List[str] = []
+        self._lengths: List[int] = []
+        postings: Dict[str, Dict[int, int]] = {}
+        for doc_id, (code, description) in enumerate(table.items()):
+            terms = tokenize(description)
+            self._codes.append(code)
+            self._lengths.append(len(terms))
+            for term in terms:
+                tf = postings.setdefault(term, {})
+                tf[doc_id] = tf.get(doc_id, 0) + 1
+
+        n_docs = max(len(self._codes), 1)
+        self._avg_length = sum(self._lengths) / n_docs or 1.0
+        self._postings: Dict[str, Tuple[Tuple[int, int], ...]] = {
+            term: tuple(tf.items()) for term, tf in postings.items()
+        }
+        self._idf: Dict[str, float] = {
+            term: math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self._postings.items()
+        }
+        # Words we have never seen are weighted like the rarest known word.
+        self._unknown_idf = math.log(1 + (n_docs - 0.5) / 0.5)
+
+    def search(self, query: str, top_k: int = 5) -> Tuple[List[Tuple[str, float]], float]:
+        """
+        Returns ([(code, score), ...], confidence).
+
+        `confidence` is the share of the query's IDF weight matched by the best
+        hit, so 1.0 means every query word appears in its description.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], 0.0
+
+        scores: Dict[int, float] = {}
+        matched: Dict[int, float] = {}
+        for term in terms:
+            docs = self._postings.get(term)
+            if not docs:
+                continue
+            idf = self._idf[term]
+            for doc_id, tf in docs:
+                norm = K1 * (1 - B + B * self._lengths[doc_id] / self._avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+                matched[doc_id] = matched.get(doc_id, 0.0) + idf
+        if not scores:
+            return [], 0.0
+
+        ranked = heapq.nsmallest(
+            top_k, scores.items(), key=lambda item: (-item[1], self._codes[item[0]])
+        )
+        total_idf = sum(self._idf.get(term, self._unknown_idf) for term in terms)
+        confidence = matched[ranked[0][0]] / total_idf
+        return [(self._codes[doc_id], score) for doc_id, score in ranked], confidence
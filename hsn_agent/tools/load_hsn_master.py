@@ -1,54 +1,34 @@
-import os
-import pandas as pd
-from pandas.errors import ParserError
-from google.adk.tools.tool_context import ToolContext
+from typing import TYPE_CHECKING
 
-def load_hsn_master(path: str, tool_context: ToolContext) -> dict:
-    """
-    Reads the HSN master file at `path` (CSV or XLSX), 
-    normalizes headers, builds a dict code→description, 
-    and stores it in tool_context.state["hsn_table"].
-    """
-    # 1) Check file exists
-    if not os.path.isfile(path):
-        return {"status": "error", "message": f"File not found: {path}"}
+from .master_index import STATE_KEY, MasterLoadError, get_master_index, reload_master_index
 
-    # 2) Read into DataFrame
-    ext = os.path.splitext(path)[1].lower()
-    try:
-        if ext in (".xls", ".xlsx"):
-            df = pd.read_excel(path, dtype=str)
-        else:
-            df = pd.read_csv(path, dtype=str)
-    except ParserError:
-        # Retry with tabs
-        try:
-            df = pd.read_csv(path, sep="\t", dtype=str)
-        except Exception as e:
-            return {"status": "error", "message": f"Failed to parse {path}: {e}"}
-    except Exception as e:
-        return {"status": "error", "message": f"Error loading {path}: {e}"}
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
 
-    # 3) Normalize column names
-    df.columns = df.columns.str.strip().str.strip('"').str.strip("'")
 
-    # 4) Validate required columns
-    required = {"HSNCode", "Description"}
-    missing = required - set(df.columns)
-    if missing:
-        return {
-            "status": "error",
-            "message": f"Missing columns {missing}. Found: {list(df.columns)}"
-        }
+def load_hsn_master(path: str, tool_context: "ToolContext") -> dict:
+    """
+    Loads the HSN master file at `path` (CSV or XLSX) into the process-wide
+    shared index and points this session at it.
 
-    # 5) Build lookup dict
-    table = {
-        str(code).strip(): str(desc).strip()
-        for code, desc in zip(df["HSNCode"], df["Description"])
-        if pd.notna(code)
-    }
+    The table itself is shared across sessions; only a version handle
+    is stored in tool_context.state["hsn_master"]. If the file changed
+    since it was loaded, it is reloaded for every session and the result
+    includes a summary of the changed codes.
+    """
+    try:
+        index = get_master_index(path)
+        changes = reload_master_index(path)
+        if changes:
+            index = get_master_index(path)
+    except MasterLoadError as e:
+        return {"status": "error", "message": str(e)}
 
-    # 6) Store in shared state
-    tool_context.state["hsn_table"] = table
+    tool_context.state[STATE_KEY] = index.handle()
 
-    return {"status": "success", "loaded_rows": len(table)}
+    result = {"status": "success", "loaded_rows": len(index), "version": index.version}
+    if changes:
+        result["changes"] = {
+            k: changes[k] for k in ("old_version", "added", "removed", "redescribed", "examples")
+        }
+    return result
@@ -0,0 +1,294 @@
+"""
+Per-corpus ingestion manifest for incremental `add_data` / `sync_documents`.
+
+For each imported source (GCS URI or Drive URL) the manifest records the
+content fingerprint at import time, the RAG file id it became and the
+chunking config used:
+
+    {"gs://bucket/a.pdf": {"fingerprint": "md5:...", "rag_file_id": "123",
+                           "chunk_size": 512, "chunk_overlap": 100}}
+
+A source whose fingerprint and chunking config are unchanged is skipped.
+A changed source is deleted from the corpus and imported again. The
+manifest is reconciled with `list_files` output (in `add_data` and
+`get_corpus_info`), so files deleted behind its back are forgotten.
+
+GCS objects are fingerprinted by their MD5 (or CRC32C / etag for composite
+objects). Drive files have no fingerprint without Drive API access, so
+they are always imported, as before.
+
+Manifests are JSON files under `INGESTION_MANIFEST_DIR`, one per corpus.
+Concurrent `add_data` calls on one corpus each hold their own copy, so
+`save` merges: under a per-file lock it re-reads the file and applies only
+the entries this copy added, changed or removed since it was loaded.
+"""
+
+import copy
+import json
+import logging
+import os
+import posixpath
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..config import INGESTION_MANIFEST_DIR
+
+logger = logging.getLogger(__name__)
+
+Fingerprinter = Callable[[str], Optional[str]]
+
+
+def gcs_fingerprint(path: str) -> Optional[str]:
+    """Content fingerprint of a `gs://bucket/object` path, or None if unavailable."""
+    bucket_name, _, blob_name = path[len("gs://"):].partition("/")
+    if not blob_name:
+        return None
+    try:
+        from google.cloud import storage
+
+        blob = _storage_client(storage).bucket(bucket_name).get_blob(blob_name)
+    except Exception as e:
+        logger.info(f"Could not fingerprint {path}: {e}")
+        return None
+    if blob is None:
+        return None
+    if blob.md5_hash:
+        return f"md5:{blob.md5_hash}"
+    if blob.crc32c:
+        return f"crc32c:{blob.crc32c}:{blob.size}"
+    return f"etag:{blob.etag}" if blob.etag else None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _storage_client(storage):
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = storage.Client()
+    return _client
+
+
+def default_fingerprint(path: str) -> Optional[str]:
+    if path.startswith("gs://"):
+        return gcs_fingerprint(path)
+    return None
+
+
+_fingerprinter: Fingerprinter = default_fingerprint
+
+
+def set_fingerprinter(fingerprinter: Optional[Fingerprinter]) -> None:
+    """Installs a custom fingerprint function. None restores the default."""
+    global _fingerprinter
+    _fingerprinter = fingerprinter or default_fingerprint
+
+
+def fingerprint_paths(paths: Sequence[str], max_workers: int = 16) -> Dict[str, Optional[str]]:
+    """Fingerprints `paths` concurrently (one metadata request each for GCS)."""
+    if not paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+        return dict(zip(paths, pool.map(_fingerprinter, paths)))
+
+
+def rag_file_id(rag_file: Any) -> str:
+    return rag_file.name.split("/")[-1]
+
+
+def source_of(rag_file: Any) -> Optional[str]:
+    """The source URI of a listed RAG file, if the SDK exposes it."""
+    uri = getattr(rag_file, "source_uri", None)
+    if uri:
+        return uri
+    uris = getattr(getattr(rag_file, "gcs_source", None), "uris", None)
+    return uris[0] if uris else None
+
+
+def _read_entries(corpus_resource_name: str, path: str) -> Dict[str, dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable ingestion manifest {path}: {e}")
+        return {}
+    if data.get("corpus") != corpus_resource_name:
+        return {}
+    return data.get("entries", {})
+
+
+def _display_name_for(path: str) -> Optional[str]:
+    # GCS imports are named after the object's base name.
+    if path.startswith("gs://"):
+        return posixpath.basename(path.rstrip("/"))
+    return None
+
+
+_file_locks: Dict[str, threading.Lock] = {}
+_file_locks_lock = threading.Lock()
+
+
+def _file_lock(path: str) -> threading.Lock:
+    with _file_locks_lock:
+        return _file_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+class CorpusManifest:
+    def __init__(self, corpus_resource_name: str, path: str, entries: Optional[Dict[str, dict]] = None):
+        self.corpus = corpus_resource_name
+        self.path = path
+        self.entries: Dict[str, dict] = entries or {}
+        # The entries as last read or written; `save` writes only the difference.
+        self._base: Dict[str, dict] = copy.deepcopy(self.entries)
+
+    @staticmethod
+    def path_for(corpus_resource_name: str, directory: str = INGESTION_MANIFEST_DIR) -> str:
+        name = re.sub(r"[^a-zA-Z0-9_-]", "_", corpus_resource_name.split("/ragCorpora/")[-1])
+        return os.path.join(directory, f"{name}.json")
+
+    @classmethod
+    def load(cls, corpus_resource_name: str, directory: str = INGESTION_MANIFEST_DIR) -> "CorpusManifest":
+        path = cls.path_for(corpus_resource_name, directory)
+        with _file_lock(path):
+            return cls(corpus_resource_name, path, _read_entries(corpus_resource_name, path))
+
+    def save(self) -> None:
+        """
+        Writes this copy's changes since it was loaded (or last saved) over
+        the entries currently on disk, then adopts the merged entries.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with _file_lock(self.path):
+            merged = _read_entries(self.corpus, self.path)
+            for source in self._base.keys() - self.entries.keys():
+                merged.pop(source, None)
+            for source, entry in self.entries.items():
+                if self._base.get(source) != entry:
+                    merged[source] = entry
+            tmp = f"{self.path}.tmp{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"corpus": self.corpus, "entries": merged}, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        self.entries = merged
+        self._base = copy.deepcopy(merged)
+
+    @staticmethod
+    def delete(corpus_resource_name: str, directory: str = INGESTION_MANIFEST_DIR) -> None:
+        path = CorpusManifest.path_for(corpus_resource_name, directory)
+        with _file_lock(path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def reconcile(self, rag_files: Iterable[Any], previous_ids: Iterable[str] = ()) -> int:
+        """
+        Syncs the manifest with the corpus' listed files: entries whose RAG
+        file is gone are dropped, and entries without a known RAG file id
+        are matched to a listed file by source URI or, failing that, by
+        display name. Files not in `previous_ids` (an earlier listing) are
+        preferred, so a source imported since then is matched to the file
+        it created even if older files share its name. Entries without an
+        id and without any listed file of their name are dropped too.
+        Returns the number of entries dropped.
+        """
+        files = list(rag_files)
+        ids = {rag_file_id(f) for f in files}
+        previous = set(previous_ids)
+        by_source: Dict[str, str] = {}
+        by_display: Dict[str, List[str]] = {}
+        for f in files:
+            source = source_of(f)
+            if source:
+                by_source[source] = rag_file_id(f)
+            by_display.setdefault(getattr(f, "display_name", "") or "", []).append(rag_file_id(f))
+
+        dropped = [
+            source for source, entry in self.entries.items()
+            if entry.get("rag_file_id") and entry["rag_file_id"] not in ids
+        ]
+        for source in dropped:
+            del self.entries[source]
+
+        claimed = {e.get("rag_file_id") for e in self.entries.values()}
+        for source, entry in list(self.entries.items()):
+            if entry.get("rag_file_id"):
+                continue
+            match = by_source.get(source)
+            if match is None:
+                named = [
+                    i for i in by_display.get(_display_name_for(source) or "", []) if i not in claimed
+                ]
+                fresh = [i for i in named if i not in previous]
+                if len(fresh) == 1:
+                    match = fresh[0]
+                elif len(named) == 1:
+                    match = named[0]
+                elif not named:
+                    del self.entries[source]
+                    dropped.append(source)
+            if match is not None:
+                entry["rag_file_id"] = match
+                claimed.add(match)
+        return len(dropped)
+
+    def plan(
+        self,
+        paths: Sequence[str],
+        fingerprints: Dict[str, Optional[str]],
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> Tuple[List[str], List[str], List[str], List[str]]:
+        """
+        Splits `paths` into (unchanged, changed, new, unresolved). Paths that
+        cannot be fingerprinted are always "new": imported without deleting
+        anything. "unresolved" paths are unchanged, but their RAG file could
+        not be told apart from others of the same name (run `reconcile`
+        first); they are skipped like unchanged ones.
+        """
+        unchanged, changed, new, unresolved = [], [], [], []
+        for path in paths:
+            entry = self.entries.get(path)
+            fingerprint = fingerprints.get(path)
+            if entry is None or fingerprint is None:
+                new.append(path)
+            elif (
+                entry.get("fingerprint") != fingerprint
+                or entry.get("chunk_size") != chunk_size
+                or entry.get("chunk_overlap") != chunk_overlap
+            ):
+                changed.append(path)
+            elif entry.get("rag_file_id"):
+                unchanged.append(path)
+            else:
+                unresolved.append(path)
+        return unchanged, changed, new, unresolved
+
+    def record(
+        self,
+        path: str,
+        fingerprint: Optional[str],
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> None:
+        self.entries[path] = {
+            "fingerprint": fingerprint,
+            "rag_file_id": None,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+        }
+
+    def forget_file(self, file_id: str) -> Optional[str]:
+        """Drops the entry for a RAG file id; returns its source, if known."""
+        for source, entry in self.entries.items():
+            if entry.get("rag_file_id") == file_id:
+                del self.entries[source]
+                return source
+        return None
@@ -0,0 +1,402 @@
+"""
+Process-wide HSN master index.
+
+The master table is parsed once per process and shared read-only by every
+ADK session. Sessions only keep a small version handle in
+`tool_context.state["hsn_master"]` instead of their own copy of the table.
+
+When the master file changes on disk (checked every
+`HSN_MASTER_WATCH_INTERVAL` seconds, or on an explicit `load_hsn_master`),
+a new index is built in the background and swapped in with a single dict
+assignment. Requests keep using the old index until the new one is fully
+built, and every session picks up the new one on its next tool call.
+"""
+
+import collections
+import hashlib
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Mapping, Optional, Tuple
+
+from ..config import HSN_MASTER_PATH, HSN_MASTER_WATCH_INTERVAL
+from ..metrics import metrics
+from .fuzzy import FuzzyCodeIndex
+from .hierarchy import HSNHierarchy
+from .lexical_search import LexicalIndex
+from .pattern_index import PatternIndex
+
+if TYPE_CHECKING:
+    from .vector_index import LocalVectorIndex
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = "hsn_master"
+
+
+class MasterLoadError(Exception):
+    """Raised when the HSN master file cannot be read or is malformed."""
+
+
+class HSNMasterIndex:
+    """
+    Immutable code→description table plus the metadata needed to identify it.
+
+    Instances are never mutated after construction, so they can be read from
+    any number of threads without locking.
+    """
+
+    __slots__ = ("table", "path", "version", "_derived", "_factories", "_derived_lock")
+
+    def __init__(self, table: Mapping[str, str], path: str, version: str):
+        if isinstance(table, dict):
+            table = MappingProxyType(table)
+        self.table: Mapping[str, str] = table
+        self.path = path
+        self.version = version
+        self._derived: Dict[str, object] = {}
+        self._factories: Dict[str, Callable[["HSNMasterIndex"], object]] = {}
+        self._derived_lock = threading.Lock()
+
+    def derived(self, name: str, factory: Callable[["HSNMasterIndex"], object]) -> object:
+        """
+        Returns the auxiliary structure `name`, building it with
+        `factory(self)` exactly once per index. The factory is kept so a
+        reloaded index can rebuild the same structures (`rebuild_derived`).
+        """
+        value = self._derived.get(name)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = factory(self)
+                    self._derived[name] = value
+                    self._factories[name] = factory
+        return value
+
+    def rebuild_derived(self, other: "HSNMasterIndex") -> None:
+        """Builds every auxiliary structure `other` has built, with its factory."""
+        from .vector_index import embedder_key
+
+        current_vectors = f"vectors:{embedder_key()}"
+        for name, factory in list(other._factories.items()):
+            # Indexes of an embedder that is no longer installed are not needed.
+            if name.startswith("vectors:") and name != current_vectors:
+                continue
+            self.derived(name, factory)
+
+    @property
+    def hierarchy(self) -> "HSNHierarchy":
+        return self.derived("hierarchy", lambda index: HSNHierarchy(index.table))
+
+    @property
+    def fuzzy(self) -> "FuzzyCodeIndex":
+        return self.derived("fuzzy", lambda index: FuzzyCodeIndex(index.hierarchy.codes))
+
+    @property
+    def patterns(self) -> "PatternIndex":
+        return self.derived("patterns", lambda index: PatternIndex(index.hierarchy.codes))
+
+    @property
+    def lexical(self) -> "LexicalIndex":
+        return self.derived("lexical", lambda index: LexicalIndex(index.table))
+
+    @property
+    def vectors(self) -> "LocalVectorIndex":
+        from .vector_index import embedder_key, open_vector_index
+
+        # Keyed by embedder, so `set_embedder` takes effect on live indexes.
+        return self.derived(f"vectors:{embedder_key()}", open_vector_index)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self.table
+
+    def get(self, code: str, default: Optional[str] = None) -> Optional[str]:
+        return self.table.get(code, default)
+
+    def handle(self) -> Dict[str, str]:
+        """The small, serializable reference stored in session state."""
+        return {"path": self.path, "version": self.version}
+
+
+def file_version(path: str) -> str:
+    """Content hash of the master file, used as the index version."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def read_master_table(path: str, stats: Optional[dict] = None) -> Dict[str, str]:
+    """
+    Reads the HSN master file at `path` (CSV, TSV or XLSX), normalizes
+    headers and returns a dict code→description. The file is streamed
+    row by row (see `master_loader`); `stats` receives rows/sec and peak
+    RSS if given.
+
+    Raises:
+        MasterLoadError: if the file is missing, unparsable or lacks the
+            `HSNCode`/`Description` columns.
+    """
+    from .master_loader import stream_master_table
+
+    return stream_master_table(path, stats)
+
+
+def build_master_index(path: str) -> HSNMasterIndex:
+    """
+    Loads `path` into a new, unregistered HSNMasterIndex.
+
+    Compiled snapshots (`.hsnsnap`) are memory-mapped directly and SQLite
+    databases (`.hsndb`) are opened read-only. For a
+    CSV/XLSX source, an up-to-date snapshot next to it is preferred, so
+    the source is only parsed when no snapshot has been compiled.
+    """
+    from .master_snapshot import (
+        SNAPSHOT_EXT,
+        SnapshotMasterIndex,
+        load_snapshot,
+        snapshot_path_for,
+    )
+    from .master_sqlite import SQLITE_EXT, open_database
+
+    path = os.path.abspath(path)
+    if path.endswith(SQLITE_EXT):
+        return open_database(path)
+    if path.endswith(SNAPSHOT_EXT):
+        return SnapshotMasterIndex(load_snapshot(path), path)
+
+    snapshot_path = snapshot_path_for(path)
+    if os.path.isfile(snapshot_path):
+        try:
+            snapshot = load_snapshot(snapshot_path)
+        except MasterLoadError as e:
+            logger.warning(f"Ignoring unreadable snapshot {snapshot_path}: {e}")
+        else:
+            if snapshot.matches_source(path):
+                return SnapshotMasterIndex(snapshot, path)
+            logger.warning(
+                f"Snapshot {snapshot_path} is stale; re-run "
+                f"`python -m hsn_agent.tools.master_snapshot compile {path}`"
+            )
+
+    stats: dict = {}
+    table = read_master_table(path, stats)
+    logger.info(
+        f"Read {stats['rows']} rows from {path} in {stats['seconds']}s "
+        f"({stats['rows_per_sec']} rows/s, peak RSS {stats['peak_rss_mb']} MiB)"
+    )
+    return HSNMasterIndex(table, path, file_version(path))
+
+
+_lock = threading.Lock()
+_indexes: Dict[str, HSNMasterIndex] = {}
+_signatures: Dict[str, Tuple[int, int]] = {}
+_reload_locks: Dict[str, threading.Lock] = {}
+_watchers: Dict[str, "MasterWatcher"] = {}
+
+# Diff summaries of recent reloads, newest last.
+reload_history: Deque[dict] = collections.deque(maxlen=20)
+
+
+def file_signature(path: str) -> Tuple[int, int]:
+    """(mtime_ns, size) of `path`; cheap change detection before hashing."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def get_master_index(path: str = HSN_MASTER_PATH) -> HSNMasterIndex:
+    """
+    Returns the shared index for `path`, loading it on first use.
+
+    Concurrent first calls are serialized so the file is parsed only once.
+    """
+    key = os.path.abspath(path)
+    index = _indexes.get(key)
+    if index is not None:
+        return index
+
+    with _lock:
+        index = _indexes.get(key)
+        if index is None:
+            signature = file_signature(key) if os.path.isfile(key) else None
+            start = time.perf_counter()
+            index = build_master_index(key)
+            index.hierarchy  # built at load time, shared by every session
+            metrics.histogram("hsn_master_load_seconds", trigger="initial").observe(
+                time.perf_counter() - start
+            )
+            metrics.gauge("hsn_master_codes").set(len(index))
+            _indexes[key] = index
+            _signatures[key] = signature
+            _reload_locks[key] = threading.Lock()
+            logger.info(
+                f"Loaded HSN master {key} ({len(index)} codes, version {index.version})"
+            )
+            if HSN_MASTER_WATCH_INTERVAL > 0:
+                watch_master(key, HSN_MASTER_WATCH_INTERVAL)
+    return index
+
+
+def diff_tables(old: Mapping[str, str], new: Mapping[str, str], examples: int = 5) -> dict:
+    """Counts (and a few examples) of added, removed and re-described codes."""
+    old_codes, new_codes = set(old), set(new)
+    added = sorted(new_codes - old_codes)
+    removed = sorted(old_codes - new_codes)
+    redescribed = sorted(c for c in old_codes & new_codes if old[c] != new[c])
+    return {
+        "added": len(added),
+        "removed": len(removed),
+        "redescribed": len(redescribed),
+        "examples": {
+            "added": [{"code": c, "description": new[c]} for c in added[:examples]],
+            "removed": [{"code": c, "description": old[c]} for c in removed[:examples]],
+            "redescribed": [
+                {"code": c, "old": old[c], "new": new[c]} for c in redescribed[:examples]
+            ],
+        },
+    }
+
+
+def reload_master_index(path: str = HSN_MASTER_PATH, force: bool = False) -> Optional[dict]:
+    """
+    Rebuilds the shared index for `path` if its file changed since it was
+    loaded (or unconditionally with `force`) and swaps it in.
+
+    The new index, and every auxiliary structure the old one had built, is
+    built before the swap, so requests never see a partly loaded table and
+    keep being served by the old index meanwhile. Returns a diff summary if
+    a new version was swapped in, else None.
+
+    Raises:
+        MasterLoadError: if the changed file cannot be loaded; the old
+            index stays in place.
+    """
+    key = os.path.abspath(path)
+    old = _indexes.get(key)
+    if old is None:
+        get_master_index(key)
+        return None
+
+    with _reload_locks[key]:
+        old = _indexes[key]
+        try:
+            signature = file_signature(key)
+        except OSError as e:
+            raise MasterLoadError(f"File not found: {key}") from e
+        if not force and signature == _signatures.get(key):
+            return None
+        # Compiled files carry their source's version, not their own hash.
+        if not key.endswith((".hsnsnap", ".hsndb")) and file_version(key) == old.version:
+            _signatures[key] = signature
+            return None
+
+        start = time.perf_counter()
+        new = build_master_index(key)
+        if new.version == old.version:
+            _signatures[key] = signature
+            return None
+        new.hierarchy
+        new.rebuild_derived(old)
+
+        with _lock:
+            _indexes[key] = new
+            _signatures[key] = signature
+
+    seconds = time.perf_counter() - start
+    metrics.histogram("hsn_master_load_seconds", trigger="reload").observe(seconds)
+    metrics.gauge("hsn_master_codes").set(len(new))
+
+    diff = diff_tables(old.table, new.table)
+    diff.update(
+        path=key,
+        old_version=old.version,
+        new_version=new.version,
+        codes=len(new),
+        seconds=round(seconds, 3),
+        reloaded_at=time.time(),
+    )
+    reload_history.append(diff)
+    logger.info(
+        f"Reloaded HSN master {key}: version {old.version} -> {new.version}, "
+        f"{diff['added']} added, {diff['removed']} removed, "
+        f"{diff['redescribed']} re-described ({diff['seconds']}s)"
+    )
+    return diff
+
+
+class MasterWatcher(threading.Thread):
+    """
+    Polls a master file and reloads it when it changes. A change is only
+    acted on once the file's size and mtime have stayed the same for one
+    full interval, so a file that is still being copied is not loaded.
+    """
+
+    def __init__(self, path: str, interval: float):
+        super().__init__(name=f"hsn-master-watch:{os.path.basename(path)}", daemon=True)
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        pending = None
+        while not self._stop_event.wait(self.interval):
+            try:
+                signature = file_signature(self.path)
+            except OSError as e:
+                logger.warning(f"Cannot stat HSN master {self.path}: {e}")
+                continue
+            if signature == _signatures.get(self.path):
+                pending = None
+                continue
+            if signature != pending:
+                pending = signature
+                continue
+            try:
+                reload_master_index(self.path)
+            except Exception as e:
+                # Any failure keeps the old index; the watcher must survive it.
+                logger.error(
+                    f"Keeping previous HSN master; reload of {self.path} failed: {e}",
+                    exc_info=not isinstance(e, MasterLoadError),
+                )
+                # Don't retry the same broken file every interval.
+                _signatures[self.path] = signature
+            pending = None
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+def watch_master(path: str = HSN_MASTER_PATH, interval: float = HSN_MASTER_WATCH_INTERVAL) -> MasterWatcher:
+    """Starts (once per path) a background watcher that hot-reloads the master."""
+    key = os.path.abspath(path)
+    watcher = _watchers.get(key)
+    if watcher is None or not watcher.is_alive():
+        watcher = _watchers[key] = MasterWatcher(key, interval)
+        watcher.start()
+    return watcher
+
+
+def get_session_index(tool_context) -> Optional[HSNMasterIndex]:
+    """
+    Resolves the shared index for a session, recording its version handle
+    in `tool_context.state`. Returns None if the master cannot be loaded.
+    """
+    handle = tool_context.state.get(STATE_KEY) or {}
+    path = handle.get("path", HSN_MASTER_PATH)
+    try:
+        index = get_master_index(path)
+    except MasterLoadError as e:
+        logger.error(f"Could not load HSN master: {e}")
+        return None
+
+    if handle.get("version") != index.version or handle.get("path") != index.path:
+        tool_context.state[STATE_KEY] = index.handle()
+    return index
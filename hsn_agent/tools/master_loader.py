@@ -0,0 +1,170 @@
+"""
+Streaming reader for HSN master files.
+
+CSV files are read row by row with the `csv` module and XLSX files with
+openpyxl in read-only mode, so peak memory is the final code→description
+dict plus one row, instead of a whole pandas DataFrame next to it.
+Repeated descriptions ("OTHER", ...) are stored once.
+
+Headers are normalized the same way as before: surrounding whitespace,
+newlines and quotes are stripped, so the `"\\nHSNCode"` header of the
+bundled master works. Tab-separated files are detected from the header.
+
+Usage:
+    python -m hsn_agent.tools.master_loader master.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .master_index import MasterLoadError
+
+REQUIRED = ("HSNCode", "Description")
+
+
+def _normalize_header(header: List[object]) -> List[str]:
+    return ["" if h is None else str(h).strip().strip('"').strip("'") for h in header]
+
+
+def _columns(header: List[str], path: str) -> Tuple[int, int]:
+    missing = set(REQUIRED) - set(header)
+    if missing:
+        raise MasterLoadError(f"Missing columns {missing}. Found: {header}")
+    return header.index("HSNCode"), header.index("Description")
+
+
+def _cell(value: object) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def iter_csv_rows(path: str) -> Iterator[Tuple[str, str]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = _normalize_header(next(reader, []))
+        if "HSNCode" not in header and any("\t" in h for h in header):
+            f.seek(0)
+            reader = csv.reader(f, delimiter="\t")
+            header = _normalize_header(next(reader, []))
+        code_at, desc_at = _columns(header, path)
+        width = max(code_at, desc_at) + 1
+        for row in reader:
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+            yield row[code_at], row[desc_at]
+
+
+def iter_xlsx_rows(path: str) -> Iterator[Tuple[object, object]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        code_at, desc_at = _columns(_normalize_header(list(next(rows, ()))), path)
+        width = max(code_at, desc_at) + 1
+        for row in rows:
+            if len(row) < width:
+                row = tuple(row) + (None,) * (width - len(row))
+            yield row[code_at], row[desc_at]
+    finally:
+        workbook.close()
+
+
+def _iter_xls_rows(path: str) -> Iterator[Tuple[object, object]]:
+    # Legacy .xls has no streaming reader; fall back to pandas.
+    import pandas as pd
+
+    df = pd.read_excel(path, dtype=str)
+    df.columns = _normalize_header(list(df.columns))
+    _columns(list(df.columns), path)
+    for code, desc in zip(df["HSNCode"], df["Description"]):
+        yield (None if pd.isna(code) else code), (None if pd.isna(desc) else desc)
+
+
+def iter_master_rows(path: str) -> Iterator[Tuple[object, object]]:
+    """Yields raw (code, description) cells of the master file at `path`."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".xlsx":
+        return iter_xlsx_rows(path)
+    if ext == ".xls":
+        return _iter_xls_rows(path)
+    return iter_csv_rows(path)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB, where available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def stream_master_table(path: str, stats: Optional[dict] = None) -> Dict[str, str]:
+    """
+    Streams the master file at `path` into a dict code→description. Later
+    rows override earlier ones with the same code; rows without a code are
+    skipped. If `stats` is given it is filled with rows, codes, seconds,
+    rows_per_sec and peak_rss_mb.
+
+    Raises:
+        MasterLoadError: if the file is missing, unparsable or lacks the
+            `HSNCode`/`Description` columns.
+    """
+    if not os.path.isfile(path):
+        raise MasterLoadError(f"File not found: {path}")
+
+    start = time.perf_counter()
+    table: Dict[str, str] = {}
+    descriptions: Dict[str, str] = {}
+    rows = 0
+    try:
+        for code, desc in iter_master_rows(path):
+            rows += 1
+            code = _cell(code)
+            if not code:
+                continue
+            desc = _cell(desc)
+            table[code] = descriptions.setdefault(desc, desc)
+    except MasterLoadError:
+        raise
+    except Exception as e:
+        raise MasterLoadError(f"Failed to parse {path}: {e}") from e
+
+    if stats is not None:
+        seconds = time.perf_counter() - start
+        stats.update(
+            rows=rows,
+            codes=len(table),
+            seconds=round(seconds, 3),
+            rows_per_sec=round(rows / seconds) if seconds > 0 else None,
+            peak_rss_mb=peak_rss_mb(),
+        )
+    return table
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m hsn_agent.tools.master_loader")
+    parser.add_argument("path", help="HSN master CSV/TSV/XLSX")
+    args = parser.parse_args(argv)
+
+    stats: dict = {}
+    try:
+        stream_master_table(args.path, stats)
+    except MasterLoadError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(
+        f"Loaded {stats['codes']} codes from {stats['rows']} rows in {stats['seconds']}s "
+        f"({stats['rows_per_sec']} rows/s, peak RSS {stats['peak_rss_mb']} MiB)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""
+Compiled binary snapshot of the HSN master.
+
+`compile_snapshot` turns the CSV/XLSX master into a compact file that
+workers memory-map instead of parsing with pandas. Every worker process on
+a host shares the same page-cache pages, and lookups read straight from
+the mapping.
+
+Layout (little-endian):
+
+    header     "<8sHHIqq16s"  magic, format, code_width, count,
+                              source size, source mtime_ns, source version
+    codes      count * code_width bytes, sorted, NUL padded
+    offsets    (count + 1) * uint32 into the description blob
+    parents    count * int32, index of the nearest existing ancestor (-1: none)
+    non_other  count * int32, index of the nearest ancestor whose description
+               is not a catch-all "OTHER" (-1: none)
+    blob       UTF-8 descriptions, concatenated
+
+The hierarchy links are computed at compile time, so opening a snapshot
+builds nothing: `SnapshotHierarchy` reads them from the mapping.
+
+Usage:
+    python -m hsn_agent.tools.master_snapshot compile master_hsn.csv [-o out.hsnsnap]
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .hierarchy import _HIGH, HSNHierarchy, is_other, level_prefixes
+from .master_index import HSNMasterIndex, MasterLoadError, file_version, read_master_table
+
+MAGIC = b"HSNSNAP\x00"
+FORMAT_VERSION = 2
+SNAPSHOT_EXT = ".hsnsnap"
+
+_HEADER = struct.Struct("<8sHHIqq16s")
+_OFFSET = struct.Struct("<I")
+_INDEX = struct.Struct("<i")
+_SPAN = struct.Struct("<II")
+
+
+def snapshot_path_for(source_path: str) -> str:
+    """Default snapshot location next to a master source file."""
+    return os.path.splitext(source_path)[0] + SNAPSHOT_EXT
+
+
+def compile_snapshot(source_path: str, out_path: Optional[str] = None) -> str:
+    """
+    Parses `source_path` and writes its snapshot to `out_path`
+    (default: next to the source). Returns the snapshot path.
+    """
+    out_path = out_path or snapshot_path_for(source_path)
+    table = read_master_table(source_path)
+    st = os.stat(source_path)
+    version = file_version(source_path)
+    write_snapshot(table, out_path, st.st_size, st.st_mtime_ns, version)
+    return out_path
+
+
+def write_snapshot(
+    table: Dict[str, str],
+    out_path: str,
+    source_size: int,
+    source_mtime_ns: int,
+    source_version: str,
+) -> None:
+    hierarchy = HSNHierarchy(table)
+    position = {code: i for i, code in enumerate(hierarchy.codes)}
+    parents = [position.get(hierarchy.parent(code), -1) for code in hierarchy.codes]
+    non_other = [position.get(hierarchy.non_other_ancestor(code), -1) for code in hierarchy.codes]
+
+    codes = [code.encode("utf-8") for code in hierarchy.codes]
+    code_width = max((len(c) for c in codes), default=1)
+
+    blob = bytearray()
+    offsets = [0]
+    for code in codes:
+        blob += table[code.decode("utf-8")].encode("utf-8")
+        offsets.append(len(blob))
+    if len(blob) > 0xFFFFFFFF:
+        raise MasterLoadError("Description blob exceeds 4 GiB snapshot limit")
+
+    tmp_path = f"{out_path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(
+            _HEADER.pack(
+                MAGIC,
+                FORMAT_VERSION,
+                code_width,
+                len(codes),
+                source_size,
+                source_mtime_ns,
+                source_version.encode("ascii"),
+            )
+        )
+        for code in codes:
+            f.write(code.ljust(code_width, b"\x00"))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(struct.pack(f"<{len(parents)}i", *parents))
+        f.write(struct.pack(f"<{len(non_other)}i", *non_other))
+        f.write(blob)
+    os.replace(tmp_path, out_path)
+
+
+class SnapshotTable(Mapping):
+    """
+    Read-only code→description mapping served from a memory-mapped snapshot.
+
+    The sorted code list (and a code→position dict over it) is decoded once,
+    on first use; descriptions are decoded from the mapping per lookup.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise MasterLoadError(f"Empty snapshot file: {path}") from e
+
+        if len(self._mm) < _HEADER.size:
+            raise MasterLoadError(f"Truncated snapshot file: {path}")
+        (
+            magic,
+            fmt,
+            self.code_width,
+            self.count,
+            self.source_size,
+            self.source_mtime_ns,
+            version,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise MasterLoadError(f"Not an HSN snapshot: {path}")
+        if fmt != FORMAT_VERSION:
+            raise MasterLoadError(
+                f"Snapshot {path} has format {fmt}, expected {FORMAT_VERSION}; recompile it"
+            )
+
+        self.path = path
+        self.source_version = version.rstrip(b"\x00").decode("ascii")
+        self._codes_at = _HEADER.size
+        self._offsets_at = self._codes_at + self.count * self.code_width
+        self._parents_at = self._offsets_at + (self.count + 1) * _OFFSET.size
+        self._non_other_at = self._parents_at + self.count * _INDEX.size
+        self._blob_at = self._non_other_at + self.count * _INDEX.size
+        if len(self._mm) < self._blob_at:
+            raise MasterLoadError(f"Truncated snapshot file: {path}")
+        self._codes: Optional[List[str]] = None
+        self._positions: Dict[str, int] = {}
+
+    @property
+    def codes(self) -> List[str]:
+        """All codes in sorted order (shared; do not mutate)."""
+        if self._codes is None:
+            raw = self._mm[self._codes_at : self._offsets_at]
+            width = self.code_width
+            codes = [
+                raw[i : i + width].rstrip(b"\x00").decode("utf-8")
+                for i in range(0, len(raw), width)
+            ]
+            self._positions = {code: i for i, code in enumerate(codes)}
+            self._codes = codes
+        return self._codes
+
+    def _desc_at(self, i: int) -> str:
+        start, end = _SPAN.unpack_from(self._mm, self._offsets_at + i * _OFFSET.size)
+        return self._mm[self._blob_at + start : self._blob_at + end].decode("utf-8")
+
+    def _find(self, code: str) -> int:
+        if self._codes is None:
+            self.codes
+        return self._positions.get(code, -1)
+
+    def _int32s(self, at: int) -> Sequence[int]:
+        if sys.byteorder == "little":
+            # Zero-copy view of the mapping.
+            return memoryview(self._mm)[at : at + self.count * _INDEX.size].cast("i")
+        return struct.unpack_from(f"<{self.count}i", self._mm, at)
+
+    def links(self) -> Tuple[Sequence[int], Sequence[int]]:
+        """The `parents` and `non_other` index arrays."""
+        return self._int32s(self._parents_at), self._int32s(self._non_other_at)
+
+    def __getitem__(self, code: str) -> str:
+        i = self._find(code) if isinstance(code, str) else -1
+        if i < 0:
+            raise KeyError(code)
+        return self._desc_at(i)
+
+    def get(self, code, default=None):
+        i = self._find(code) if isinstance(code, str) else -1
+        return self._desc_at(i) if i >= 0 else default
+
+    def __contains__(self, code: object) -> bool:
+        return isinstance(code, str) and self._find(code) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.codes)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def matches_source(self, source_path: str) -> bool:
+        """True if the snapshot was compiled from the file as it is now."""
+        try:
+            st = os.stat(source_path)
+        except OSError:
+            return False
+        return st.st_size == self.source_size and st.st_mtime_ns == self.source_mtime_ns
+
+
+class SnapshotHierarchy:
+    """`HSNHierarchy` interface over the snapshot's `parents`/`non_other` arrays."""
+
+    def __init__(self, table: SnapshotTable):
+        self._table = table
+        self._parents, self._non_other = table.links()
+        self._children: Optional[Dict[str, List[str]]] = None
+
+    @property
+    def codes(self) -> List[str]:
+        """All codes in sorted order (shared; do not mutate)."""
+        return self._table.codes
+
+    def _code(self, i: int) -> Optional[str]:
+        return self._table.codes[i] if i >= 0 else None
+
+    def parent(self, code: str) -> Optional[str]:
+        """Nearest existing ancestor of `code` (which need not exist itself)."""
+        i = self._table._find(code)
+        if i >= 0:
+            return self._code(self._parents[i])
+        for prefix in reversed(level_prefixes(code)[:-1]):
+            if prefix in self._table:
+                return prefix
+        return None
+
+    def ancestors(self, code: str) -> List[str]:
+        """Existing ancestors of `code`, outermost first."""
+        chain = []
+        parent = self.parent(code)
+        while parent is not None:
+            chain.append(parent)
+            parent = self._code(self._parents[self._table._find(parent)])
+        chain.reverse()
+        return chain
+
+    def levels(self, code: str) -> List[Tuple[str, bool]]:
+        """(prefix, exists) for every 2/4/6/8 level of `code`, outermost first."""
+        existing = set(self.ancestors(code))
+        if code in self._table:
+            existing.add(code)
+        return [(prefix, prefix in existing) for prefix in level_prefixes(code)]
+
+    def children(self, code: str = "") -> List[str]:
+        """Codes whose nearest existing ancestor is `code` ("" for chapters)."""
+        if self._children is None:
+            children: Dict[str, List[str]] = {}
+            codes = self._table.codes
+            for child, parent in zip(codes, self._parents):
+                children.setdefault(codes[parent] if parent >= 0 else "", []).append(child)
+            self._children = children
+        return list(self._children.get(code, ()))
+
+    def _bounds(self, prefix: str) -> Tuple[int, int]:
+        codes = self._table.codes
+        lo = bisect_left(codes, prefix)
+        return lo, bisect_left(codes, prefix + _HIGH, lo)
+
+    def subtree(self, code: str) -> List[str]:
+        """All codes starting with `code`, in sorted order (including itself)."""
+        lo, hi = self._bounds(code)
+        return self._table.codes[lo:hi]
+
+    def descendant_count(self, code: str) -> int:
+        lo, hi = self._bounds(code)
+        return hi - lo - (code in self._table)
+
+    def non_other_ancestor(self, code: str) -> Optional[str]:
+        """Nearest ancestor whose description is not a catch-all 'OTHER'."""
+        i = self._table._find(code)
+        if i >= 0:
+            return self._code(self._non_other[i])
+        for ancestor in reversed(self.ancestors(code)):
+            if not is_other(self._table[ancestor]):
+                return ancestor
+        return None
+
+
+class SnapshotMasterIndex(HSNMasterIndex):
+    """HSNMasterIndex whose hierarchy is read from the snapshot."""
+
+    __slots__ = ()
+
+    def __init__(self, table: SnapshotTable, path: str):
+        super().__init__(table, path, table.source_version)
+
+    @property
+    def hierarchy(self) -> SnapshotHierarchy:
+        return self.derived("hierarchy", lambda index: SnapshotHierarchy(index.table))
+
+
+def load_snapshot(path: str) -> SnapshotTable:
+    if not os.path.isfile(path):
+        raise MasterLoadError(f"File not found: {path}")
+    return SnapshotTable(path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m hsn_agent.tools.master_snapshot")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compile_cmd = sub.add_parser("compile", help="compile a CSV/XLSX master into a snapshot")
+    compile_cmd.add_argument("source")
+    compile_cmd.add_argument("-o", "--output")
+    args = parser.parse_args(argv)
+
+    try:
+        out_path = compile_snapshot(args.source, args.output)
+    except MasterLoadError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    table = load_snapshot(out_path)
+    print(f"Wrote {out_path}: {len(table)} codes, version {table.source_version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+"""
+SQLite storage backend for the HSN master.
+
+`compile_database` writes the master into a `.hsndb` SQLite file:
+
+    hsn          code (primary key), description, parent, non_other,
+                 length, rcode (reversed code, for "ends with")
+    hsn_deletes  single-character deletions of every code (fuzzy lookup)
+    hsn_fts      FTS5 over stemmed, stopword-free description terms
+    meta         schema and source version, code count
+
+Pointing `HSN_MASTER_PATH` at a `.hsndb` file makes `get_master_index`
+return a `SqliteMasterIndex`. Its table, hierarchy, pattern, fuzzy and
+lexical lookups are SQL queries over read-only connections (one per
+thread) instead of in-memory structures, so per-process memory stays flat
+however many workers run, and the OS page cache is shared between them.
+Query results match the in-memory indexes.
+
+Usage:
+    python -m hsn_agent.tools.master_sqlite compile master_hsn.csv [-o out.hsndb]
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import Mapping
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from .fuzzy import FuzzyCodeIndex, _MIN_SHARED_PREFIX, _WINDOW, _deletes, shared_prefix
+from .hierarchy import HSNHierarchy, is_other, level_prefixes
+from .lexical_search import tokenize
+from .master_index import HSNMasterIndex, MasterLoadError, file_version, read_master_table
+from .pattern_index import MODES
+
+SQLITE_EXT = ".hsndb"
+SCHEMA_VERSION = "1"
+
+_HIGH = "\uffff"
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE hsn (
+    code TEXT PRIMARY KEY,
+    description TEXT NOT NULL,
+    parent TEXT,
+    non_other TEXT,
+    length INTEGER NOT NULL,
+    rcode TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX hsn_parent ON hsn (parent, code);
+CREATE INDEX hsn_rcode ON hsn (rcode);
+CREATE TABLE hsn_deletes (
+    key TEXT NOT NULL,
+    code TEXT NOT NULL,
+    PRIMARY KEY (key, code)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE hsn_fts USING fts5 (code UNINDEXED, terms, tokenize = 'unicode61');
+CREATE VIRTUAL TABLE hsn_vocab USING fts5vocab (hsn_fts, 'row');
+"""
+
+
+def database_path_for(source_path: str) -> str:
+    """Default database location next to a master source file."""
+    return os.path.splitext(source_path)[0] + SQLITE_EXT
+
+
+def compile_database(source_path: str, out_path: Optional[str] = None) -> str:
+    """
+    Parses `source_path` and writes its SQLite database to `out_path`
+    (default: next to the source). Returns the database path.
+    """
+    out_path = out_path or database_path_for(source_path)
+    table = read_master_table(source_path)
+    hierarchy = HSNHierarchy(table)
+    tmp = f"{out_path}.tmp{os.getpid()}"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    db = sqlite3.connect(tmp)
+    try:
+        db.executescript(_SCHEMA)
+        db.executemany(
+            "INSERT INTO hsn VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (code, table[code], hierarchy.parent(code), hierarchy.non_other_ancestor(code),
+                 len(code), code[::-1])
+                for code in hierarchy.codes
+            ),
+        )
+        db.executemany(
+            "INSERT INTO hsn_deletes VALUES (?, ?)",
+            ((key, code) for code in hierarchy.codes for key in set(_deletes(code))),
+        )
+        db.executemany(
+            "INSERT INTO hsn_fts (code, terms) VALUES (?, ?)",
+            ((code, " ".join(tokenize(table[code]))) for code in hierarchy.codes),
+        )
+        db.execute("INSERT INTO hsn_fts (hsn_fts) VALUES ('optimize')")
+        db.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                ("schema", SCHEMA_VERSION),
+                ("source_version", file_version(source_path)),
+                ("count", str(len(hierarchy.codes))),
+            ],
+        )
+        db.commit()
+        db.execute("VACUUM")
+    finally:
+        db.close()
+    os.replace(tmp, out_path)
+    return out_path
+
+
+class ConnectionPool:
+    """Read-only connections to one database file, one per thread."""
+
+    def __init__(self, path: str, mmap_size: int = 256 * 1024 * 1024):
+        self.path = path
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+            conn.execute("PRAGMA query_only = 1")
+            self._local.conn = conn
+        return conn
+
+    def execute(self, sql: str, params: Iterable = ()) -> sqlite3.Cursor:
+        return self.connection().execute(sql, tuple(params))
+
+
+def _in(values: List[str]) -> str:
+    return ",".join("?" * len(values))
+
+
+class SqliteTable(Mapping):
+    """Read-only code→description mapping backed by the `hsn` table."""
+
+    def __init__(self, pool: ConnectionPool):
+        self._pool = pool
+        meta = dict(pool.execute("SELECT key, value FROM meta"))
+        if meta.get("schema") != SCHEMA_VERSION:
+            raise MasterLoadError(f"{pool.path}: unsupported schema {meta.get('schema')!r}")
+        self.source_version = meta["source_version"]
+        self._count = int(meta["count"])
+
+    def __getitem__(self, code: str) -> str:
+        row = self._pool.execute("SELECT description FROM hsn WHERE code = ?", (code,)).fetchone()
+        if row is None:
+            raise KeyError(code)
+        return row[0]
+
+    def get(self, code, default=None):
+        if not isinstance(code, str):
+            return default
+        row = self._pool.execute("SELECT description FROM hsn WHERE code = ?", (code,)).fetchone()
+        return default if row is None else row[0]
+
+    def __contains__(self, code: object) -> bool:
+        return isinstance(code, str) and self._pool.execute(
+            "SELECT 1 FROM hsn WHERE code = ?", (code,)
+        ).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        # A separate cursor, so iteration can interleave with other queries.
+        for (code,) in self._pool.connection().cursor().execute("SELECT code FROM hsn ORDER BY code"):
+            yield code
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class SqliteHierarchy:
+    """`HSNHierarchy` interface over the `parent`/`non_other` columns."""
+
+    def __init__(self, pool: ConnectionPool, table: SqliteTable):
+        self._pool = pool
+        self._table = table
+        self._codes: Optional[List[str]] = None
+
+    @property
+    def codes(self) -> List[str]:
+        """All codes in sorted order. Loads the full list; avoid on hot paths."""
+        if self._codes is None:
+            self._codes = list(self._table)
+        return self._codes
+
+    def _existing(self, codes: List[str]) -> Set[str]:
+        if not codes:
+            return set()
+        rows = self._pool.execute(f"SELECT code FROM hsn WHERE code IN ({_in(codes)})", codes)
+        return {code for (code,) in rows}
+
+    def parent(self, code: str) -> Optional[str]:
+        ancestors = self.ancestors(code)
+        return ancestors[-1] if ancestors else None
+
+    def ancestors(self, code: str) -> List[str]:
+        prefixes = level_prefixes(code)[:-1]
+        existing = self._existing(prefixes)
+        return [p for p in prefixes if p in existing]
+
+    def levels(self, code: str) -> List[Tuple[str, bool]]:
+        prefixes = level_prefixes(code)
+        existing = self._existing(prefixes)
+        return [(p, p in existing) for p in prefixes]
+
+    def children(self, code: str = "") -> List[str]:
+        if code:
+            rows = self._pool.execute("SELECT code FROM hsn WHERE parent = ? ORDER BY code", (code,))
+        else:
+            rows = self._pool.execute("SELECT code FROM hsn WHERE parent IS NULL ORDER BY code")
+        return [c for (c,) in rows]
+
+    def subtree(self, code: str) -> List[str]:
+        rows = self._pool.execute(
+            "SELECT code FROM hsn WHERE code >= ? AND code < ? ORDER BY code", (code, code + _HIGH)
+        )
+        return [c for (c,) in rows]
+
+    def descendant_count(self, code: str) -> int:
+        (count,) = self._pool.execute(
+            "SELECT count(*) FROM hsn WHERE code > ? AND code < ?", (code, code + _HIGH)
+        ).fetchone()
+        return count
+
+    def non_other_ancestor(self, code: str) -> Optional[str]:
+        row = self._pool.execute("SELECT non_other FROM hsn WHERE code = ?", (code,)).fetchone()
+        if row is not None:
+            return row[0]
+        for ancestor in reversed(self.ancestors(code)):
+            if not is_other(self._table[ancestor]):
+                return ancestor
+        return None
+
+
+class SqlitePatternIndex:
+    """`PatternIndex` interface; ranked broader-level first, then by code."""
+
+    _WHERE = {
+        "begins with": "code >= ? AND code < ?",
+        "ends with": "rcode >= ? AND rcode < ?",
+        "contains": "instr(code, ?) > 0",
+    }
+
+    def __init__(self, pool: ConnectionPool):
+        self._pool = pool
+
+    def search(
+        self, pattern: str, mode: str, limit: int = 5, offset: int = 0
+    ) -> Tuple[List[str], int]:
+        if mode not in MODES:
+            raise ValueError(f"Unknown pattern mode {mode!r}; expected one of {MODES}")
+        where = self._WHERE[mode]
+        if mode == "begins with":
+            params: Tuple = (pattern, pattern + _HIGH)
+        elif mode == "ends with":
+            params = (pattern[::-1], pattern[::-1] + _HIGH)
+        else:
+            params = (pattern,)
+        (total,) = self._pool.execute(f"SELECT count(*) FROM hsn WHERE {where}", params).fetchone()
+        rows = self._pool.execute(
+            f"SELECT code FROM hsn WHERE {where} ORDER BY length, code LIMIT ? OFFSET ?",
+            params + (limit, offset),
+        )
+        return [c for (c,) in rows], total
+
+
+class SqliteFuzzyIndex(FuzzyCodeIndex):
+    """`FuzzyCodeIndex` whose delete index and sorted neighbours live in SQLite."""
+
+    def __init__(self, pool: ConnectionPool):
+        self._pool = pool
+        self._init_cache()
+
+    def _close(self, code: str) -> Set[str]:
+        keys = list(set(_deletes(code)))
+        rows = self._pool.execute(f"SELECT code FROM hsn_deletes WHERE key IN ({_in(keys)})", keys)
+        return {c for (c,) in rows}
+
+    def _neighbours(self, code: str) -> Iterable[str]:
+        before = self._pool.execute(
+            "SELECT code FROM hsn WHERE code < ? ORDER BY code DESC LIMIT ?", (code, _WINDOW)
+        ).fetchall()
+        after = self._pool.execute(
+            "SELECT code FROM hsn WHERE code >= ? ORDER BY code LIMIT ?", (code, _WINDOW)
+        ).fetchall()
+        for (candidate,) in before[::-1] + after:
+            if shared_prefix(code, candidate) >= _MIN_SHARED_PREFIX:
+                yield candidate
+
+
+class SqliteLexicalIndex:
+    """`LexicalIndex` interface: BM25 via FTS5 over the same stemmed terms."""
+
+    def __init__(self, pool: ConnectionPool, table: SqliteTable):
+        self._pool = pool
+        self._n_docs = max(len(table), 1)
+        self._unknown_idf = math.log(1 + (self._n_docs - 0.5) / 0.5)
+
+    def _idf(self, docs: int) -> float:
+        return math.log(1 + (self._n_docs - docs + 0.5) / (docs + 0.5))
+
+    def search(self, query: str, top_k: int = 5) -> Tuple[List[Tuple[str, float]], float]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], 0.0
+
+        match = " OR ".join(f'"{t}"' for t in terms)
+        rows = self._pool.execute(
+            "SELECT code, terms, bm25(hsn_fts) AS score FROM hsn_fts "
+            "WHERE hsn_fts MATCH ? ORDER BY score, code LIMIT ?",
+            (match, top_k),
+        ).fetchall()
+        if not rows:
+            return [], 0.0
+
+        docs = dict(self._pool.execute(
+            f"SELECT term, doc FROM hsn_vocab WHERE term IN ({_in(terms)})", terms
+        ))
+        idf = {t: self._idf(docs[t]) if t in docs else self._unknown_idf for t in terms}
+        best_terms = set(rows[0][1].split())
+        matched = sum(idf[t] for t in terms if t in best_terms)
+        confidence = matched / sum(idf.values())
+        return [(code, -score) for code, _, score in rows], confidence
+
+
+class SqliteMasterIndex(HSNMasterIndex):
+    """HSNMasterIndex whose auxiliary lookups are SQL queries."""
+
+    __slots__ = ("pool",)
+
+    def __init__(self, pool: ConnectionPool, path: str):
+        table = SqliteTable(pool)
+        super().__init__(table, path, table.source_version)
+        self.pool = pool
+
+    @property
+    def hierarchy(self) -> SqliteHierarchy:
+        return self.derived("hierarchy", lambda index: SqliteHierarchy(index.pool, index.table))
+
+    @property
+    def fuzzy(self) -> SqliteFuzzyIndex:
+        return self.derived("fuzzy", lambda index: SqliteFuzzyIndex(index.pool))
+
+    @property
+    def patterns(self) -> SqlitePatternIndex:
+        return self.derived("patterns", lambda index: SqlitePatternIndex(index.pool))
+
+    @property
+    def lexical(self) -> SqliteLexicalIndex:
+        return self.derived("lexical", lambda index: SqliteLexicalIndex(index.pool, index.table))
+
+
+def open_database(path: str) -> SqliteMasterIndex:
+    if not os.path.isfile(path):
+        raise MasterLoadError(f"File not found: {path}")
+    try:
+        return SqliteMasterIndex(ConnectionPool(path), path)
+    except (sqlite3.Error, KeyError) as e:
+        raise MasterLoadError(f"Cannot open HSN database {path}: {e}") from e
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m hsn_agent.tools.master_sqlite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compile_cmd = sub.add_parser("compile", help="compile a CSV/XLSX master into a SQLite database")
+    compile_cmd.add_argument("source")
+    compile_cmd.add_argument("-o", "--output")
+    args = parser.parse_args(argv)
+
+    try:
+        out_path = compile_database(args.source, args.output)
+    except MasterLoadError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    index = open_database(out_path)
+    print(f"Wrote {out_path}: {len(index)} codes, version {index.version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Output profiles for `validate_hsn_code` and `rag_query` results.
+
+Tool results are serialized into the model context as they are. The
+profile is `OUTPUT_PROFILE`, or `state["output_profile"]` for a session:
+
+- "verbose": the full results, including the rendered `message`/`prompt`
+  text (default; the fast-path router renders from these).
+- "compact": no rendered prose, short per-entry keys, and every
+  description given once in a shared `d` table keyed by code:
+
+      {"r": [{"c": "01012910", "s": "valid", "h": ["01", "0101", "010129"], "n": 0}],
+       "d": {"01": "LIVE ANIMALS", "0101": "...", "010129": "...", "01012910": "..."}}
+
+  Entry keys: c code, s status, h existing parent codes, n subcodes,
+  a nearest existing ancestor, sg suggested codes, sc score, dist distance,
+  src sources, m mentions, o named parent of an "OTHER" code, t text.
+  Warnings and errors keep their `message`.
+- "ids": codes only, grouped by status for validation.
+
+Top-level keys other than the result list stay as they are.
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from ..config import OUTPUT_PROFILE
+from .master_index import HSNMasterIndex
+
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
+
+PROFILES = ("verbose", "compact", "ids")
+STATE_KEY = "output_profile"
+
+_ENTRY_KEYS = {
+    "code": "c",
+    "score": "sc",
+    "distance": "dist",
+    "parents": "h",
+    "sources": "src",
+    "mentions": "m",
+}
+
+
+def output_profile(tool_context: "ToolContext") -> str:
+    """The session's output profile; unknown values fall back to "verbose"."""
+    profile = tool_context.state.get(STATE_KEY) or OUTPUT_PROFILE
+    return profile if profile in PROFILES else "verbose"
+
+
+# --- validate_hsn_code ---
+
+def shape_validation(results: List[dict], profile: str) -> dict:
+    """`validate_hsn_code` output for `validation_results(...)` in `profile`."""
+    if profile == "compact":
+        descriptions: Dict[str, str] = {}
+        return {"r": [_compact_validation(r, descriptions) for r in results], "d": descriptions}
+    if profile == "ids":
+        grouped: Dict[str, object] = {}
+        for r in results:
+            if r["status"] == "not_found":
+                grouped.setdefault("not_found", {})[r["code"]] = [
+                    s["code"] for s in r.get("suggestions", ())
+                ]
+            else:
+                grouped.setdefault(r["status"], []).append(r["code"])
+        return grouped
+    return {"results": results}
+
+
+def _compact_validation(r: dict, descriptions: Dict[str, str]) -> dict:
+    entry = {"c": r["code"], "s": r["status"]}
+    if r["status"] == "valid":
+        descriptions[r["code"]] = r["description"]
+        parents = []
+        for level in r["hierarchy"]:
+            if level["exists"] and level["code"] != r["code"]:
+                parents.append(level["code"])
+                descriptions[level["code"]] = level["description"]
+        entry["h"] = parents
+        entry["n"] = r["subcodes"]
+    elif r["status"] == "not_found":
+        nearest = r.get("nearest_ancestor")
+        if nearest:
+            entry["a"] = nearest["code"]
+            descriptions[nearest["code"]] = nearest["description"]
+        entry["sg"] = [s["code"] for s in r.get("suggestions", ())]
+        for s in r.get("suggestions", ()):
+            descriptions[s["code"]] = s["description"]
+    return entry
+
+
+# --- rag_query ---
+
+def shape_query_result(result: dict, profile: str, index: Optional[HSNMasterIndex]) -> dict:
+    """`rag_query` output (lexical, vector, RAG or pattern results) in `profile`."""
+    if profile == "verbose":
+        return result
+    entries = result.get("results")
+    if entries is None:
+        entries = result.get("suggestions", [])
+
+    shaped = {"status": result["status"]}
+    for key in ("source", "pattern", "mode", "page", "total_matches"):
+        if key in result:
+            shaped[key] = result[key]
+    if result["status"] in ("error", "warning"):
+        shaped["message"] = result["message"]
+
+    if profile == "ids":
+        shaped["codes"] = [e["code"] for e in entries if "code" in e]
+        return shaped
+
+    descriptions: Dict[str, str] = {}
+    shaped["r"] = [_compact_entry(e, descriptions, index) for e in entries]
+    shaped["d"] = descriptions
+    return shaped
+
+
+def _compact_entry(e: dict, descriptions: Dict[str, str], index: Optional[HSNMasterIndex]) -> dict:
+    if "code" not in e:
+        # a chunk or snippet without a known code
+        entry = {
+            "src": e.get("source") or e.get("source_name") or e.get("source_uri", ""),
+            "t": e.get("snippet", e.get("text", "")),
+        }
+        if "score" in e:
+            entry["sc"] = e["score"]
+        return entry
+
+    entry = {short: e[key] for key, short in _ENTRY_KEYS.items() if key in e}
+    if e.get("description") is not None:
+        descriptions[e["code"]] = e["description"]
+    if index is not None and ("category" in e or "explanation" in e):
+        parent = index.hierarchy.non_other_ancestor(e["code"])
+        if parent:
+            entry["o"] = parent
+            descriptions[parent] = index.get(parent)
+    return entry
@@ -0,0 +1,105 @@
+"""
+Digit-pattern index for "begins with" / "ends with" / "contains" queries.
+
+Codes are bucketed by length (2-digit chapters first, then headings,
+subheadings and tariff lines) and each bucket keeps three sorted arrays:
+
+- the codes themselves, for prefix ranges,
+- the reversed codes, for suffix ranges,
+- every suffix of every code (a small suffix array), for substrings.
+
+A query is a bisect per bucket, so totals come from range sizes and a page
+of results is sliced out without touching non-matching codes. Results are
+ranked broader-level first, then by code, which is deterministic and keeps
+parents ahead of their children.
+"""
+
+import heapq
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+MODES = ("begins with", "ends with", "contains")
+
+_HIGH = "\uffff"
+
+
+def _range(keys: Sequence[str], pattern: str) -> Tuple[int, int]:
+    lo = bisect_left(keys, pattern)
+    hi = bisect_left(keys, pattern + _HIGH, lo)
+    return lo, hi
+
+
+class _Bucket:
+    __slots__ = ("codes", "reversed_keys", "reversed_codes", "suffix_keys", "suffix_owner")
+
+    def __init__(self, codes: List[str]):
+        self.codes = sorted(codes)
+
+        pairs = sorted((code[::-1], code) for code in self.codes)
+        self.reversed_keys = [key for key, _ in pairs]
+        self.reversed_codes = [code for _, code in pairs]
+
+        suffixes = sorted(
+            (code[i:], n) for n, code in enumerate(self.codes) for i in range(len(code))
+        )
+        self.suffix_keys = [key for key, _ in suffixes]
+        self.suffix_owner = [n for _, n in suffixes]
+
+    def search(self, pattern: str, mode: str, stop: int) -> List[str]:
+        """The first `stop` matching codes of this bucket, in sorted order."""
+        if mode == "begins with":
+            lo, hi = _range(self.codes, pattern)
+            return self.codes[lo : min(hi, lo + stop)]
+        if mode == "ends with":
+            lo, hi = _range(self.reversed_keys, pattern[::-1])
+            return heapq.nsmallest(stop, self.reversed_codes[lo:hi])
+        lo, hi = _range(self.suffix_keys, pattern)
+        # A code can contain the pattern more than once.
+        owners = heapq.nsmallest(stop, set(self.suffix_owner[lo:hi]))
+        return [self.codes[n] for n in owners]
+
+    def count(self, pattern: str, mode: str) -> int:
+        if mode == "begins with":
+            lo, hi = _range(self.codes, pattern)
+        elif mode == "ends with":
+            lo, hi = _range(self.reversed_keys, pattern[::-1])
+        else:
+            lo, hi = _range(self.suffix_keys, pattern)
+            return len(set(self.suffix_owner[lo:hi]))
+        return hi - lo
+
+
+class PatternIndex:
+    def __init__(self, codes: Sequence[str]):
+        by_length: Dict[int, List[str]] = {}
+        for code in codes:
+            by_length.setdefault(len(code), []).append(code)
+        self._buckets = [_Bucket(by_length[n]) for n in sorted(by_length)]
+
+    def search(
+        self, pattern: str, mode: str, limit: int = 5, offset: int = 0
+    ) -> Tuple[List[str], int]:
+        """
+        Returns (page of matching codes, total number of matches).
+
+        `mode` is one of MODES; the page holds at most `limit` codes starting
+        at `offset` in ranked order.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown pattern mode {mode!r}; expected one of {MODES}")
+
+        page: List[str] = []
+        total = 0
+        skip = offset
+        for bucket in self._buckets:
+            count = bucket.count(pattern, mode)
+            total += count
+            if len(page) >= limit or count == 0:
+                continue
+            if skip >= count:
+                skip -= count
+                continue
+            matches = bucket.search(pattern, mode, skip + limit - len(page))
+            page.extend(matches[skip:])
+            skip = 0
+        return page, total
@@ -0,0 +1,83 @@
+"""
+Compact, code-keyed results from retrieved RAG chunks.
+
+Vertex returns whole chunks (up to `DEFAULT_CHUNK_SIZE` tokens each) that
+the model would otherwise read in full to find the HSN codes inside. With
+`RAG_COMPACT_RESULTS` on, `rag_query` replaces them with one entry per
+master code mentioned in the chunks:
+
+    {"code": "01012910", "description": "Horses for polo",
+     "parents": ["01", "0101"], "score": 0.21, "sources": ["a.pdf"],
+     "mentions": 2}
+
+Codes not in the master are dropped; a code mentioned in several chunks
+is listed once, at the rank of its best chunk. "OTHER" descriptions get
+the description of their nearest named ancestor as `category`. Chunks
+that name no known code are kept as short `snippet`s.
+"""
+
+from typing import Dict, List
+
+from ..config import RAG_SNIPPET_CHARS
+from .hierarchy import is_other
+from .hybrid import codes_in_text
+from .master_index import HSNMasterIndex
+
+
+def code_entry(index: HSNMasterIndex, code: str) -> dict:
+    """Canonical description and hierarchy of a master code."""
+    description = index.get(code)
+    entry = {
+        "code": code,
+        "description": description,
+        "parents": index.hierarchy.ancestors(code),
+    }
+    if description and is_other(description):
+        parent = index.hierarchy.non_other_ancestor(code)
+        if parent:
+            entry["category"] = index.get(parent)
+    return entry
+
+
+def snippet(chunk: dict, chars: int = RAG_SNIPPET_CHARS) -> dict:
+    text = " ".join((chunk.get("text") or "").split())
+    if len(text) > chars:
+        text = text[:chars].rsplit(" ", 1)[0] + " …"
+    return {
+        "source": chunk.get("source_name") or chunk.get("source_uri", ""),
+        "snippet": text,
+        "score": chunk.get("score"),
+    }
+
+
+def compact_chunks(index: HSNMasterIndex, chunks: List[dict]) -> List[dict]:
+    """One entry per master code mentioned in `chunks` (best first), then snippets."""
+    by_code: Dict[str, dict] = {}
+    snippets = []
+    for chunk in chunks:
+        codes = codes_in_text(chunk.get("text", ""), index)
+        if not codes:
+            snippets.append(snippet(chunk))
+            continue
+        source = chunk.get("source_name") or chunk.get("source_uri", "")
+        for code in codes:
+            entry = by_code.get(code)
+            if entry is None:
+                entry = by_code[code] = code_entry(index, code)
+                entry.update(score=chunk.get("score"), sources=[], mentions=0)
+            if source and source not in entry["sources"]:
+                entry["sources"].append(source)
+            entry["mentions"] += 1
+    return list(by_code.values()) + snippets
+
+
+def compact_fused(index: HSNMasterIndex, fused: List[dict]) -> List[dict]:
+    """`compact_chunks` for the output of `hybrid.fuse_results`."""
+    results = []
+    for item in fused:
+        if "code" in item:
+            results.append({**code_entry(index, item["code"]),
+                            "score": item["score"], "sources": item["sources"]})
+        else:
+            results.append({**snippet(item), "score": item["score"]})
+    return results
@@ -0,0 +1,287 @@
+"""
+Shared client for Vertex AI RAG calls.
+
+The `vertexai.rag` SDK is synchronous. Every remote call made by the tools
+goes through the process-wide `rag_client`, which
+
+- runs calls on a bounded worker pool (`RAG_MAX_CONCURRENCY`) so coroutine
+  tools can `await` them without blocking the agent's event loop,
+- coalesces identical in-flight read calls (`retrieval_query`,
+  `list_corpora`, `list_files`): a burst of sessions asking the same
+  question shares one remote call,
+- reuses one gapic client (and gRPC channel) per RAG service instead of
+  the SDK's new client per call, see `share_gapic_clients`,
+- records calls, coalesced requests, errors and durations per SDK method
+  in `metrics`.
+
+Each method returns a `RagCall`, which can be awaited from async code or
+resolved with `.result()` from sync code. The backend is any object with
+the `vertexai.rag` functions, so a fake can be passed to `RagClient` for
+offline runs.
+
+The Vertex SDK is imported, and `vertexai.init` run, on first use of the
+default backend, so processes that never make a remote call (e.g. code
+validation only) do not pay for it.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from ..config import LOCATION, PROJECT_ID, RAG_MAX_CONCURRENCY
+from ..metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RagCall:
+    """Handle to a remote call: `await call` or `call.result()`."""
+
+    __slots__ = ("_future",)
+
+    def __init__(self, future: Future):
+        self._future = future
+
+    def __await__(self):
+        return asyncio.wrap_future(self._future).__await__()
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        return self._future.result(timeout)
+
+
+class RagClient:
+    def __init__(self, backend: Any = None, max_concurrency: int = RAG_MAX_CONCURRENCY):
+        self._backend = backend
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="rag"
+        )
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    @property
+    def backend(self) -> Any:
+        if self._backend is None:
+            init_vertexai()
+            from vertexai import rag
+
+            share_gapic_clients()
+            self._backend = rag
+        return self._backend
+
+    def set_backend(self, backend: Any) -> None:
+        """Installs a backend (e.g. a stub `rag` module). None restores Vertex AI."""
+        self._backend = backend
+
+    def _submit(self, method: str, key: Optional[Hashable], fn: Callable[[], Any]) -> RagCall:
+        with self._lock:
+            if key is not None:
+                future = self._inflight.get(key)
+                if future is not None:
+                    self.coalesced += 1
+                    metrics.counter("hsn_rag_coalesced_total", method=method).inc()
+                    return RagCall(future)
+            self.calls += 1
+            future = self._executor.submit(timed_call, method, fn)
+            if key is not None:
+                self._inflight[key] = future
+        if key is not None:
+            future.add_done_callback(lambda _: self._forget(key, future))
+        return RagCall(future)
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def retrieval_query(
+        self, corpus_resource_name: str, text: str, top_k: int, distance_threshold: float
+    ) -> RagCall:
+        def call():
+            rag = self.backend
+            return rag.retrieval_query(
+                rag_resources=[rag.RagResource(rag_corpus=corpus_resource_name)],
+                text=text,
+                rag_retrieval_config=rag.RagRetrievalConfig(
+                    top_k=top_k,
+                    filter=rag.Filter(vector_distance_threshold=distance_threshold),
+                ),
+            )
+
+        key = ("retrieval_query", corpus_resource_name, text, top_k, distance_threshold)
+        return self._submit("retrieval_query", key, call)
+
+    def list_corpora(self) -> RagCall:
+        return self._submit(
+            "list_corpora", ("list_corpora",), lambda: list(self.backend.list_corpora())
+        )
+
+    def list_files(self, corpus_resource_name: str) -> RagCall:
+        return self._submit(
+            "list_files",
+            ("list_files", corpus_resource_name),
+            lambda: list(self.backend.list_files(corpus_resource_name)),
+        )
+
+    def import_files(
+        self,
+        corpus_resource_name: str,
+        paths: Sequence[str],
+        chunk_size: int,
+        chunk_overlap: int,
+        max_embedding_requests_per_min: int,
+    ) -> RagCall:
+        def call():
+            rag = self.backend
+            return rag.import_files(
+                corpus_resource_name,
+                list(paths),
+                transformation_config=rag.TransformationConfig(
+                    chunking_config=rag.ChunkingConfig(
+                        chunk_size=chunk_size,
+                        chunk_overlap=chunk_overlap,
+                    ),
+                ),
+                max_embedding_requests_per_min=max_embedding_requests_per_min,
+            )
+
+        # Imports change the corpus, so they are never coalesced.
+        return self._submit("import_files", None, call)
+
+    def delete_file(self, rag_file_name: str) -> RagCall:
+        return self._submit(
+            "delete_file", None, lambda: self.backend.delete_file(rag_file_name)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
+
+
+def timed_call(method: str, fn: Callable[[], Any]) -> Any:
+    """Runs one SDK call, recording it under `method` in `metrics`."""
+    metrics.counter("hsn_rag_calls_total", method=method).inc()
+    start = time.perf_counter()
+    try:
+        return fn()
+    except Exception:
+        metrics.counter("hsn_rag_errors_total", method=method).inc()
+        raise
+    finally:
+        metrics.histogram("hsn_rag_call_seconds", method=method).observe(time.perf_counter() - start)
+
+
+def _collect_stats():
+    stats = rag_client.stats()
+    yield "gauge", "hsn_rag_in_flight", {}, stats["in_flight"]
+
+
+_vertexai_ready = False
+_vertexai_lock = threading.Lock()
+
+
+def init_vertexai() -> None:
+    """Runs `vertexai.init` once per process, on the first remote call."""
+    global _vertexai_ready
+    if _vertexai_ready:
+        return
+    with _vertexai_lock:
+        if _vertexai_ready:
+            return
+        _vertexai_ready = True
+        if not (PROJECT_ID and LOCATION):
+            logger.warning(
+                f"Missing Vertex AI configuration. PROJECT_ID={PROJECT_ID}, LOCATION={LOCATION}. "
+                f"Tools requiring Vertex AI may not work properly."
+            )
+            return
+        try:
+            import vertexai
+
+            logger.info(f"Initializing Vertex AI with project={PROJECT_ID}, location={LOCATION}")
+            vertexai.init(project=PROJECT_ID, location=LOCATION)
+        except Exception as e:
+            logger.error(
+                f"Failed to initialize Vertex AI: {e}. "
+                f"Please check your Google Cloud credentials and project settings."
+            )
+
+
+# aiplatform config fields that change the client the SDK would build.
+_CLIENT_CONFIG_FIELDS = (
+    "_project",
+    "_location",
+    "_credentials",
+    "_api_endpoint",
+    "_api_key",
+    "_api_transport",
+    "_request_metadata",
+)
+_SHARED_FACTORIES = ("create_rag_service_client", "create_rag_data_service_client")
+
+_shared_clients: Dict[str, Tuple[Hashable, Any]] = {}
+_shared_lock = threading.Lock()
+
+
+def _config_key(config: Any) -> Hashable:
+    key = []
+    for field in _CLIENT_CONFIG_FIELDS:
+        value = getattr(config, field, None)
+        try:
+            hash(value)
+        except TypeError:
+            value = repr(value)
+        key.append(value)
+    return tuple(key)
+
+
+def share_gapic_clients(gapic_utils: Any = None, config: Any = None) -> None:
+    """
+    The SDK builds a new gapic client, with its own gRPC channel, for every
+    call (`vertexai.rag.utils._gapic_utils.create_rag_*_client`). Wraps those
+    factories so each service's client is built once and reused while the
+    aiplatform config (project, location, credentials, endpoint, ...) stays
+    the same; a changed config builds a new one.
+    """
+    if gapic_utils is None:
+        try:
+            from google.cloud.aiplatform import initializer
+            from vertexai.rag.utils import _gapic_utils as gapic_utils
+        except ImportError:
+            return
+        config = initializer.global_config
+
+    for name in _SHARED_FACTORIES:
+        factory = getattr(gapic_utils, name, None)
+        if factory is None:
+            logger.warning(
+                f"vertexai.rag has no {name}; RAG calls will open a new client each time"
+            )
+            continue
+        if getattr(factory, "_shared", False):
+            continue
+
+        def shared(factory=factory, name=name):
+            key = _config_key(config)
+            entry = _shared_clients.get(name)
+            if entry is None or entry[0] != key:
+                with _shared_lock:
+                    entry = _shared_clients.get(name)
+                    if entry is None or entry[0] != key:
+                        entry = _shared_clients[name] = (key, factory())
+            return entry[1]
+
+        shared._shared = True
+        setattr(gapic_utils, name, shared)
+
+
+rag_client = RagClient()
+metrics.add_collector(_collect_stats)
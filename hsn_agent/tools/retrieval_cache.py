@@ -0,0 +1,199 @@
+"""
+Cache for Vertex AI RAG retrieval results.
+
+Sits in front of `rag.retrieval_query` in `rag_query`. Entries are keyed on
+the normalized query text, corpus resource name, top_k and distance
+threshold, evicted LRU-first when the entry or byte budget is exceeded,
+and expire after a TTL. Corpus changes (`add_data`, `delete_document`,
+`delete_corpus`) invalidate every entry for that corpus.
+
+Setting `HSN_RETRIEVAL_CACHE_PATH` additionally persists entries to a
+local SQLite file so the cache survives restarts.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from ..config import (
+    RETRIEVAL_CACHE_MAX_BYTES,
+    RETRIEVAL_CACHE_MAX_ENTRIES,
+    RETRIEVAL_CACHE_PATH,
+    RETRIEVAL_CACHE_TTL,
+)
+from ..metrics import metrics
+from .lexical_search import stem
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, int, float]
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation, spacing and plural insensitive form of `query`."""
+    return " ".join(stem(w) for w in _WORD.findall(query.lower()))
+
+
+class RetrievalCache:
+    def __init__(
+        self,
+        max_entries: int = RETRIEVAL_CACHE_MAX_ENTRIES,
+        max_bytes: int = RETRIEVAL_CACHE_MAX_BYTES,
+        ttl: float = RETRIEVAL_CACHE_TTL,
+        sqlite_path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, int, List[dict]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        if sqlite_path:
+            self._open_db(sqlite_path)
+
+    @staticmethod
+    def key(query: str, corpus_resource_name: str, top_k: int, distance_threshold: float) -> CacheKey:
+        return (normalize_query(query), corpus_resource_name, top_k, distance_threshold)
+
+    def _open_db(self, path: str) -> None:
+        try:
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS retrieval_cache ("
+                " key TEXT PRIMARY KEY, corpus TEXT NOT NULL,"
+                " expires REAL NOT NULL, results TEXT NOT NULL)"
+            )
+            db.execute("DELETE FROM retrieval_cache WHERE expires < ?", (time.time(),))
+            db.commit()
+            self._db = db
+        except sqlite3.Error as e:
+            logger.warning(f"Retrieval cache persistence disabled ({path}): {e}")
+
+    def get(self, key: CacheKey) -> Optional[List[dict]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, _, results = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return [dict(r) for r in results]
+                self._drop(key)
+
+            row = self._db_get(key, now)
+            if row is not None:
+                results, expires = row
+                self._store(key, results, expires)
+                self.hits += 1
+                return results
+
+            self.misses += 1
+            return None
+
+    def put(self, key: CacheKey, results: List[dict]) -> None:
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._store(key, results, expires)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO retrieval_cache VALUES (?, ?, ?, ?)",
+                        (json.dumps(key), key[1], expires, json.dumps(results)),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not persist retrieval cache entry: {e}")
+
+    def invalidate(self, corpus_resource_name: Optional[str] = None) -> int:
+        """Drops all entries for a corpus (or everything). Returns entries removed."""
+        with self._lock:
+            keys = [
+                k for k in self._entries
+                if corpus_resource_name is None or k[1] == corpus_resource_name
+            ]
+            for k in keys:
+                self._drop(k)
+            if self._db is not None:
+                try:
+                    if corpus_resource_name is None:
+                        self._db.execute("DELETE FROM retrieval_cache")
+                    else:
+                        self._db.execute(
+                            "DELETE FROM retrieval_cache WHERE corpus = ?",
+                            (corpus_resource_name,),
+                        )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not invalidate persisted retrieval cache: {e}")
+            self.invalidations += 1
+            return len(keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    # --- internals; callers hold self._lock ---
+
+    def _store(self, key: CacheKey, results: List[dict], expires: float) -> None:
+        size = len(json.dumps(results))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (expires, size, results)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: CacheKey) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _db_get(self, key: CacheKey, now: float) -> Optional[Tuple[List[dict], float]]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT results, expires FROM retrieval_cache WHERE key = ? AND expires > ?",
+                (json.dumps(key), now),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read persisted retrieval cache: {e}")
+            return None
+        return (json.loads(row[0]), row[1]) if row else None
+
+
+retrieval_cache = RetrievalCache(sqlite_path=RETRIEVAL_CACHE_PATH)
+
+
+def _collect_stats():
+    stats = retrieval_cache.stats()
+    for name in ("hits", "misses", "evictions", "invalidations"):
+        yield "counter", f"hsn_retrieval_cache_{name}_total", {}, stats[name]
+    yield "gauge", "hsn_retrieval_cache_entries", {}, stats["entries"]
+    yield "gauge", "hsn_retrieval_cache_bytes", {}, stats["bytes"]
+
+
+metrics.add_collector(_collect_stats)
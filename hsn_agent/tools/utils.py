@@ -1,16 +1,127 @@
 import logging
 import re
-
-from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
 
 from ..config import (
+    CORPUS_REGISTRY_TTL,
     LOCATION,
     PROJECT_ID,
 )
+from .rag_client import rag_client
+
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
 
 logger = logging.getLogger(__name__)
 
+_RESOURCE_NAME = re.compile(r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$")
+
+
+class CorpusRegistry:
+    """
+    Process-wide display-name → resource-name map of RAG corpora.
+
+    Replaces a `list_corpora()` scan on every tool call: the listing is
+    refreshed at most every `ttl` seconds (sooner, after `miss_refresh`
+    seconds, when asked about an unknown corpus) and is updated or
+    invalidated explicitly by `create_corpus` / `delete_corpus`.
+    """
+
+    def __init__(self, ttl: float = CORPUS_REGISTRY_TTL, miss_refresh: float = 10.0):
+        self.ttl = ttl
+        self.miss_refresh = miss_refresh
+        self._by_display: Dict[str, str] = {}
+        self._resource_names: Set[str] = set()
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, max_age: float) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < max_age
+
+    def _apply(self, corpora: List[Any]) -> None:
+        by_display = {}
+        for corpus in corpora:
+            if hasattr(corpus, "display_name"):
+                by_display[corpus.display_name] = corpus.name
+        with self._lock:
+            self._by_display = by_display
+            self._resource_names = {corpus.name for corpus in corpora}
+            self._loaded_at = time.monotonic()
+
+    def _refresh(self, max_age: float) -> None:
+        if self._is_fresh(max_age):
+            return
+        try:
+            corpora = rag_client.list_corpora().result()
+        except Exception as e:
+            logger.warning(f"Error when listing corpora: {str(e)}")
+            return
+        self._apply(corpora)
+
+    async def _arefresh(self, max_age: float) -> None:
+        if self._is_fresh(max_age):
+            return
+        try:
+            corpora = await rag_client.list_corpora()
+        except Exception as e:
+            logger.warning(f"Error when listing corpora: {str(e)}")
+            return
+        self._apply(corpora)
+
+    def _lookup(self, corpus_name: str) -> Optional[str]:
+        if corpus_name in self._resource_names:
+            return corpus_name
+        resource_name = self._by_display.get(corpus_name)
+        if resource_name is None and "/" not in corpus_name:
+            # A bare corpus id, as in ".../ragCorpora/1234".
+            suffix = f"/ragCorpora/{corpus_name}"
+            for name in self._resource_names:
+                if name.endswith(suffix):
+                    return name
+        return resource_name
+
+    def resolve(self, corpus_name: str) -> Optional[str]:
+        """Resource name for a display name, resource name or bare corpus id, or None if unknown."""
+        self._refresh(self.ttl)
+        resource_name = self._lookup(corpus_name)
+        if resource_name is None:
+            self._refresh(self.miss_refresh)
+            resource_name = self._lookup(corpus_name)
+        return resource_name
+
+    async def aresolve(self, corpus_name: str) -> Optional[str]:
+        """`resolve` for coroutine tools; the listing is awaited, not blocked on."""
+        await self._arefresh(self.ttl)
+        resource_name = self._lookup(corpus_name)
+        if resource_name is None:
+            await self._arefresh(self.miss_refresh)
+            resource_name = self._lookup(corpus_name)
+        return resource_name
+
+    def register(self, resource_name: str, *display_names: str) -> None:
+        with self._lock:
+            by_display = dict(self._by_display)
+            for name in display_names:
+                by_display[name] = resource_name
+            self._by_display = by_display
+            self._resource_names = self._resource_names | {resource_name}
+
+    def forget(self, resource_name: str) -> None:
+        with self._lock:
+            self._by_display = {
+                name: res for name, res in self._by_display.items() if res != resource_name
+            }
+            self._resource_names = self._resource_names - {resource_name}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+
+corpus_registry = CorpusRegistry()
+
 
 def get_corpus_resource_name(corpus_name: str) -> str:
     """
@@ -25,18 +136,19 @@ def get_corpus_resource_name(corpus_name: str) -> str:
     """
     logger.info(f"Getting resource name for corpus: {corpus_name}")
 
-    if re.match(r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$", corpus_name):
+    if _RESOURCE_NAME.match(corpus_name):
         return corpus_name
+    return corpus_registry.resolve(corpus_name) or _default_resource_name(corpus_name)
 
-    try:
-        corpora = rag.list_corpora()
-        for corpus in corpora:
-            if hasattr(corpus, "display_name") and corpus.display_name == corpus_name:
-                return corpus.name
-    except Exception as e:
-        logger.warning(f"Error when checking for corpus display name: {str(e)}")
-        pass
 
+async def aget_corpus_resource_name(corpus_name: str) -> str:
+    """`get_corpus_resource_name` for coroutine tools."""
+    if _RESOURCE_NAME.match(corpus_name):
+        return corpus_name
+    return await corpus_registry.aresolve(corpus_name) or _default_resource_name(corpus_name)
+
+
+def _default_resource_name(corpus_name: str) -> str:
     if "/" in corpus_name:
         corpus_id = corpus_name.split("/")[-1]
     else:
@@ -46,7 +158,7 @@ def get_corpus_resource_name(corpus_name: str) -> str:
     return f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
 
 
-def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
+def check_corpus_exists(corpus_name: str, tool_context: "ToolContext") -> bool:
     """
     Check if a corpus with the given name exists.
 
@@ -57,30 +169,25 @@ def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
     Returns:
         bool: True if the corpus exists, False otherwise
     """
-    if tool_context.state.get(f"corpus_exists_{corpus_name}"):
-        return True
+    if corpus_registry.resolve(corpus_name) is None:
+        return False
 
-    try:
-        corpus_resource_name = get_corpus_resource_name(corpus_name)
+    if not tool_context.state.get("current_corpus"):
+        tool_context.state["current_corpus"] = corpus_name
+    return True
 
-        corpora = rag.list_corpora()
-        for corpus in corpora:
-            if (
-                corpus.name == corpus_resource_name
-                or corpus.display_name == corpus_name
-            ):
-                tool_context.state[f"corpus_exists_{corpus_name}"] = True
-                if not tool_context.state.get("current_corpus"):
-                    tool_context.state["current_corpus"] = corpus_name
-                return True
 
+async def acheck_corpus_exists(corpus_name: str, tool_context: "ToolContext") -> bool:
+    """`check_corpus_exists` for coroutine tools."""
+    if await corpus_registry.aresolve(corpus_name) is None:
         return False
-    except Exception as e:
-        logger.error(f"Error checking if corpus exists: {str(e)}")
-        return False
+
+    if not tool_context.state.get("current_corpus"):
+        tool_context.state["current_corpus"] = corpus_name
+    return True
 
 
-def set_current_corpus(corpus_name: str, tool_context: ToolContext) -> bool:
+def set_current_corpus(corpus_name: str, tool_context: "ToolContext") -> bool:
     if check_corpus_exists(corpus_name, tool_context):
         tool_context.state["current_corpus"] = corpus_name
         return True
@@ -1,20 +1,24 @@
 import re
-import difflib
-from typing import List, Dict
-from google.adk.tools.tool_context import ToolContext
-from hsn_agent.tools.load_hsn_master import load_hsn_master
+from typing import TYPE_CHECKING, List, Dict
+from hsn_agent.tools.master_index import HSNMasterIndex, get_session_index
+from hsn_agent.tools.output import output_profile, shape_validation
+
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
 
 def validate_hsn_code(
     codes: str,
-    tool_context: ToolContext
+    tool_context: "ToolContext"
 ) -> Dict[str, object]:
-    if "hsn_table" not in tool_context.state:
-        load_hsn_master(path="hsn_agent/data/master_hsn.csv", tool_context=tool_context)
-    hsn_table = tool_context.state.get("hsn_table", {})
-
-    if not hsn_table:
+    index = get_session_index(tool_context)
+    if not (index and index.table):
         return {"status": "error", "message": "Could not load HSN master. Check CSV path."}
+    return shape_validation(validation_results(index, codes), output_profile(tool_context))
+
 
+def validation_results(index: HSNMasterIndex, codes: str) -> List[dict]:
+    """Verbose result (with rendered `message`/`prompt`) for every code in `codes`."""
+    hsn_table = index.table
     entries = [c.strip() for c in re.split(r"[\s,]+", codes) if c.strip()]
     out_results = []
 
@@ -29,15 +33,14 @@ def validate_hsn_code(
 
         desc = hsn_table.get(code)
         if desc:
-            hierarchy = []
-            for length in (2,4,6,8):
-                if len(code) >= length:
-                    p = code[:length]
-                    hierarchy.append({
-                        "code": p,
-                        "description": hsn_table.get(p, "(no entry)"),
-                        "exists": p in hsn_table
-                    })
+            hierarchy = [
+                {
+                    "code": p,
+                    "description": hsn_table[p] if exists else "(no entry)",
+                    "exists": exists
+                }
+                for p, exists in index.hierarchy.levels(code)
+            ]
             hierarchy_lines = "\n".join(f"- {h['code']}: {h['description']}" for h in hierarchy)
             msg = (
                 f"The HSN code {code} is valid and corresponds to:\n\n"
@@ -50,13 +53,19 @@ def validate_hsn_code(
                 "status": "valid",
                 "description": desc,
                 "hierarchy": hierarchy,
+                "subcodes": index.hierarchy.descendant_count(code),
                 "message": msg
             })
             continue
 
-        # 3) No exact match → build fuzzy suggestions
-        all_codes = list(hsn_table.keys())
-        close = difflib.get_close_matches(code, all_codes, n=5, cutoff=0.5)
+        # 3) No exact match → closest existing ancestor + fuzzy suggestions
+        ancestor = index.hierarchy.parent(code)
+        nearest = (
+            {"code": ancestor, "description": hsn_table[ancestor]}
+            if ancestor else None
+        )
+
+        close = [c for c, _ in index.fuzzy.suggest(code, n=5)]
 
         if close:
             suggestion_list = [
@@ -73,6 +82,7 @@ def validate_hsn_code(
             out_results.append({
                 "code": code,
                 "status": "not_found",
+                "nearest_ancestor": nearest,
                 "suggestions": suggestion_list,
                 "prompt": prompt
             })
@@ -80,7 +90,8 @@ def validate_hsn_code(
             out_results.append({
                 "code": code,
                 "status": "not_found",
+                "nearest_ancestor": nearest,
                 "message": f"No HSN codes similar to '{code}' found. Please check your entry or give me a description."
             })
 
-    return {"results": out_results}
+    return out_results
@@ -0,0 +1,323 @@
+"""
+Offline vector search over HSN master descriptions.
+
+An alternative to the Vertex AI `rag.retrieval_query` backend for
+air-gapped or high-QPS deployments (`HSN_RAG_BACKEND=local`). Descriptions
+are embedded with a locally runnable embedding function, stored as a
+float32 matrix next to the master (`<master>.vectors.*`) and
+memory-mapped, so worker processes share the pages. A query is one
+matrix-vector product plus `argpartition` for the top-k.
+
+The default embedder is a signed hashing vectorizer over stemmed words
+and word bigrams with IDF weighting. It hashes into `VECTOR_DIM` (2^14)
+buckets, enough that distinct master terms rarely share one, so its
+matrix is stored column-compressed: a query only reads the columns of its
+own terms. Any callable mapping a list of texts to an (n, dim) float32
+array can be plugged in with `set_embedder`; its matrix is stored dense.
+
+Usage:
+    python -m hsn_agent.tools.vector_index build [master_path]
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..config import DEFAULT_DISTANCE_THRESHOLD, DEFAULT_TOP_K, VECTOR_DIM
+from .lexical_search import tokenize
+
+logger = logging.getLogger(__name__)
+
+VECTORS_SUFFIX = ".vectors"
+
+
+class HashingEmbedder:
+    """Signed feature hashing of stemmed words and bigrams, IDF weighted."""
+
+    def __init__(self, dim: int = VECTOR_DIM, idf: Optional[Sequence[float]] = None):
+        import numpy as np
+
+        self.dim = dim
+        self.name = f"hashing-v1-{dim}"
+        self.idf = np.ones(dim, dtype=np.float32) if idf is None else np.asarray(idf, dtype=np.float32)
+
+    def _features(self, text: str) -> List[int]:
+        terms = tokenize(text)
+        features = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+        return [zlib.crc32(f.encode("utf-8")) for f in features]
+
+    def fit(self, texts: Sequence[str]) -> "HashingEmbedder":
+        import numpy as np
+
+        df = np.zeros(self.dim, dtype=np.float64)
+        for text in texts:
+            buckets = {h % self.dim for h in self._features(text)}
+            df[list(buckets)] += 1
+        self.idf = np.log((1 + len(texts)) / (1 + df)).astype(np.float32) + 1
+        return self
+
+    def _row(self, text: str) -> Dict[int, float]:
+        """bucket → weight for `text`, L2-normalized."""
+        row: Dict[int, float] = {}
+        for h in self._features(text):
+            bucket = h % self.dim
+            row[bucket] = row.get(bucket, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+        for bucket in row:
+            row[bucket] *= float(self.idf[bucket])
+        norm = math.sqrt(sum(w * w for w in row.values()))
+        return {b: w / norm for b, w in row.items() if w} if norm > 0 else {}
+
+    def __call__(self, texts: Sequence[str]):
+        import numpy as np
+
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for bucket, weight in self._row(text).items():
+                out[i, bucket] = weight
+        return out
+
+    def sparse(self, texts: Sequence[str]) -> "SparseColumns":
+        """The same embeddings as `__call__`, column-compressed."""
+        import numpy as np
+
+        rows: List[int] = []
+        cols: List[int] = []
+        data: List[float] = []
+        for i, text in enumerate(texts):
+            for bucket, weight in self._row(text).items():
+                rows.append(i)
+                cols.append(bucket)
+                data.append(weight)
+        order = np.argsort(np.asarray(cols, dtype=np.int32), kind="stable")
+        indptr = np.zeros(self.dim + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=self.dim), out=indptr[1:])
+        return SparseColumns(
+            indptr,
+            np.asarray(rows, dtype=np.int32)[order],
+            np.asarray(data, dtype=np.float32)[order],
+            (len(texts), self.dim),
+        )
+
+
+class SparseColumns:
+    """
+    Column-compressed (n, dim) matrix. `matrix @ q` only reads the columns
+    where `q` is nonzero, i.e. the postings of the query's terms.
+    """
+
+    ARRAYS = ("indptr", "indices", "data")
+
+    def __init__(self, indptr, indices, data, shape: Tuple[int, int]):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = shape
+
+    def __matmul__(self, q):
+        import numpy as np
+
+        cols = np.flatnonzero(q)
+        starts, ends = self.indptr[cols], self.indptr[cols + 1]
+        if not (ends - starts).any():
+            return np.zeros(self.shape[0], dtype=np.float32)
+        rows = np.concatenate([self.indices[a:b] for a, b in zip(starts, ends)])
+        weights = np.concatenate(
+            [self.data[a:b] * q[c] for c, a, b in zip(cols, starts, ends)]
+        )
+        return np.bincount(rows, weights=weights, minlength=self.shape[0]).astype(np.float32)
+
+
+EmbedFn = Callable[[Sequence[str]], "object"]
+
+_embedder: Optional[EmbedFn] = None
+
+
+def set_embedder(embedder: Optional[EmbedFn]) -> None:
+    """
+    Installs a custom embedding function for the local backend. It must map
+    a list of texts to an (n, dim) float32 array of L2-normalized rows and
+    expose a `name` attribute; indexes built with another embedder are
+    rebuilt on next use. Pass None to restore the default.
+    """
+    global _embedder
+    _embedder = embedder
+
+
+def embedder_key() -> str:
+    """Name of the installed embedder ("default" if none); part of the index cache key."""
+    return _embedder_name(_embedder) if _embedder is not None else "default"
+
+
+def _embedder_name(embedder: EmbedFn) -> str:
+    return getattr(embedder, "name", getattr(embedder, "__qualname__", repr(embedder)))
+
+
+def vectors_base_for(master_path: str) -> str:
+    return os.path.splitext(master_path)[0] + VECTORS_SUFFIX
+
+
+def _suffix(array_name: str) -> str:
+    return f".{array_name}.npy" if array_name else ".npy"
+
+
+class LocalVectorIndex:
+    def __init__(self, codes: List[str], matrix, embedder: EmbedFn):
+        self.codes = codes
+        self.matrix = matrix
+        self.embed = embedder
+
+    @classmethod
+    def build(cls, table, embedder: Optional[EmbedFn] = None) -> "LocalVectorIndex":
+        codes = list(table)
+        descriptions = [table[code] for code in codes]
+        if embedder is None:
+            embedder = _embedder or HashingEmbedder().fit(descriptions)
+        if isinstance(embedder, HashingEmbedder):
+            return cls(codes, embedder.sparse(descriptions), embedder)
+        return cls(codes, embedder(descriptions), embedder)
+
+    def save(self, base: str, version: str) -> None:
+        import numpy as np
+
+        meta = {
+            "version": version,
+            "embedder": _embedder_name(self.embed),
+            "codes": self.codes,
+        }
+        if isinstance(self.embed, HashingEmbedder):
+            meta["idf"] = self.embed.idf.tolist()
+
+        if isinstance(self.matrix, SparseColumns):
+            meta["shape"] = list(self.matrix.shape)
+            arrays = {name: getattr(self.matrix, name) for name in SparseColumns.ARRAYS}
+        else:
+            arrays = {"": np.ascontiguousarray(self.matrix, dtype=np.float32)}
+
+        tmp = f"{base}.tmp{os.getpid()}"
+        for name, array in arrays.items():
+            np.save(f"{tmp}{_suffix(name)}", array)
+        with open(f"{tmp}.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        for name in arrays:
+            os.replace(f"{tmp}{_suffix(name)}", f"{base}{_suffix(name)}")
+        os.replace(f"{tmp}.json", f"{base}.json")
+
+    @classmethod
+    def load(cls, base: str, version: str) -> Optional["LocalVectorIndex"]:
+        """Memory-maps a saved index, or returns None if missing or stale."""
+        import numpy as np
+
+        try:
+            with open(f"{base}.json", encoding="utf-8") as f:
+                meta = json.load(f)
+            if "shape" in meta:
+                matrix = SparseColumns(
+                    *(np.load(f"{base}{_suffix(name)}", mmap_mode="r") for name in SparseColumns.ARRAYS),
+                    shape=tuple(meta["shape"]),
+                )
+            else:
+                matrix = np.load(f"{base}.npy", mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.info(f"No usable local vector index at {base}: {e}")
+            return None
+
+        if meta.get("version") != version:
+            return None
+        if _embedder is not None:
+            if meta.get("embedder") != _embedder_name(_embedder):
+                return None
+            embedder = _embedder
+        elif "idf" in meta:
+            embedder = HashingEmbedder(dim=matrix.shape[1], idf=meta["idf"])
+            # Built with another VECTOR_DIM: rebuild.
+            if meta.get("embedder") != embedder.name or embedder.dim != VECTOR_DIM:
+                return None
+        else:
+            return None
+        return cls(meta["codes"], matrix, embedder)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = DEFAULT_TOP_K,
+        distance_threshold: float = DEFAULT_DISTANCE_THRESHOLD,
+    ) -> List[Tuple[str, float]]:
+        """
+        (code, cosine distance) pairs for the `top_k` nearest descriptions,
+        nearest first, dropping any farther than `distance_threshold`.
+        """
+        import numpy as np
+
+        q = np.asarray(self.embed([query])[0], dtype=np.float32)
+        if not q.any() or not len(self.codes):
+            return []
+        similarities = self.matrix @ q
+        k = min(top_k, len(similarities))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top], kind="stable")]
+        results = []
+        for i in top:
+            distance = float(1.0 - similarities[i])
+            if distance <= distance_threshold:
+                results.append((self.codes[i], distance))
+        return results
+
+
+_build_lock = threading.Lock()
+
+
+def open_vector_index(master_index) -> LocalVectorIndex:
+    """
+    Memory-maps the saved index for `master_index`, building and saving it
+    first if it is missing or was built from another master version.
+    """
+    base = vectors_base_for(master_index.path)
+    index = LocalVectorIndex.load(base, master_index.version)
+    if index is not None:
+        return index
+
+    with _build_lock:
+        index = LocalVectorIndex.load(base, master_index.version)
+        if index is not None:
+            return index
+        logger.info(f"Building local vector index for {master_index.path}")
+        index = LocalVectorIndex.build(master_index.table)
+        try:
+            index.save(base, master_index.version)
+        except OSError as e:
+            logger.warning(f"Could not save local vector index to {base}: {e}")
+            return index
+    return LocalVectorIndex.load(base, master_index.version) or index
+
+
+def main(argv=None) -> int:
+    from .master_index import HSN_MASTER_PATH, MasterLoadError, get_master_index
+
+    parser = argparse.ArgumentParser(prog="python -m hsn_agent.tools.vector_index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="embed the master and save the local vector index")
+    build_cmd.add_argument("master", nargs="?", default=HSN_MASTER_PATH)
+    args = parser.parse_args(argv)
+
+    try:
+        master = get_master_index(args.master)
+    except MasterLoadError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    index = open_vector_index(master)
+    print(
+        f"Local vector index for {master.path}: {len(index.codes)} codes, "
+        f"dim {index.matrix.shape[1]}, embedder {_embedder_name(index.embed)}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
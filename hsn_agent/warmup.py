@@ -0,0 +1,262 @@
+"""
+Cache warm-up from recorded tool calls.
+
+After a deploy every cache is cold. With `HSN_WARMUP_LOG` set, importing
+`hsn_agent` starts a background thread that replays the most frequent
+entries of a recorded log:
+
+1. loads the HSN master and builds its hierarchy, fuzzy, pattern and
+   lexical indexes,
+2. computes the fuzzy suggestions of the `WARMUP_TOP_TYPOS` most frequent
+   codes that are not in the master,
+3. runs the `WARMUP_TOP_QUERIES` most frequent free-text queries that need
+   a Vertex retrieval (not pattern or lexical fast-path ones), at most
+   `WARMUP_MAX_QPS` per second, to fill the retrieval cache.
+
+Warm-up stops after `WARMUP_TIME_BUDGET` seconds. Requests are served
+normally meanwhile. `warmup_status()` reports progress, `wait_for_warmup()`
+blocks until it is done. The gauge `hsn_warmup_ready` is 1 once it has
+finished successfully; `hsn_warmup_failed` is 1 if it failed.
+
+The log is JSON lines, one per tool call:
+
+    {"tool": "rag_query", "args": {"corpus_name": "testing", "query": "polo horses"}}
+
+Set `HSN_QUERY_LOG` to have the agent record one (`record_tool_call`).
+"""
+
+import collections
+import json
+import logging
+import re
+import threading
+import time
+from typing import Counter, Dict, Iterator, List, Optional, Tuple
+
+from .config import (
+    QUERY_LOG_PATH,
+    WARMUP_LOG_PATH,
+    WARMUP_MAX_QPS,
+    WARMUP_TIME_BUDGET,
+    WARMUP_TOP_QUERIES,
+    WARMUP_TOP_TYPOS,
+)
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_CODE = re.compile(r"\d{2,8}")
+
+_status: Dict[str, object] = {"state": "idle"}
+_done = threading.Event()
+_start_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+_ready = metrics.gauge("hsn_warmup_ready")
+_failed = metrics.gauge("hsn_warmup_failed")
+
+
+# --- recording ---
+
+_log_lock = threading.Lock()
+_log_file = None
+
+
+def log_tool_call(tool: str, args: dict, path: str = QUERY_LOG_PATH) -> None:
+    """Appends one call to the query log at `path` (no-op if unset)."""
+    global _log_file
+    if not path:
+        return
+    line = json.dumps({"tool": tool, "args": args, "ts": round(time.time(), 3)}, default=str)
+    with _log_lock:
+        try:
+            if _log_file is None:
+                _log_file = open(path, "a", encoding="utf-8", buffering=1)
+            _log_file.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Could not record tool call to {path}: {e}")
+
+
+def record_tool_call(tool, args, tool_context) -> None:
+    """`before_tool_callback` recording every tool call to `QUERY_LOG_PATH`."""
+    log_tool_call(tool.name, args)
+    return None
+
+
+# --- replay ---
+
+def read_log(path: str) -> Iterator[Tuple[str, dict]]:
+    """(tool, args) for every well-formed line of the log at `path`."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                tool, args = entry["tool"], entry.get("args") or {}
+            except (ValueError, KeyError, TypeError):
+                continue
+            if isinstance(args, dict):
+                yield tool, args
+
+
+def tally_log(
+    calls: Iterator[Tuple[str, dict]], table
+) -> Tuple[Counter[str], Counter[Tuple[str, str]]]:
+    """Counts mistyped codes (not in `table`) and (corpus, query) pairs."""
+    from .tools.documents_handler.rag_query_batch import split_products
+
+    typos: Counter[str] = collections.Counter()
+    queries: Counter[Tuple[str, str]] = collections.Counter()
+
+    def add_codes(text: str) -> None:
+        for code in re.split(r"[\s,;]+", text):
+            if _CODE.fullmatch(code) and code not in table:
+                typos[code] += 1
+
+    for tool, args in calls:
+        corpus_name = args.get("corpus_name", "")
+        if tool == "validate_hsn_code":
+            add_codes(str(args.get("codes", "")))
+        elif tool == "rag_query":
+            queries[(corpus_name, " ".join(str(args.get("query", "")).split()))] += 1
+        elif tool == "rag_query_batch":
+            products = args.get("products") or []
+            for item in split_products(products if isinstance(products, list) else [str(products)]):
+                if re.fullmatch(r"\d+(?:[\s,;]+\d+)*", item):
+                    add_codes(item)
+                else:
+                    queries[(corpus_name, item)] += 1
+    return typos, queries
+
+
+def _needs_retrieval(index, query: str) -> bool:
+    """False for queries `rag_query` answers from the master alone."""
+    from .config import LEXICAL_FAST_PATH, LEXICAL_MIN_CONFIDENCE, LEXICAL_TOP_K
+    from .tools.documents_handler.rag_query import pattern_query
+
+    if not query or pattern_query(index, query) is not None:
+        return False
+    if LEXICAL_FAST_PATH:
+        hits, confidence = index.lexical.search(query, LEXICAL_TOP_K)
+        if hits and confidence >= LEXICAL_MIN_CONFIDENCE:
+            return False
+    return True
+
+
+async def _warm_retrieval(
+    queries: List[Tuple[str, str]], deadline: float, qps: float
+) -> int:
+    """Issues `queries` at most `qps` per second; returns how many succeeded."""
+    import asyncio
+    from types import SimpleNamespace
+
+    from .tools.documents_handler.rag_query import rag_query
+
+    tasks = []
+    for corpus_name, query in queries:
+        if time.monotonic() >= deadline:
+            break
+        tasks.append(asyncio.ensure_future(rag_query(corpus_name, query, SimpleNamespace(state={}))))
+        if qps > 0:
+            await asyncio.sleep(1.0 / qps)
+    if not tasks:
+        return 0
+    done, pending = await asyncio.wait(tasks, timeout=max(deadline - time.monotonic(), 0))
+    for task in pending:
+        task.cancel()
+    return sum(
+        1 for task in done
+        if task.exception() is None and task.result().get("status") != "error"
+    )
+
+
+def run_warmup(
+    path: str = WARMUP_LOG_PATH,
+    time_budget: float = WARMUP_TIME_BUDGET,
+    max_qps: float = WARMUP_MAX_QPS,
+    top_queries: int = WARMUP_TOP_QUERIES,
+    top_typos: int = WARMUP_TOP_TYPOS,
+) -> dict:
+    """Runs the warm-up in the calling thread and returns its status."""
+    import asyncio
+
+    from .config import HSN_MASTER_PATH, RAG_BACKEND
+    from .tools.master_index import get_master_index
+
+    start = time.monotonic()
+    deadline = start + time_budget
+    _status.update(state="running", log=path)
+    _ready.set(0)
+    _failed.set(0)
+    try:
+        index = get_master_index(HSN_MASTER_PATH)
+        structures = ["hierarchy", "fuzzy", "patterns", "lexical"]
+        if RAG_BACKEND == "local":
+            structures.append("vectors")
+        for structure in structures:
+            getattr(index, structure)
+        _status["master_codes"] = len(index)
+
+        typos, queries = tally_log(read_log(path), index.table)
+        _status["logged_typos"], _status["logged_queries"] = len(typos), len(queries)
+
+        warmed = 0
+        for code, _ in typos.most_common(top_typos):
+            if time.monotonic() >= deadline:
+                break
+            index.fuzzy.suggest(code, n=5)
+            warmed += 1
+        _status["typos_warmed"] = warmed
+
+        pending = []
+        if RAG_BACKEND in ("vertex", "hybrid"):
+            for (corpus_name, query), _ in queries.most_common():
+                if len(pending) >= top_queries or time.monotonic() >= deadline:
+                    break
+                if corpus_name and _needs_retrieval(index, query):
+                    pending.append((corpus_name, query))
+        _status["queries_warmed"] = (
+            asyncio.run(_warm_retrieval(pending, deadline, max_qps)) if pending else 0
+        )
+        _status["state"] = "ready"
+    except Exception as e:
+        logger.error(f"Warm-up from {path} failed: {e}")
+        _status.update(state="failed", error=str(e))
+    finally:
+        _status["seconds"] = round(time.monotonic() - start, 3)
+        _status["over_budget"] = time.monotonic() >= deadline
+        if _status["state"] == "ready":
+            _ready.set(1)
+        else:
+            _failed.set(1)
+        _done.set()
+
+    if _status["state"] == "ready":
+        logger.info(
+            f"Warm-up ready in {_status['seconds']:.1f} s: {_status['master_codes']} codes, "
+            f"{_status['typos_warmed']} typo(s), {_status['queries_warmed']} retrieval(s)"
+            + (" (time budget reached)" if _status["over_budget"] else "")
+        )
+    return warmup_status()
+
+
+def start_warmup(path: str = WARMUP_LOG_PATH) -> Optional[threading.Thread]:
+    """Starts `run_warmup` in a daemon thread, once per process."""
+    global _thread
+    with _start_lock:
+        if _thread is not None or not path:
+            return _thread
+        _thread = threading.Thread(
+            target=run_warmup, args=(path,), name="hsn-warmup", daemon=True
+        )
+        _thread.start()
+    logger.info(f"Warm-up started from {path}")
+    return _thread
+
+
+def warmup_status() -> dict:
+    """State ("idle", "running", "ready" or "failed") and what was warmed."""
+    return dict(_status)
+
+
+def wait_for_warmup(timeout: Optional[float] = None) -> bool:
+    """Blocks until warm-up has finished; False on timeout."""
+    return _done.wait(timeout)
@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+# Before hsn_agent is imported: no master file watcher threads, no persisted
+# retrieval cache, ingestion manifests outside the source tree.
+os.environ.setdefault("HSN_MASTER_WATCH_INTERVAL", "0")
+os.environ.setdefault("HSN_RETRIEVAL_CACHE_PATH", "")
+os.environ.setdefault("HSN_INGESTION_MANIFEST_DIR", tempfile.mkdtemp(prefix="hsn-manifests-"))
+
+from types import SimpleNamespace
+
+import pytest
+
+MASTER_ROWS = [
+    ("01", "LIVE ANIMALS"),
+    ("0101", "LIVE HORSES, ASSES, MULES AND HINNIES."),
+    ("010121", "PURE-BRED BREEDING HORSES"),
+    ("01012100", "PURE-BRED BREEDING HORSES"),
+    ("01011010", "LIVE HORSES PURE-BRED BREEDING ANIMALS HORSES"),
+    ("01011020", "LIVE HORSES PURE-BRED BREEDING ANIMALS ASSES"),
+    ("01011090", "OTHER"),
+    ("0102", "LIVE BOVINE ANIMALS"),
+    ("01021010", "LIVE BOVINE ANIMALS PURE-BRED BREEDING CATTLE"),
+]
+
+
+@pytest.fixture
+def master_csv(tmp_path):
+    path = tmp_path / "master.csv"
+    path.write_text(
+        "HSNCode,Description\n" + "".join(f'{c},"{d}"\n' for c, d in MASTER_ROWS),
+        encoding="utf-8",
+    )
+    return str(path)
+
+
+@pytest.fixture
+def tool_context():
+    return SimpleNamespace(state={})
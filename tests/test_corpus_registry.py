@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+import pytest
+
+from hsn_agent.tools.rag_client import rag_client
+from hsn_agent.tools.utils import CorpusRegistry
+
+CORPUS = "projects/p/locations/l/ragCorpora/1234"
+
+
+class FakeBackend:
+    def list_corpora(self):
+        return [SimpleNamespace(name=CORPUS, display_name="docs")]
+
+
+@pytest.fixture
+def registry():
+    rag_client.set_backend(FakeBackend())
+    yield CorpusRegistry()
+    rag_client.set_backend(None)
+
+
+@pytest.mark.parametrize("name", [CORPUS, "docs", "1234"])
+def test_resolves_resource_display_name_and_bare_id(registry, name):
+    assert registry.resolve(name) == CORPUS
+
+
+def test_bare_id_must_match_a_whole_path_segment(registry):
+    assert registry.resolve("234") is None
@@ -0,0 +1,44 @@
+import pytest
+
+from hsn_agent.tools.fuzzy import edit_distance
+from hsn_agent.tools.master_index import get_master_index
+
+
+@pytest.fixture(scope="module")
+def fuzzy():
+    return get_master_index().fuzzy
+
+
+@pytest.mark.parametrize("code", ["0101101", "01011001", "0110", "01012190", "0102101", "1001990"])
+def test_suggestions_ranked_by_edit_distance(fuzzy, code):
+    suggestions = fuzzy.suggest(code)
+    assert suggestions
+    distances = [d for _, d in suggestions]
+    assert distances == sorted(distances)
+    for candidate, distance in suggestions:
+        assert distance == edit_distance(code, candidate)
+
+
+def test_missing_digit_neighbours_within_bound_rank_close(fuzzy):
+    # Neighbours of a different length within two edits rank before the
+    # three-edit heading.
+    assert fuzzy.suggest("0101101") == [
+        ("01011010", 1), ("01011020", 2), ("01011090", 2), ("010121", 2), ("01012100", 2),
+    ]
+
+
+def test_transposition_is_one_edit(fuzzy):
+    assert ("01011010", 1) in fuzzy.suggest("01010110")
+
+
+@pytest.mark.parametrize("code", ["01011110", "0101", "0101100", "010110100", "10011010", "0202"])
+def test_every_code_one_edit_away_is_suggested(fuzzy, code):
+    codes = get_master_index().hierarchy.codes
+    within_one = {c for c in codes if c != code and edit_distance(code, c) == 1}
+    found = {c for c, d in fuzzy.suggest(code, n=len(codes)) if d == 1}
+    assert found == within_one
+
+
+def test_moved_digit_is_two_edits(fuzzy):
+    # "01011010" with its final 0 moved to the front.
+    assert ("01011010", 2) in fuzzy.suggest("00101101")
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from hsn_agent.tools import ingestion
+from hsn_agent.tools.ingestion import FakeImporter, IngestionPipeline
+
+CORPUS = "projects/p/locations/l/ragCorpora/1"
+
+
+class FlakyImporter(FakeImporter):
+    """Fails the first `failures` calls, then behaves like `FakeImporter`."""
+
+    def __init__(self, failures: int, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+
+    async def __call__(self, *args):
+        if self.failures:
+            self.failures -= 1
+            self.calls += 1
+            raise RuntimeError("503 service unavailable")
+        return await super().__call__(*args)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records backoff delays instead of sleeping."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, *args):
+        if delay:
+            delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(ingestion.asyncio, "sleep", sleep)
+    monkeypatch.setattr(ingestion.random, "uniform", lambda a, b: 1.0)
+    return delays
+
+
+def run(pipeline, paths, **kwargs):
+    return asyncio.run(pipeline.run(CORPUS, paths, **kwargs))
+
+
+def test_batches_share_the_embedding_budget():
+    importer = FakeImporter(latency=0.01)
+    pipeline = IngestionPipeline(
+        importer, batch_size=2, max_parallel=3, embedding_requests_per_min=900
+    )
+    paths = [f"gs://bucket/doc{i}.pdf" for i in range(10)]
+
+    summary = run(pipeline, paths)
+
+    assert summary["batches"] == 5
+    assert sorted(summary["imported_paths"]) == sorted(paths)
+    assert summary["failed"] == {}
+    assert importer.max_in_flight == 3
+    assert importer.requests_per_min == [300] * 5
+
+
+def test_single_batch_gets_the_whole_budget():
+    importer = FakeImporter(latency=0)
+    run(IngestionPipeline(importer, batch_size=10, embedding_requests_per_min=900), ["a", "b"])
+    assert importer.requests_per_min == [900]
+
+
+def test_failed_attempts_are_retried_with_exponential_backoff(sleeps):
+    importer = FlakyImporter(failures=2, latency=0)
+    pipeline = IngestionPipeline(importer, batch_size=5, max_retries=3, backoff=0.5)
+
+    summary = run(pipeline, ["a", "b", "c"])
+
+    assert importer.calls == 3
+    assert sleeps == [0.5, 1.0]
+    assert sorted(summary["imported_paths"]) == ["a", "b", "c"]
+    assert summary["failed"] == {}
+
+
+def test_exhausted_retries_report_the_last_error(sleeps):
+    importer = FlakyImporter(failures=10, latency=0)
+    summary = run(IngestionPipeline(importer, max_retries=2, backoff=0.1), ["a"])
+
+    assert importer.calls == 3
+    assert sleeps == [0.1, 0.2]
+    assert summary["failed"] == {"a": "503 service unavailable"}
+
+
+def test_failed_batch_falls_back_to_single_files(sleeps):
+    importer = FakeImporter(latency=0, failing=["bad.pdf"])
+    pipeline = IngestionPipeline(importer, batch_size=3, max_retries=1, backoff=0.1)
+
+    summary = run(pipeline, ["a.pdf", "bad.pdf", "c.pdf"])
+
+    assert sorted(summary["imported_paths"]) == ["a.pdf", "c.pdf"]
+    assert list(summary["failed"]) == ["bad.pdf"]
+    # 2 batch attempts, then a.pdf, bad.pdf (twice) and c.pdf
+    assert importer.calls == 6
+
+
+def test_rerun_resumes_from_checkpoint(sleeps):
+    checkpoint = []
+    progress = []
+
+    def on_progress(update):
+        progress.append(update)
+        checkpoint.extend(update["just_imported"])
+
+    paths = ["a", "b", "c", "d"]
+    first = FakeImporter(latency=0, failing=["c"])
+    summary = run(
+        IngestionPipeline(first, batch_size=2, max_retries=0), paths, on_progress=on_progress
+    )
+    assert sorted(checkpoint) == ["a", "b", "d"]
+    assert list(summary["failed"]) == ["c"]
+    assert progress[-1]["finished"] == 4
+
+    second = FakeImporter(latency=0)
+    summary = run(IngestionPipeline(second, batch_size=2), paths, done=checkpoint)
+    assert second.imported == ["c"]
+    assert summary["resumed"] == 3
+    assert summary["total"] == 1
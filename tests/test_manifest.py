@@ -0,0 +1,149 @@
+import asyncio
+import itertools
+import posixpath
+from types import SimpleNamespace
+
+import pytest
+
+from hsn_agent.tools import ingestion, manifest
+from hsn_agent.tools.documents_handler.add_document import CHECKPOINTS_KEY, ingest_paths
+from hsn_agent.tools.ingestion import FakeImportResponse, job_id
+from hsn_agent.tools.manifest import CorpusManifest
+from hsn_agent.tools.rag_client import rag_client
+from hsn_agent.tools.utils import corpus_registry
+
+CORPUS = "projects/p/locations/l/ragCorpora/7"
+
+
+def rag_file(file_id, display_name):
+    return SimpleNamespace(name=f"{CORPUS}/ragFiles/{file_id}", display_name=display_name)
+
+
+class FakeCorpus:
+    """`rag` backend and importer sharing one corpus; files are named by basename."""
+
+    def __init__(self):
+        self.files = []
+        self.imports = []
+        self._ids = itertools.count(1)
+
+    def list_corpora(self):
+        return [SimpleNamespace(name=CORPUS, display_name="docs")]
+
+    def list_files(self, corpus_resource_name):
+        return list(self.files)
+
+    def delete_file(self, name):
+        self.files = [f for f in self.files if f.name != name]
+
+    def add(self, path):
+        self.files.append(rag_file(next(self._ids), posixpath.basename(path)))
+
+    async def __call__(self, corpus_resource_name, paths, *args):
+        self.imports.extend(paths)
+        for path in paths:
+            self.add(path)
+        return FakeImportResponse(imported=len(paths))
+
+
+@pytest.fixture
+def corpus():
+    # Manifests go to the temporary HSN_INGESTION_MANIFEST_DIR (see conftest).
+    fake = FakeCorpus()
+    CorpusManifest.delete(CORPUS)
+    rag_client.set_backend(fake)
+    ingestion.set_importer(fake)
+    manifest.set_fingerprinter(lambda path: f"md5:{path}")
+    corpus_registry.invalidate()
+    yield fake
+    rag_client.set_backend(None)
+    ingestion.set_importer(None)
+    manifest.set_fingerprinter(None)
+    corpus_registry.invalidate()
+    CorpusManifest.delete(CORPUS)
+
+
+def test_reconcile_prefers_files_created_since_the_previous_listing():
+    m = CorpusManifest(CORPUS, "unused", {"gs://b/doc.pdf": {"rag_file_id": None}})
+    files = [rag_file(1, "doc.pdf"), rag_file(2, "doc.pdf")]
+
+    m.reconcile(files)
+    assert m.entries["gs://b/doc.pdf"]["rag_file_id"] is None
+
+    m.reconcile(files, previous_ids=["1"])
+    assert m.entries["gs://b/doc.pdf"]["rag_file_id"] == "2"
+
+
+def test_reconcile_drops_unidentified_entries_without_a_listed_file():
+    m = CorpusManifest(CORPUS, "unused", {"gs://a/gone.pdf": {"rag_file_id": None}})
+    assert m.reconcile([rag_file(1, "other.pdf")]) == 1
+    assert m.entries == {}
+
+
+def test_plan_keeps_unresolved_entries_out_of_changed():
+    m = CorpusManifest(CORPUS, "unused")
+    m.record("gs://a/doc.pdf", "md5:1", 512, 100)
+    m.record("gs://b/doc.pdf", "md5:2", 512, 100)
+
+    fingerprints = {"gs://a/doc.pdf": "md5:1", "gs://b/doc.pdf": "md5:changed"}
+    unchanged, changed, new, unresolved = m.plan(list(fingerprints), fingerprints, 512, 100)
+    assert (unchanged, changed, new, unresolved) == ([], ["gs://b/doc.pdf"], [], ["gs://a/doc.pdf"])
+
+
+def test_ambiguous_basenames_are_not_reimported(corpus):
+    paths = ["gs://a/doc.pdf", "gs://b/doc.pdf"]
+    first = asyncio.run(ingest_paths("docs", paths, SimpleNamespace(state={})))
+    assert first["status"] == "success"
+    assert corpus.imports == paths
+
+    second = asyncio.run(ingest_paths("docs", paths, SimpleNamespace(state={})))
+    assert second["status"] == "success"
+    assert corpus.imports == paths
+    assert sorted(second["unchanged"]) == paths
+    assert len(corpus.files) == 2
+
+
+def test_checkpoint_resumed_paths_are_recorded_in_the_manifest(corpus):
+    paths = ["gs://a/one.pdf", "gs://a/two.pdf"]
+    # An earlier run imported one.pdf, then stopped before saving the manifest.
+    corpus.add("gs://a/one.pdf")
+    state = {CHECKPOINTS_KEY: {job_id(CORPUS, paths): {"corpus": CORPUS, "done": [paths[0]]}}}
+
+    result = asyncio.run(ingest_paths("docs", paths, SimpleNamespace(state=state)))
+    assert result["status"] == "success"
+    assert result["resumed"] == 1
+    assert corpus.imports == [paths[1]]
+
+    entries = CorpusManifest.load(CORPUS).entries
+    assert {p: e["rag_file_id"] for p, e in entries.items()} == {paths[0]: "1", paths[1]: "2"}
+
+    again = asyncio.run(ingest_paths("docs", paths, SimpleNamespace(state={})))
+    assert sorted(again["unchanged"]) == paths
+    assert corpus.imports == [paths[1]]
+
+
+def test_concurrent_ingestions_keep_each_others_entries(corpus):
+    async def both():
+        return await asyncio.gather(
+            ingest_paths("docs", ["gs://a/one.pdf"], SimpleNamespace(state={})),
+            ingest_paths("docs", ["gs://a/two.pdf"], SimpleNamespace(state={})),
+        )
+
+    assert [r["status"] for r in asyncio.run(both())] == ["success", "success"]
+    entries = CorpusManifest.load(CORPUS).entries
+    assert sorted(entries) == ["gs://a/one.pdf", "gs://a/two.pdf"]
+
+
+def test_save_merges_removals_and_additions_from_separate_copies(corpus):
+    seed = CorpusManifest.load(CORPUS)
+    seed.record("gs://a/old.pdf", "md5:old", 512, 100)
+    seed.save()
+
+    first, second = CorpusManifest.load(CORPUS), CorpusManifest.load(CORPUS)
+    del first.entries["gs://a/old.pdf"]
+    second.record("gs://a/new.pdf", "md5:new", 512, 100)
+    first.save()
+    second.save()
+
+    assert sorted(CorpusManifest.load(CORPUS).entries) == ["gs://a/new.pdf"]
+    assert sorted(second.entries) == ["gs://a/new.pdf"]
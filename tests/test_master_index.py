@@ -0,0 +1,56 @@
+import os
+import time
+
+from hsn_agent.tools import master_index
+from hsn_agent.tools.master_index import MasterWatcher, get_master_index, reload_master_index
+from hsn_agent.tools.vector_index import embedder_key
+
+
+def _append_row(path, code, description):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f'{code},"{description}"\n')
+    # Make sure the signature changes even on coarse mtime filesystems.
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_reload_rebuilds_derived_structures(master_csv):
+    old = get_master_index(master_csv)
+    old.fuzzy, old.lexical, old.vectors
+    assert f"vectors:{embedder_key()}" in old._derived
+
+    _append_row(master_csv, "01022100", "LIVE BOVINE ANIMALS CATTLE PURE-BRED")
+    diff = reload_master_index(master_csv)
+
+    assert diff["added"] == 1
+    new = get_master_index(master_csv)
+    assert new is not old
+    assert set(new._derived) == set(old._derived)
+    assert "01022100" in new.vectors.codes
+    assert new.fuzzy.suggest("01022101", n=1)[0][0] == "01022100"
+
+
+def test_watcher_survives_unexpected_reload_errors(master_csv, monkeypatch):
+    index = get_master_index(master_csv)
+    calls = []
+
+    def failing_reload(path):
+        calls.append(path)
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(master_index, "reload_master_index", failing_reload)
+    watcher = MasterWatcher(os.path.abspath(master_csv), 0.01)
+    watcher.start()
+    try:
+        # The second change is only picked up if the first failure left the
+        # watcher running.
+        for expected, code in enumerate(("01022100", "01022900"), 1):
+            _append_row(master_csv, code, "LIVE BOVINE ANIMALS CATTLE")
+            deadline = time.monotonic() + 5
+            while len(calls) < expected and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert len(calls) == 2
+    finally:
+        watcher.stop()
+        watcher.join(1)
+    assert get_master_index(master_csv) is index
@@ -0,0 +1,43 @@
+import pytest
+
+from hsn_agent.tools.hierarchy import HSNHierarchy
+from hsn_agent.tools.master_index import MasterLoadError, build_master_index, read_master_table
+from hsn_agent.tools.master_snapshot import SnapshotHierarchy, compile_snapshot
+
+PROBES = ["01", "0101", "010121", "01012100", "01011090", "01011099", "0103", "0102101", "99", ""]
+
+
+@pytest.fixture
+def snapshot_index(master_csv, tmp_path):
+    return build_master_index(compile_snapshot(master_csv, str(tmp_path / "master.hsnsnap")))
+
+
+def test_snapshot_hierarchy_is_read_from_the_file(snapshot_index):
+    assert isinstance(snapshot_index.hierarchy, SnapshotHierarchy)
+
+
+def test_snapshot_hierarchy_matches_in_memory_hierarchy(master_csv, snapshot_index):
+    expected = HSNHierarchy(read_master_table(master_csv))
+    hierarchy = snapshot_index.hierarchy
+    assert hierarchy.codes == expected.codes
+    for method in ("parent", "ancestors", "levels", "children", "subtree",
+                   "descendant_count", "non_other_ancestor"):
+        for code in PROBES:
+            assert getattr(hierarchy, method)(code) == getattr(expected, method)(code), (method, code)
+
+
+def test_snapshot_lookups(master_csv, snapshot_index):
+    table = read_master_table(master_csv)
+    assert dict(snapshot_index.table) == table
+    assert snapshot_index.get("01012100") == table["01012100"]
+    assert snapshot_index.get("0101210") is None
+    assert "0101210" not in snapshot_index
+
+
+def test_older_snapshot_format_is_refused(snapshot_index, tmp_path):
+    path = tmp_path / "master.hsnsnap"
+    data = bytearray(path.read_bytes())
+    data[8:10] = (1).to_bytes(2, "little")
+    path.write_bytes(bytes(data))
+    with pytest.raises(MasterLoadError, match="recompile"):
+        build_master_index(str(path))
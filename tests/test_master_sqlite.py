@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from hsn_agent.tools.batch_validate import check_code
+from hsn_agent.tools.master_index import STATE_KEY, get_master_index
+from hsn_agent.tools.master_sqlite import compile_database
+from hsn_agent.tools.validate import validate_hsn_code
+
+
+def test_validate_against_sqlite_master(master_csv):
+    database = compile_database(master_csv)
+    context = SimpleNamespace(state={STATE_KEY: {"path": database}})
+
+    results = validate_hsn_code("01011010 0101101 12a", context)["results"]
+
+    assert [r["status"] for r in results] == ["valid", "not_found", "invalid_format"]
+    assert results[1]["suggestions"][0]["code"] == "01011010"
+    # Repeated typos are served from the suggestion cache.
+    fuzzy = get_master_index(database).fuzzy
+    assert fuzzy.suggest("0101101") == fuzzy.suggest("0101101")
+    assert fuzzy._cached.cache_info().hits >= 1
+
+
+def test_batch_check_code_against_sqlite_master(master_csv):
+    index = get_master_index(compile_database(master_csv))
+    result = check_code(index, "0101101")
+    assert result["status"] == "not_found"
+    assert result["suggestions"][0] == "01011010"
@@ -0,0 +1,52 @@
+import pytest
+
+from hsn_agent import metrics as metrics_module
+from hsn_agent.metrics import Exporter, instrument_callback, instrument_tool, metrics
+
+
+def test_exporter_requires_record():
+    with pytest.raises(TypeError):
+        Exporter()
+
+    class Incomplete(Exporter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_exporter_receives_updates():
+    class Recording(Exporter):
+        def __init__(self):
+            self.records = []
+
+        def record(self, kind, name, labels, value):
+            self.records.append((kind, name, labels, value))
+
+    exporter = Recording()
+    metrics_module.set_exporter(exporter)
+    try:
+        metrics.counter("test_exporter_total", source="test").inc(2)
+    finally:
+        metrics_module.set_exporter(None)
+    assert exporter.records == [("counter", "test_exporter_total", {"source": "test"}, 2)]
+
+
+def _series(kind, name, **labels):
+    return [e for e in metrics.snapshot()[kind].get(name, []) if e["labels"] == labels]
+
+
+def test_callbacks_are_not_recorded_as_tools():
+    def route_test_callback(callback_context, llm_request):
+        return None
+
+    def test_tool(code: str) -> dict:
+        return {"status": "error"}
+
+    instrument_callback(route_test_callback)(None, None)
+    instrument_tool(test_tool)("01")
+
+    assert _series("histograms", "hsn_callback_latency_seconds", callback="route_test_callback")[0]["count"] == 1
+    assert not _series("histograms", "hsn_tool_latency_seconds", tool="route_test_callback")
+    assert _series("histograms", "hsn_tool_latency_seconds", tool="test_tool")[0]["count"] == 1
+    assert _series("counters", "hsn_tool_errors_total", tool="test_tool")[0]["value"] == 1
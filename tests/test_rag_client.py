@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from hsn_agent.metrics import metrics
+from hsn_agent.tools import rag_client as rag_client_module
+from hsn_agent.tools.rag_client import RagClient, share_gapic_clients
+
+
+def _config(**kwargs):
+    return SimpleNamespace(**kwargs)
+
+
+class FakeRag:
+    """The `vertexai.rag` functions `RagClient` calls, with hooks for tests."""
+
+    RagResource = staticmethod(_config)
+    RagRetrievalConfig = staticmethod(_config)
+    Filter = staticmethod(_config)
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.pages_read = 0
+        self._lock = threading.Lock()
+
+    def retrieval_query(self, rag_resources, text, rag_retrieval_config):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            self.release.wait(5)
+            time.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return SimpleNamespace(text=text)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def list_corpora(self):
+        # A pager: later pages are only fetched while iterating.
+        for page in range(3):
+            self.pages_read += 1
+            for i in range(2):
+                yield SimpleNamespace(name=f"corpora/{page}-{i}")
+
+
+def _wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return predicate()
+
+
+def test_identical_inflight_queries_are_coalesced():
+    rag = FakeRag()
+    rag.release.clear()
+    client = RagClient(backend=rag, max_concurrency=4)
+
+    first = client.retrieval_query("corpora/1", "polo horses", 5, 0.5)
+    second = client.retrieval_query("corpora/1", "polo horses", 5, 0.5)
+    other = client.retrieval_query("corpora/1", "steel screws", 5, 0.5)
+    rag.release.set()
+
+    assert first.result(5) is second.result(5)
+    assert other.result(5).text == "steel screws"
+    assert rag.calls == 2
+    assert client.stats()["coalesced"] == 1
+    assert _wait_until(lambda: not client._inflight)
+
+    # Once finished, the same query is a new remote call.
+    client.retrieval_query("corpora/1", "polo horses", 5, 0.5).result(5)
+    assert rag.calls == 3
+
+
+def test_max_concurrency_is_respected():
+    rag = FakeRag(delay=0.02)
+    client = RagClient(backend=rag, max_concurrency=2)
+
+    async def run():
+        await asyncio.gather(*(
+            client.retrieval_query("corpora/1", f"query {i}", 5, 0.5) for i in range(8)
+        ))
+
+    asyncio.run(run())
+    assert rag.calls == 8
+    assert rag.max_active == 2
+
+
+def test_errors_reach_the_caller_and_are_counted():
+    rag = FakeRag(error=RuntimeError("quota exceeded"))
+    client = RagClient(backend=rag)
+    errors = metrics.counter("hsn_rag_errors_total", method="retrieval_query")
+    before = errors.value
+
+    async def run():
+        return await client.retrieval_query("corpora/1", "polo horses", 5, 0.5)
+
+    with pytest.raises(RuntimeError, match="quota exceeded"):
+        asyncio.run(run())
+    assert errors.value == before + 1
+    assert _wait_until(lambda: not client._inflight)
+
+
+def test_list_corpora_drains_the_pager():
+    rag = FakeRag()
+    client = RagClient(backend=rag)
+
+    corpora = client.list_corpora().result(5)
+    assert [c.name for c in corpora] == [f"corpora/{p}-{i}" for p in range(3) for i in range(2)]
+    assert rag.pages_read == 3
+
+
+@pytest.fixture
+def gapic_utils(monkeypatch):
+    monkeypatch.setattr(rag_client_module, "_shared_clients", {})
+    built = []
+
+    def factory(service):
+        def create():
+            client = object()
+            built.append((service, client))
+            return client
+        return create
+
+    return SimpleNamespace(
+        built=built,
+        create_rag_service_client=factory("rag"),
+        create_rag_data_service_client=factory("rag_data"),
+    )
+
+
+def test_gapic_clients_are_reused(gapic_utils):
+    config = SimpleNamespace(_project="p", _location="asia-south1", _credentials=object())
+    share_gapic_clients(gapic_utils, config)
+    share_gapic_clients(gapic_utils, config)  # idempotent
+
+    first = gapic_utils.create_rag_service_client()
+    assert gapic_utils.create_rag_service_client() is first
+    data = gapic_utils.create_rag_data_service_client()
+    assert data is not first
+    assert gapic_utils.create_rag_data_service_client() is data
+    assert len(gapic_utils.built) == 2
+
+
+def test_gapic_clients_follow_config_changes(gapic_utils):
+    config = SimpleNamespace(_project="p", _location="asia-south1", _credentials=object())
+    share_gapic_clients(gapic_utils, config)
+    first = gapic_utils.create_rag_service_client()
+
+    config._credentials = object()
+    second = gapic_utils.create_rag_service_client()
+    assert second is not first
+    assert gapic_utils.create_rag_service_client() is second
+
+    config._api_endpoint = "europe-west4-aiplatform.googleapis.com"
+    assert gapic_utils.create_rag_service_client() is not second
+
+
+def test_missing_gapic_factory_is_reported(gapic_utils, caplog):
+    del gapic_utils.create_rag_service_client
+    share_gapic_clients(gapic_utils, SimpleNamespace())
+    assert "create_rag_service_client" in caplog.text
+    assert gapic_utils.create_rag_data_service_client() is gapic_utils.create_rag_data_service_client()
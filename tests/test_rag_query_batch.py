@@ -0,0 +1,34 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from hsn_agent.tools.documents_handler.rag_query_batch import rag_query_batch, split_products
+
+
+def test_split_products():
+    assert split_products(["1. cotton shirts\n2. Steel screws; cotton shirts", "• polo horses"]) == [
+        "cotton shirts", "Steel screws", "polo horses",
+    ]
+
+
+@pytest.mark.parametrize("profile", ["verbose", "compact", "ids"])
+def test_every_item_has_a_status(profile):
+    context = SimpleNamespace(state={"output_profile": profile})
+    result = asyncio.run(rag_query_batch("testing", ["01011010\n0101 9999\nlive horses"], context))
+
+    assert result["status"] == "success"
+    assert [r["query"] for r in result["results"]] == ["01011010", "0101 9999", "live horses"]
+    assert [r["status"] for r in result["results"]] == ["success", "success", "success"]
+
+
+def test_validation_error_counts_as_failed(monkeypatch):
+    from hsn_agent.tools.documents_handler import rag_query_batch as module
+
+    monkeypatch.setattr(
+        module, "validate_hsn_code",
+        lambda codes, tool_context: {"status": "error", "message": "Could not load HSN master."},
+    )
+    result = asyncio.run(rag_query_batch("testing", ["0101, 0102"], SimpleNamespace(state={})))
+    assert result["status"] == "error"
+    assert "2 failed" in result["message"]
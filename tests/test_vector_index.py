@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from hsn_agent.tools import vector_index
+from hsn_agent.tools.master_index import get_master_index
+
+
+class ConstantEmbedder:
+    name = "constant-test"
+
+    def __call__(self, texts):
+        out = np.zeros((len(texts), 4), dtype=np.float32)
+        out[:, 0] = 1.0
+        return out
+
+
+def test_set_embedder_applies_to_live_index(master_csv):
+    index = get_master_index(master_csv)
+    default = index.vectors
+    assert isinstance(default.embed, vector_index.HashingEmbedder)
+
+    embedder = ConstantEmbedder()
+    vector_index.set_embedder(embedder)
+    try:
+        assert index.vectors.embed is embedder
+        assert index.vectors.matrix.shape == (len(index), 4)
+    finally:
+        vector_index.set_embedder(None)
+    assert index.vectors is default
+
+
+def test_sparse_matrix_matches_dense_embeddings():
+    texts = ["LIVE HORSES", "SCREWS OF IRON OR STEEL", "MOBILE PHONES", ""]
+    embedder = vector_index.HashingEmbedder().fit(texts)
+    dense = embedder(texts)
+    sparse = embedder.sparse(texts)
+    for q in embedder(["steel screws", "horses", "nothing known"]):
+        np.testing.assert_allclose(sparse @ q, dense @ q, atol=1e-6)
+
+
+@pytest.fixture(scope="module")
+def master_vectors():
+    return get_master_index().vectors
+
+
+@pytest.mark.parametrize(
+    "query, code",
+    [
+        ("mobile phones", "85171219"),
+        ("men's shirts of cotton", "62052000"),
+        ("coffee roasted", "0901"),
+    ],
+)
+def test_search_returns_relevant_codes(master_vectors, query, code):
+    assert master_vectors.search(query)[0][0] == code
+
+
+def test_search_skips_unrelated_codes(master_vectors):
+    # With too few hash buckets "screw" shared one with "safrole" and
+    # "cloxacillin", which came back under the distance threshold.
+    table = get_master_index()
+    for code, _ in master_vectors.search("steel screws"):
+        assert "SCREW" in table.get(code).upper()
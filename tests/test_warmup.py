@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from hsn_agent import warmup
+from hsn_agent.metrics import metrics
+
+
+def gauge(name):
+    return metrics.gauge(name).value
+
+
+@pytest.fixture
+def query_log(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    calls = [
+        {"tool": "validate_hsn_code", "args": {"codes": "0101101, 0101"}},
+        {"tool": "validate_hsn_code", "args": {"codes": "0101101"}},
+        {"tool": "rag_query", "args": {"corpus_name": "testing", "query": "ends with 10"}},
+    ]
+    path.write_text("".join(json.dumps(c) + "\n" for c in calls) + "not json\n", encoding="utf-8")
+    return str(path)
+
+
+def test_tally_log(query_log):
+    typos, queries = warmup.tally_log(warmup.read_log(query_log), {"0101": "LIVE HORSES"})
+    assert typos == {"0101101": 2}
+    assert queries == {("testing", "ends with 10"): 1}
+
+
+def test_successful_warmup_reports_ready(query_log):
+    status = warmup.run_warmup(query_log, time_budget=30)
+    assert status["state"] == "ready"
+    assert status["typos_warmed"] == 1
+    assert gauge("hsn_warmup_ready") == 1
+    assert gauge("hsn_warmup_failed") == 0
+
+
+def test_failed_warmup_is_not_reported_ready(tmp_path):
+    status = warmup.run_warmup(str(tmp_path / "missing.jsonl"), time_budget=30)
+    assert status["state"] == "failed"
+    assert gauge("hsn_warmup_ready") == 0
+    assert gauge("hsn_warmup_failed") == 1
+    assert warmup.wait_for_warmup(0)